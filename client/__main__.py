@@ -0,0 +1,138 @@
+"""
+Module: Command line bulk downloader
+
+Copyright 2023 Dominic Kneup.
+Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+
+Usage:
+    python -m client quote -i symbols.txt -o quotes.jsonl
+    python -m client history --range 1y -o bars.csv --workers 8 --rate 4 \
+        --checkpoint bars.done < symbols.txt
+"""
+import argparse
+import logging
+import sys
+from datetime import datetime
+from typing import List, Optional, Sequence
+from client import request_log
+from client.api.quote import Quote
+from client.downloader import (
+    Checkpoint, DownloadOptions, Downloader, WRITERS, open_writer, read_symbols
+)
+from client.exceptions.APIClientExceptions import BaseAPIClientException
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """
+    Parses the command line.
+
+    Args:
+        argv (Optional[Sequence[str]]): The arguments (defaults to sys.argv).
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m client',
+        description='Download quotes, history or recommendations for a list of symbols.')
+    parser.add_argument('kind', choices=Downloader.kinds, help='What to download')
+    parser.add_argument('-i', '--input', default='-',
+                        help='Symbol file, whitespace or comma separated (default: stdin)')
+    parser.add_argument('-o', '--output', required=True,
+                        help='Output file (a directory for parquet)')
+    parser.add_argument('-f', '--format', choices=sorted(WRITERS),
+                        help='Output format (default: inferred from the output extension)')
+    parser.add_argument('-w', '--workers', type=int, default=4,
+                        help='Parallel downloads (default: 4)')
+    parser.add_argument('-r', '--rate', type=float, default=2.0,
+                        help='Symbol downloads per second across all workers, 0 = unlimited '
+                             '(default: 2)')
+    parser.add_argument('-c', '--checkpoint',
+                        help='Checkpoint file; completed symbols are skipped and the output is '
+                             'appended')
+    parser.add_argument('--start', type=datetime.fromisoformat, help='History start (ISO date)')
+    parser.add_argument('--end', type=datetime.fromisoformat,
+                        help='History end, exclusive (default: now)')
+    parser.add_argument('--range', dest='data_range',
+                        help='History range instead of dates (e.g. 1y, max)')
+    parser.add_argument('--interval', help='History interval (e.g. 1d, 1wk)')
+    parser.add_argument('--fields', help='Comma separated quote fields')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Log every symbol')
+    parser.add_argument('--request-log', action='store_true',
+                        help='Write one JSON line per HTTP request (latency, size, status) '
+                             'to stderr')
+
+    args = parser.parse_args(argv)
+    if args.kind == 'history' and args.start is None and args.data_range is None:
+        parser.error('history needs --start or --range')
+    return args
+
+
+def read_input(path: str) -> List[str]:
+    """
+    Reads the symbols from a file or stdin ("-").
+
+    Args:
+        path (str): The symbol file.
+
+    Returns:
+        List[str]: The normalized, unique symbols.
+    """
+    if path == '-':
+        return read_symbols(sys.stdin)
+    with open(path, encoding='utf-8') as file:
+        return read_symbols(file)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Runs a download job and prints the summary to stderr.
+
+    Args:
+        argv (Optional[Sequence[str]]): The arguments (defaults to sys.argv).
+
+    Returns:
+        int: Exit code (0 = all symbols downloaded, 1 = failures, 2 = invalid input,
+        130 = interrupted).
+    """
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s', force=True)
+    if args.verbose:
+        logging.getLogger('client').setLevel(logging.DEBUG)
+    if args.request_log:
+        request_log.enable()
+
+    fields = [name.strip() for name in args.fields.split(',')] if args.fields else None
+    try:
+        if fields is not None:
+            Quote.field_projection(fields)
+        symbols = read_input(args.input)
+        checkpoint = Checkpoint(args.checkpoint)
+        writer = open_writer(args.output, args.format, append=len(checkpoint) > 0)
+    except (OSError, BaseAPIClientException) as e:
+        print(f'error: {e}', file=sys.stderr)
+        return 2
+
+    options = DownloadOptions(
+        start_date=args.start,
+        end_date=args.end,
+        data_range=args.data_range,
+        interval=args.interval,
+        fields=fields)
+    downloader = Downloader(args.kind, writer, workers=args.workers, rate=args.rate,
+                            checkpoint=checkpoint, options=options)
+    try:
+        summary = downloader.run(symbols)
+    finally:
+        writer.close()
+        checkpoint.close()
+
+    print(summary.format(), file=sys.stderr)
+    if summary.interrupted:
+        return 130
+    return 1 if summary.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
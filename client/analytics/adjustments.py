@@ -0,0 +1,286 @@
+"""
+Module: Adjustments
+
+Copyright 2023 Dominic Kneup.
+Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Dict, FrozenSet, Iterable, Mapping, Optional, Tuple
+import numpy as np
+from client.analytics.series import to_arrays
+from client.exceptions.APIClientExceptions import TransformerException
+
+# One corporate action: event type ("splits", "dividends" or "capitalGains"), timestamp
+# and value (split ratio numerator / denominator or the cash amount)
+Action = Tuple[str, int, float]
+
+
+def corporate_actions(events: Mapping[str, Mapping[str, Any]],
+                      include_capital_gains: bool = True) -> FrozenSet[Action]:
+    """
+    Converts the event tables of the "chart" output into corporate actions.
+
+    Args:
+        events (Mapping[str, Mapping[str, Any]]): The "events" of the chart output
+            (see HistoricDataTransformer.transform_events).
+        include_capital_gains (bool): Treat capital gain distributions like dividends.
+
+    Returns:
+        FrozenSet[Action]: The actions (splits without ratio and zero amounts are left out).
+    """
+    actions = set()
+    splits = events.get('splits') or {}
+    for timestamp, numerator, denominator in zip(splits.get('timestamp', ()),
+                                                 splits.get('numerator', ()),
+                                                 splits.get('denominator', ())):
+        if numerator and denominator:
+            actions.add(('splits', int(timestamp), float(numerator) / float(denominator)))
+    for event_type in ('dividends', 'capitalGains') if include_capital_gains else ('dividends',):
+        table = events.get(event_type) or {}
+        for timestamp, amount in zip(table.get('timestamp', ()), table.get('amount', ())):
+            if amount:
+                actions.add((event_type, int(timestamp), float(amount)))
+    return frozenset(actions)
+
+
+def action_factors(timestamps: np.ndarray, close: np.ndarray, actions: Iterable[Action],
+                   split_adjusted: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the back-adjustment factors of corporate actions in one vectorized pass.
+
+    Every action adjusts the bars before its date: a split with ratio r divides prices by r
+    and multiplies volumes by r, a dividend d multiplies prices by 1 - d / close of the last
+    bar before the ex-date. The factor of a bar is the product over all later actions.
+
+    Args:
+        timestamps (np.ndarray): Sorted bar timestamps.
+        close (np.ndarray): Close prices (same unit as the dividend amounts).
+        actions (Iterable[Action]): The corporate actions.
+        split_adjusted (bool): The bars are already split-adjusted (the chart API adjusts
+            prices and volumes for splits), so splits are not applied again.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Price factor and volume factor per bar.
+    """
+    price_steps = np.ones(timestamps.size)
+    volume_steps = np.ones(timestamps.size)
+    actions = sorted(actions)
+    if actions:
+        event_types, stamps, amounts = zip(*actions)
+        is_split = np.array(event_types) == 'splits'
+        values = np.array(amounts, dtype=np.float64)
+        # Index of the last bar before the action; actions before the first bar change nothing
+        last = np.searchsorted(timestamps, np.array(stamps, dtype=np.int64), side='left') - 1
+        applies = last >= 0
+
+        if not split_adjusted:
+            splits = is_split & applies
+            np.multiply.at(price_steps, last[splits], 1.0 / values[splits])
+            np.multiply.at(volume_steps, last[splits], values[splits])
+
+        dividends = ~is_split & applies
+        np.multiply.at(price_steps, last[dividends],
+                       _dividend_ratios(values[dividends], close[last[dividends]]))
+
+    return np.cumprod(price_steps[::-1])[::-1], np.cumprod(volume_steps[::-1])[::-1]
+
+
+def _dividend_ratios(amounts: np.ndarray, previous_close: np.ndarray) -> np.ndarray:
+    """
+    Computes the price ratios of dividends.
+
+    Args:
+        amounts (np.ndarray): The cash amounts.
+        previous_close (np.ndarray): Close of the last bar before each ex-date.
+
+    Returns:
+        np.ndarray: 1 - amount / previous close (1 for a dividend without a usable previous
+        close, e.g. a gap or an amount above the price).
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratios = 1.0 - amounts / previous_close
+    ratios[~(np.isfinite(ratios) & (ratios > 0))] = 1.0
+    return ratios
+
+
+def apply_factors(arrays: Mapping[str, np.ndarray], price_factor: np.ndarray,
+                  volume_factor: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Multiplies the bars with adjustment factors.
+
+    Args:
+        arrays (Mapping[str, np.ndarray]): Output of series.to_arrays.
+        price_factor (np.ndarray): Factor for open, low, high and close.
+        volume_factor (np.ndarray): Factor for the volume.
+
+    Returns:
+        Dict[str, np.ndarray]: timestamp, adjusted open, low, high, close and volume and the
+        price "factor".
+    """
+    adjusted = {'timestamp': arrays['timestamp']}
+    for field in ('open', 'low', 'high', 'close'):
+        adjusted[field] = arrays[field] * price_factor
+    if 'volume' in arrays:
+        adjusted['volume'] = arrays['volume'] * volume_factor
+    adjusted['factor'] = price_factor
+    return adjusted
+
+
+def adjust(chart: Mapping[str, Any], split_adjusted: bool = True,
+           include_capital_gains: bool = True) -> Dict[str, np.ndarray]:
+    """
+    Adjusts the bars of one chart response for its splits and dividends.
+
+    Args:
+        chart (Mapping[str, Any]): HistoricData output "chart" (bars and events of one response).
+        split_adjusted (bool): See action_factors.
+        include_capital_gains (bool): See corporate_actions.
+
+    Returns:
+        Dict[str, np.ndarray]: See apply_factors.
+    """
+    arrays = to_arrays(chart['bars'])
+    actions = corporate_actions(chart.get('events') or {}, include_capital_gains)
+    price_factor, volume_factor = action_factors(arrays['timestamp'], arrays['close'], actions,
+                                                 split_adjusted)
+    return apply_factors(arrays, price_factor, volume_factor)
+
+
+@dataclass
+class _Adjustment:
+    """
+    Cached factors of one symbol and the inputs they were computed from.
+    """
+    timestamps: np.ndarray
+    close: np.ndarray
+    actions: FrozenSet[Action]
+    price_factor: np.ndarray
+    volume_factor: np.ndarray
+
+
+class AdjustmentCache:
+    """
+    Bounded LRU cache of adjustment factors per symbol. A chart that repeats the cached bars
+    (optionally with appended bars) and adds corporate actions only computes the factors of
+    the new actions; other changes (a moved window, a corrected action) recompute everything.
+
+    Attributes:
+        split_adjusted (bool): See action_factors.
+        include_capital_gains (bool): See corporate_actions.
+        max_symbols (int): Maximum number of cached symbols.
+        counters (Dict[str, int]): reused, incremental and full computations.
+    """
+    def __init__(self, split_adjusted: bool = True, include_capital_gains: bool = True,
+                 max_symbols: int = 1024):
+        self.split_adjusted = split_adjusted
+        self.include_capital_gains = include_capital_gains
+        self.max_symbols = max_symbols
+        self.counters = {'reused': 0, 'incremental': 0, 'full': 0}
+        self._entries: "OrderedDict[str, _Adjustment]" = OrderedDict()
+        self._lock = Lock()
+
+    def adjust(self, chart: Mapping[str, Any],
+               symbol: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """
+        Adjusts the bars of a chart response, reusing the cached factors of the symbol.
+
+        Args:
+            chart (Mapping[str, Any]): HistoricData output "chart".
+            symbol (Optional[str]): The symbol (defaults to the symbol in the chart meta).
+
+        Returns:
+            Dict[str, np.ndarray]: See apply_factors.
+
+        Raises:
+            TransformerException: If no symbol is given and the chart has no meta.
+        """
+        if symbol is None:
+            meta = chart.get('meta')
+            if meta is None:
+                raise TransformerException('Chart without meta needs a symbol')
+            symbol = meta.symbol
+
+        arrays = to_arrays(chart['bars'])
+        timestamps, close = arrays['timestamp'], arrays['close']
+        actions = corporate_actions(chart.get('events') or {}, self.include_capital_gains)
+        with self._lock:
+            cached = self._entries.get(symbol)
+
+        factors = self._update(cached, timestamps, close, actions) if cached is not None else None
+        if factors is None:
+            factors = action_factors(timestamps, close, actions, self.split_adjusted)
+            kind = 'full'
+        elif cached is not None and factors[0] is cached.price_factor:
+            kind = 'reused'
+        else:
+            kind = 'incremental'
+
+        with self._lock:
+            self.counters[kind] += 1
+            self._entries[symbol] = _Adjustment(timestamps, close, actions, *factors)
+            self._entries.move_to_end(symbol)
+            while len(self._entries) > self.max_symbols:
+                self._entries.popitem(last=False)
+        return apply_factors(arrays, *factors)
+
+    def _update(self, cached: _Adjustment, timestamps: np.ndarray, close: np.ndarray,
+                actions: FrozenSet[Action]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Derives the factors from the cached ones if the chart extends the cached chart.
+
+        Args:
+            cached (_Adjustment): The cached factors.
+            timestamps (np.ndarray): Bar timestamps of the chart.
+            close (np.ndarray): Close prices of the chart.
+            actions (FrozenSet[Action]): Corporate actions of the chart.
+
+        Returns:
+            Optional[Tuple[np.ndarray, np.ndarray]]: Price and volume factors, or None if
+            they have to be recomputed.
+        """
+        count = cached.timestamps.size
+        if count == 0 or timestamps.size < count or not cached.actions <= actions:
+            return None
+        # The factors of the cached bars depend on their timestamps and on the closes before
+        # the last one (the last close is only used by actions after the cached bars)
+        if not (np.array_equal(timestamps[:count], cached.timestamps)
+                and np.array_equal(close[:count - 1], cached.close[:count - 1], equal_nan=True)):
+            return None
+        appended = timestamps.size > count
+        last_timestamp = cached.timestamps[-1]
+        if appended and any(stamp > last_timestamp for _, stamp, _ in cached.actions):
+            # An action after the cached bars also applies to some appended bars
+            return None
+        if not appended and not np.array_equal(close, cached.close, equal_nan=True):
+            # The last close (e.g. of a bar still trading) changed the cached actions after it
+            return None
+
+        new_actions = actions - cached.actions
+        if not appended and not new_actions:
+            return cached.price_factor, cached.volume_factor
+        price_factor, volume_factor = action_factors(timestamps, close, new_actions,
+                                                     self.split_adjusted)
+        price_factor[:count] *= cached.price_factor
+        volume_factor[:count] *= cached.volume_factor
+        return price_factor, volume_factor
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        """
+        Drops the cached factors of a symbol (all symbols if None).
+
+        Args:
+            symbol (Optional[str]): The symbol.
+        """
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(symbol, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._entries
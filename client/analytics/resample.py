@@ -0,0 +1,272 @@
+"""
+Module: Resample
+
+Copyright 2023 Dominic Kneup.
+Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+"""
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone, tzinfo
+from functools import lru_cache
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple, Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import numpy as np
+from client.exceptions.APIClientExceptions import TransformerException
+
+# Aggregation of the bar columns: first / max / min / last / sum per bucket
+AGGREGATIONS: Dict[str, str] = {
+    'open': 'first',
+    'high': 'max',
+    'low': 'min',
+    'close': 'last',
+    'adjclose': 'last',
+    'volume': 'sum',
+}
+
+# Rule units and their length in seconds (calendar units have no fixed length)
+UNITS: Dict[str, Optional[int]] = {
+    'm': 60, 'h': 3600, 'd': 86400, 'wk': None, 'mo': None, 'y': None,
+}
+
+_RULE = re.compile(r'^(\d+)(m|h|d|wk|mo|y)$')
+_DAY = 86400
+_WEEK = 7 * _DAY
+# 1970-01-01 was a Thursday; shifts day numbers so weeks start on Monday
+_MONDAY_SHIFT = 3
+
+
+@lru_cache(maxsize=64)
+def parse_rule(rule: str) -> Tuple[int, str]:
+    """
+    Parses a resampling rule in the interval notation of the API (e.g. "4h", "1wk", "3mo").
+
+    Args:
+        rule (str): The rule: a positive count and one of m, h, d, wk, mo, y.
+
+    Returns:
+        Tuple[int, str]: Count and unit.
+
+    Raises:
+        TransformerException: If the rule is invalid.
+    """
+    match = _RULE.match(rule)
+    if match is None or int(match.group(1)) < 1:
+        raise TransformerException(f'Invalid resampling rule: {rule}')
+    return int(match.group(1)), match.group(2)
+
+
+def utc_offsets(timestamps: np.ndarray, timezone: Union[str, tzinfo] = 'UTC') -> np.ndarray:
+    """
+    Looks up the UTC offset of every timestamp. The timezone is only queried once per week
+    of the covered period and at its transitions (found by bisection), the lookup of the
+    timestamps is a single searchsorted.
+
+    Args:
+        timestamps (np.ndarray): Unix timestamps.
+        timezone (Union[str, tzinfo]): Timezone name or tzinfo.
+
+    Returns:
+        np.ndarray: Offsets in seconds (int64), same shape as timestamps.
+
+    Raises:
+        TransformerException: If the timezone is unknown.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    if timestamps.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    zone = _zone(timezone)
+    first, last = int(timestamps.min()), int(timestamps.max())
+
+    def offset(moment: int) -> int:
+        delta = datetime.fromtimestamp(moment, zone).utcoffset() or timedelta()
+        return int(delta.total_seconds())
+
+    changes, values = [first], [offset(first)]
+    previous = first
+    for sample in range(first + _WEEK, last + _WEEK, _WEEK):
+        current = offset(sample)
+        if current != values[-1]:
+            low, high = previous, sample
+            while high - low > 1:
+                middle = (low + high) // 2
+                if offset(middle) == values[-1]:
+                    low = middle
+                else:
+                    high = middle
+            changes.append(high)
+            values.append(current)
+        previous = sample
+    index = np.searchsorted(np.array(changes, dtype=np.int64), timestamps, side='right') - 1
+    return np.array(values, dtype=np.int64)[index]
+
+
+def bucket_starts(timestamps: np.ndarray, rule: str, timezone: Union[str, tzinfo] = 'UTC',
+                  offset: timedelta = timedelta(0)) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Assigns every timestamp to a bucket whose boundaries are aligned in local time
+    (midnight, Monday, first of the month, ...).
+
+    Args:
+        timestamps (np.ndarray): Unix timestamps in ascending order.
+        rule (str): See parse_rule.
+        timezone (Union[str, tzinfo]): Timezone of the bucket boundaries (e.g. the exchange
+            timezone).
+        offset (timedelta): Shift of the boundaries, e.g. -6 hours for sessions starting at
+            18:00 on the previous day.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Local bucket start (seconds, as if local time were
+        UTC) and the UTC offset per timestamp.
+    """
+    count, unit = parse_rule(rule)
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    offsets = utc_offsets(timestamps, timezone)
+    shift = int(offset.total_seconds())
+    local = timestamps + offsets - shift
+
+    length = UNITS[unit]
+    if length is not None:
+        step = count * length
+        starts = local // step * step
+    elif unit == 'wk':
+        weeks = (local // _DAY + _MONDAY_SHIFT) // 7
+        starts = ((weeks // count * count) * 7 - _MONDAY_SHIFT) * _DAY
+    else:
+        months = local.astype('datetime64[s]').astype('datetime64[M]').astype(np.int64)
+        if unit == 'y':
+            count *= 12
+        starts = (months // count * count).astype('datetime64[M]')
+        starts = starts.astype('datetime64[s]').astype(np.int64)
+    return starts + shift, offsets
+
+
+def resample(columns: Mapping[str, Sequence[Any]], rule: str,
+             timezone: Union[str, tzinfo] = 'UTC', offset: timedelta = timedelta(0),
+             aggregations: Optional[Mapping[str, str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Aggregates bars into coarser bars in one vectorized pass (e.g. 1d bars into 1wk or 1mo
+    bars), so coarser intervals do not need another request.
+
+    Missing values (NaN) are skipped: open and close are the first and last known prices,
+    high and low ignore gaps and missing volume counts as 0. Intraday buckets are split at
+    DST transitions, so a repeated local hour does not merge two hours.
+
+    Args:
+        columns (Mapping[str, Sequence[Any]]): Columnar bars ("columns" output, series.to_arrays
+            or adjustments.adjust), sorted by timestamp.
+        rule (str): Target interval (see parse_rule).
+        timezone (Union[str, tzinfo]): Timezone of the bucket boundaries, usually the exchange
+            timezone (TradingCalendar.timezone).
+        offset (timedelta): See bucket_starts.
+        aggregations (Optional[Mapping[str, str]]): Aggregation per column (first, max, min,
+            last or sum); defaults to AGGREGATIONS. Columns without aggregation are dropped.
+
+    Returns:
+        Dict[str, np.ndarray]: "timestamp" (UTC bucket start), "count" (bars per bucket)
+        and the aggregated columns.
+
+    Raises:
+        TransformerException: If the rule, timezone or an aggregation is invalid or the
+        timestamps are not sorted.
+    """
+    aggregations = AGGREGATIONS if aggregations is None else aggregations
+    timestamps = np.asarray(columns['timestamp'], dtype=np.int64)
+    if timestamps.size and np.any(timestamps[1:] < timestamps[:-1]):
+        raise TransformerException('Timestamps must be sorted')
+    starts, ends, labels = _group_buckets(timestamps, rule, timezone, offset)
+    result: Dict[str, np.ndarray] = {'timestamp': labels, 'count': ends - starts}
+
+    for name, how in aggregations.items():
+        if name not in columns or name == 'timestamp':
+            continue
+        values = np.asarray(columns[name], dtype=np.float64)
+        result[name] = _aggregate(values, how, starts, ends)
+    return result
+
+
+def _group_buckets(timestamps: np.ndarray, rule: str, timezone: Union[str, tzinfo],
+                   offset: timedelta) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Groups sorted timestamps into buckets and computes the bucket labels.
+
+    Args:
+        timestamps (np.ndarray): Unix timestamps in ascending order.
+        rule (str): See parse_rule.
+        timezone (Union[str, tzinfo]): See bucket_starts.
+        offset (timedelta): See bucket_starts.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: First index, end index (exclusive) and
+        UTC start of every bucket.
+    """
+    local_starts, offsets = bucket_starts(timestamps, rule, timezone, offset)
+
+    size = timestamps.size
+    changed = local_starts[1:] != local_starts[:-1]
+    if parse_rule(rule)[1] in ('m', 'h'):
+        changed |= offsets[1:] != offsets[:-1]
+    starts = np.flatnonzero(np.concatenate(([size > 0], changed)))
+    ends = np.append(starts[1:], size) if size else starts
+
+    # UTC start of each bucket: local start minus the offset valid at that moment
+    bucket_local = local_starts[starts]
+    labels = bucket_local - utc_offsets(bucket_local - offsets[starts], timezone)
+    return starts, ends, labels
+
+
+def _aggregate(values: np.ndarray, how: str, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+    Aggregates the groups [starts[i], ends[i]) of a column, skipping NaN.
+
+    Args:
+        values (np.ndarray): The column.
+        how (str): first, max, min, last or sum.
+        starts (np.ndarray): First index of every group.
+        ends (np.ndarray): End index (exclusive) of every group.
+
+    Returns:
+        np.ndarray: One value per group (NaN if a group has no value).
+
+    Raises:
+        TransformerException: If the aggregation is unknown.
+    """
+    if starts.size == 0:
+        return np.zeros(0)
+    if how == 'sum':
+        return np.add.reduceat(np.nan_to_num(values, nan=0.0), starts)
+    if how in ('max', 'min'):
+        reduce = np.fmax if how == 'max' else np.fmin
+        return reduce.reduceat(values, starts)
+    if how in ('first', 'last'):
+        positions = np.arange(values.size)
+        known = ~np.isnan(values)
+        if how == 'first':
+            index = np.minimum.reduceat(np.where(known, positions, values.size), starts)
+            found = index < ends
+        else:
+            index = np.maximum.reduceat(np.where(known, positions, -1), starts)
+            found = index >= starts
+        return np.where(found, values[np.clip(index, 0, values.size - 1)], np.nan)
+    raise TransformerException(f'Invalid aggregation: {how}')
+
+
+def _zone(timezone: Union[str, tzinfo]) -> tzinfo:
+    """
+    Resolves a timezone.
+
+    Args:
+        timezone (Union[str, tzinfo]): Timezone name or tzinfo.
+
+    Returns:
+        tzinfo: The timezone.
+
+    Raises:
+        TransformerException: If the timezone name is unknown.
+    """
+    if isinstance(timezone, tzinfo):
+        return timezone
+    if timezone == 'UTC':
+        return dt_timezone.utc
+    try:
+        return ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        raise TransformerException(f'Unknown timezone: {timezone}') from e
@@ -0,0 +1,236 @@
+"""
+Module: Series
+
+Copyright 2023 Dominic Kneup.
+Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+"""
+from typing import Any, Dict, Mapping, Optional, Sequence
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from client.exceptions.APIClientExceptions import TransformerException
+
+PRICE_FIELDS = ('open', 'low', 'high', 'close', 'adjclose', 'volume')
+
+
+def to_arrays(columns: Mapping[str, Sequence[Any]]) -> Dict[str, np.ndarray]:
+    """
+    Converts the columnar historic output into NumPy arrays.
+
+    Args:
+        columns (Mapping[str, Sequence[Any]]): Output of HistoricDataTransformer with
+            output "columns".
+
+    Returns:
+        Dict[str, np.ndarray]: int64 timestamps and float64 price / volume columns
+            (None becomes NaN).
+    """
+    arrays = {'timestamp': np.asarray(columns['timestamp'], dtype=np.int64)}
+    for field in PRICE_FIELDS:
+        if field in columns:
+            arrays[field] = np.asarray(columns[field], dtype=np.float64)
+    return arrays
+
+
+def stack(columns_list: Sequence[Mapping[str, Sequence[Any]]], field: str) -> Dict[str, np.ndarray]:
+    """
+    Aligns one field of several symbols on the union of their timestamps.
+
+    Args:
+        columns_list (Sequence[Mapping[str, Sequence[Any]]]): Columnar outputs, one per symbol.
+        field (str): The field to stack (e.g. "close").
+
+    Returns:
+        Dict[str, np.ndarray]: "timestamp" (n,) and "values" (symbols, n); missing bars are NaN.
+    """
+    timestamps = [np.asarray(columns['timestamp'], dtype=np.int64) for columns in columns_list]
+    union = np.unique(np.concatenate(timestamps)) if timestamps else np.empty(0, dtype=np.int64)
+    values = np.full((len(columns_list), union.size), np.nan)
+    for row, (columns, stamps) in enumerate(zip(columns_list, timestamps)):
+        values[row, np.searchsorted(union, stamps)] = np.asarray(columns[field], dtype=np.float64)
+    return {'timestamp': union, 'values': values}
+
+
+def returns(prices: np.ndarray) -> np.ndarray:
+    """
+    Simple returns along the last axis.
+
+    Args:
+        prices (np.ndarray): Prices, 1-D or (symbols, n).
+
+    Returns:
+        np.ndarray: Returns of the same shape; the first element is NaN.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    result = np.full(prices.shape, np.nan)
+    result[..., 1:] = prices[..., 1:] / prices[..., :-1] - 1.0
+    return result
+
+
+def log_returns(prices: np.ndarray) -> np.ndarray:
+    """
+    Logarithmic returns along the last axis.
+
+    Args:
+        prices (np.ndarray): Prices, 1-D or (symbols, n).
+
+    Returns:
+        np.ndarray: Log returns of the same shape; the first element is NaN.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    result = np.full(prices.shape, np.nan)
+    result[..., 1:] = np.diff(np.log(prices), axis=-1)
+    return result
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Rolling mean along the last axis.
+
+    Args:
+        values (np.ndarray): Input series, 1-D or (symbols, n).
+        window (int): Window length.
+
+    Returns:
+        np.ndarray: Rolling means; the first window - 1 elements are NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(values.shape, np.nan)
+    _check_window(window)
+    if values.shape[-1] >= window:
+        result[..., window - 1:] = sliding_window_view(values, window, axis=-1).mean(axis=-1)
+    return result
+
+
+def rolling_volatility(values: np.ndarray, window: int,
+                       periods_per_year: Optional[int] = None) -> np.ndarray:
+    """
+    Rolling sample standard deviation along the last axis.
+
+    Args:
+        values (np.ndarray): Input series, usually returns or log returns.
+        window (int): Window length.
+        periods_per_year (Optional[int]): Annualize with sqrt(periods_per_year)
+            (e.g. 252 for daily bars).
+
+    Returns:
+        np.ndarray: Rolling volatility; the first window - 1 elements are NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(values.shape, np.nan)
+    _check_window(window)
+    if 1 < window <= values.shape[-1]:
+        result[..., window - 1:] = sliding_window_view(values, window, axis=-1).std(axis=-1, ddof=1)
+    if periods_per_year:
+        result *= np.sqrt(periods_per_year)
+    return result
+
+
+def vwap(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """
+    Cumulative volume weighted average price using the typical price (high + low + close) / 3.
+
+    Bars with a missing (NaN) price or volume are skipped, so a gap does not turn all
+    later values into NaN; the VWAP of the previous bars is carried over.
+
+    Args:
+        high (np.ndarray): High prices.
+        low (np.ndarray): Low prices.
+        close (np.ndarray): Close prices.
+        volume (np.ndarray): Volumes.
+
+    Returns:
+        np.ndarray: VWAP along the last axis (NaN while no volume was traded).
+    """
+    typical = (np.asarray(high, dtype=np.float64)
+               + np.asarray(low, dtype=np.float64)
+               + np.asarray(close, dtype=np.float64)) / 3.0
+    volume = np.asarray(volume, dtype=np.float64)
+    known = ~(np.isnan(typical) | np.isnan(volume))
+    typical = np.where(known, typical, 0.0)
+    volume = np.where(known, volume, 0.0)
+    traded = np.cumsum(typical * volume, axis=-1)
+    cumulative_volume = np.cumsum(volume, axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(cumulative_volume > 0, traded / cumulative_volume, np.nan)
+
+
+def adjustment_factor(close: np.ndarray, adjclose: np.ndarray) -> np.ndarray:
+    """
+    Split / dividend back-adjustment factor derived from the adjclose / close ratio.
+
+    Args:
+        close (np.ndarray): Raw close prices.
+        adjclose (np.ndarray): Adjusted close prices.
+
+    Returns:
+        np.ndarray: Factor to multiply raw prices with.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(close != 0, np.asarray(adjclose, dtype=np.float64) / close, np.nan)
+
+
+def adjusted_ohlc(arrays: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Back-adjusts open, low, high and close with the adjclose / close ratio.
+
+    Volume is returned unchanged because the ratio does not separate splits from dividends.
+
+    Args:
+        arrays (Mapping[str, np.ndarray]): Output of to_arrays.
+
+    Returns:
+        Dict[str, np.ndarray]: Adjusted columns plus the unchanged timestamp and volume.
+    """
+    factor = adjustment_factor(arrays['close'], arrays['adjclose'])
+    adjusted = {field: arrays[field] * factor for field in ('open', 'low', 'high', 'close')}
+    adjusted['timestamp'] = arrays['timestamp']
+    if 'volume' in arrays:
+        adjusted['volume'] = arrays['volume']
+    return adjusted
+
+
+def compute_indicators(columns: Mapping[str, Sequence[Any]], window: int = 20,
+                       periods_per_year: Optional[int] = 252) -> Dict[str, np.ndarray]:
+    """
+    Computes the usual derived series for one symbol in a single call.
+
+    Args:
+        columns (Mapping[str, Sequence[Any]]): Columnar historic output.
+        window (int): Window length for rolling statistics.
+        periods_per_year (Optional[int]): Annualization for the volatility (None to disable).
+
+    Returns:
+        Dict[str, np.ndarray]: returns, log_returns, rolling_mean, volatility and vwap
+        (computed on the adjusted close) plus the adjusted OHLC columns.
+    """
+    arrays = to_arrays(columns)
+    adjusted = adjusted_ohlc(arrays)
+    log_ret = log_returns(arrays['adjclose'])
+    indicators = {
+        'timestamp': arrays['timestamp'],
+        'returns': returns(arrays['adjclose']),
+        'log_returns': log_ret,
+        'rolling_mean': rolling_mean(arrays['adjclose'], window),
+        'volatility': rolling_volatility(log_ret, window, periods_per_year),
+    }
+    if 'volume' in arrays:
+        indicators['vwap'] = vwap(adjusted['high'], adjusted['low'], adjusted['close'],
+                                  arrays['volume'])
+    for field in ('open', 'low', 'high', 'close'):
+        indicators['adjusted_' + field] = adjusted[field]
+    return indicators
+
+
+def _check_window(window: int) -> None:
+    """
+    Validates a rolling window length.
+
+    Args:
+        window (int): Window length.
+
+    Raises:
+        TransformerException: If the window is smaller than 1.
+    """
+    if window < 1:
+        raise TransformerException("Window must be a positive integer")
@@ -0,0 +1,169 @@
+"""
+Module: Batch
+
+Copyright 2023 Dominic Kneup.
+Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+"""
+import json
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import repeat
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence, Type
+from client.api.validators.validator import Validator
+from client.exceptions.APIClientExceptions import BaseAPIClientException, ValidatorException
+from client.json_loader import loads
+
+# Batches below this size are always processed in the calling process
+MIN_PARALLEL_ITEMS = 256
+
+# Chunks per worker; more chunks balance uneven payloads, fewer chunks pickle less often
+CHUNKS_PER_WORKER = 4
+
+
+class BatchItem(NamedTuple):
+    """
+    Outcome of one payload of a batch.
+
+    Attributes:
+        value (Any): The result (None if the payload failed).
+        error (Optional[BaseAPIClientException]): The error of the payload (None if it succeeded).
+    """
+    value: Any
+    error: Optional[BaseAPIClientException]
+
+    @property
+    def ok(self) -> bool:
+        """
+        The payload succeeded.
+        """
+        return self.error is None
+
+
+def decode(payload: Any, exception: Type[BaseAPIClientException]) -> Any:
+    """
+    Decodes a raw JSON payload; decoded payloads are returned unchanged.
+
+    Args:
+        payload (Any): Raw JSON (str or bytes) or the decoded response.
+        exception (Type[BaseAPIClientException]): Raised if the payload is not valid JSON.
+
+    Returns:
+        Any: The decoded response.
+    """
+    if not isinstance(payload, (str, bytes, bytearray, memoryview)):
+        return payload
+    try:
+        return loads(payload)
+    except json.JSONDecodeError as e:
+        raise exception(f'Invalid JSON: {e}') from e
+
+
+def decode_response(payload: Any, exception: Type[BaseAPIClientException]) -> Any:
+    """
+    Decodes a payload and checks it for API errors, like the single response path does
+    before validating or transforming a response.
+
+    Args:
+        payload (Any): Raw JSON (str or bytes) or the decoded response.
+        exception (Type[BaseAPIClientException]): Raised if the payload is not valid JSON.
+
+    Returns:
+        Any: The decoded response.
+
+    Raises:
+        InvalidSymbol: If the API reports an unknown symbol or returns no result.
+        ValidatorException: If the API reports another error.
+    """
+    data = decode(payload, exception)
+    Validator.check_response_error(data)
+    return data
+
+
+def validate(validator: Any, payload: Any) -> Any:
+    """
+    Decodes and validates one payload with the plan of a validator class.
+
+    Args:
+        validator (Any): Validator class with a `plan` (the class is passed instead of the
+            plan because plans hold lambdas, which cannot be sent to worker processes).
+        payload (Any): Raw JSON (str or bytes) or the decoded response.
+
+    Returns:
+        Any: The decoded response.
+
+    Raises:
+        InvalidSymbol: If the API reports an unknown symbol or returns no result.
+        ValidatorException: If the payload is not valid JSON, reports an error or fails the plan.
+    """
+    data = decode_response(payload, ValidatorException)
+    validator.plan().validate(data)
+    return data
+
+
+def validate_batch(validator: Any, payloads: Sequence[Any],
+                   workers: Optional[int] = None) -> List[BatchItem]:
+    """
+    Validates many responses in one pass with the compiled plan of a validator class
+    (the validate_batch of the validators).
+
+    Args:
+        validator (Any): Validator class with a `plan` (see validate).
+        payloads (Sequence[Any]): Raw JSON (str or bytes) or decoded responses.
+        workers (Optional[int]): Worker processes for large batches (see run_batch).
+
+    Returns:
+        List[BatchItem]: Per payload the decoded response, InvalidSymbol if the API reports
+        an unknown symbol or a ValidatorException with all errors.
+    """
+    return run_batch(partial(validate, validator), payloads, workers)
+
+
+def run_batch(function: Callable[[Any], Any], payloads: Sequence[Any],
+              workers: Optional[int] = None) -> List[BatchItem]:
+    """
+    Applies a function to every payload and collects the results and errors per payload,
+    so one invalid response does not fail the batch.
+
+    With more than one worker, batches of at least MIN_PARALLEL_ITEMS payloads are split
+    into chunks that are processed in a process pool. The function and the payloads are
+    sent to the workers, so the function must be picklable (a module-level function, a
+    method of a class or a functools.partial of those). Pass raw JSON bytes rather than
+    decoded payloads to let the workers decode them as well.
+
+    Args:
+        function (Callable[[Any], Any]): Processes one payload; API client exceptions are
+            recorded as the error of the payload, other exceptions propagate.
+        payloads (Sequence[Any]): The payloads.
+        workers (Optional[int]): Number of worker processes (None or 1: no process pool).
+
+    Returns:
+        List[BatchItem]: One item per payload, in payload order.
+    """
+    if workers is None or workers <= 1 or len(payloads) < MIN_PARALLEL_ITEMS:
+        return _run_chunk(function, payloads)
+
+    size = -(-len(payloads) // (workers * CHUNKS_PER_WORKER))
+    chunks = [payloads[start:start + size] for start in range(0, len(payloads), size)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return [item for chunk in executor.map(_run_chunk, repeat(function), chunks)
+                for item in chunk]
+
+
+def _run_chunk(function: Callable[[Any], Any], payloads: Sequence[Any]) -> List[BatchItem]:
+    """
+    Processes a chunk of payloads in the current process.
+
+    Args:
+        function (Callable[[Any], Any]): Processes one payload.
+        payloads (Sequence[Any]): The payloads.
+
+    Returns:
+        List[BatchItem]: One item per payload.
+    """
+    items = []
+    for payload in payloads:
+        try:
+            items.append(BatchItem(function(payload), None))
+        except BaseAPIClientException as e:
+            items.append(BatchItem(None, e))
+    return items
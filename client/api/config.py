@@ -4,64 +4,118 @@ Module: Settings
 Copyright 2023 Dominic Kneup.
 Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
 """
-from pydantic import Field
-from pydantic_settings import BaseSettings
+import os
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, Mapping, Optional, get_type_hints
+from client.exceptions.APIClientExceptions import ValidatorException
 
 
-class Settings(BaseSettings):
+@dataclass
+class Settings:  # pylint: disable=too-many-instance-attributes
     """ Endpoint Settings
 
-    Args:
-        BaseSettings (_type_): _description_
+    Every field can be overridden by an environment variable of the same name in upper
+    case (e.g. QUOTE_API_ENDPOINT), see from_env.
     """
     # Similar Securities settings
-    similar_securities_api_endpoint: str = Field(
-        "https://query2.finance.yahoo.com/v6/finance/recommendationsbysymbol/",
-        env="SIMILAR_SECURITIES_API_ENDPOINT")
-    similar_securities_output: str = Field(
-        "list",
-        env="SIMILAR_SECURITIES_OUTPUT"
-    )
+    similar_securities_api_endpoint: str = (
+        "https://query2.finance.yahoo.com/v6/finance/recommendationsbysymbol/")
+    similar_securities_output: str = "list"
 
     # Quote settings
-    quote_api_endpoint: str = Field(
-        "https://query2.finance.yahoo.com/v7/finance/quote",
-        env="QUOTE_API_ENDPOINT")
-    quote_cors_domain: str = Field(
-        "finance.yahoo.com",
-        env="QUOTE_CORS_DOMAIN")
-    quote_region: str = Field(
-        "US",
-        env="QUOTE_REGION")
-    quote_language: str = Field(
-        "en-US",
-        env="QUOTE_LANGUAGE")
-    quote_formatted: str = Field(
-        "true",
-        env="QUOTE_FORMATTED")
-    quote_output: str = Field(
-        "dict",
-        env="QUOTE_OUTPUT")
+    quote_api_endpoint: str = "https://query2.finance.yahoo.com/v7/finance/quote"
+    quote_cors_domain: str = "finance.yahoo.com"
+    quote_region: str = "US"
+    quote_language: str = "en-US"
+    quote_formatted: str = "true"
+    quote_output: str = "dict"
 
     # Crumb settings
-    crumb_cookie_endpoint: str = Field(
-        "https://fc.yahoo.com",
-        env="CRUMB_COOKIE_ENDPOINT")
-    crumb_api_endpoint: str = Field(
-        "https://query1.finance.yahoo.com/v1/test/getcrumb",
-        env="CRUMB_API_ENDPOINT")
+    crumb_cookie_endpoint: str = "https://fc.yahoo.com"
+    crumb_api_endpoint: str = "https://query1.finance.yahoo.com/v1/test/getcrumb"
 
     # Historic Data settings
-    historic_data_api_endpoint: str = Field(
-        "https://query1.finance.yahoo.com/v8/finance/chart/",
-        env="HISTORIC_DATA_API_ENDPOINT"
-    )
-    historic_data_interval: str = Field(
-        "1d",
-        env="HISTORIC_DATA_INTERVAL")
-    historic_data_output: str = Field(
-        "dict",
-        env="HISTORIC_DATA_OUTPUT")
-
-
-settings = Settings()
+    historic_data_api_endpoint: str = "https://query1.finance.yahoo.com/v8/finance/chart/"
+    historic_data_interval: str = "1d"
+    historic_data_output: str = "dict"
+    historic_data_null_policy: str = "drop"
+
+    # Client settings
+    request_timeout: float = 10.0
+    circuit_failure_threshold: int = 5
+    circuit_recovery_timeout: float = 30.0
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None, **overrides: Any) -> 'Settings':
+        """
+        Creates settings from environment variables (upper case field names; lower case
+        names are accepted as well) and explicit overrides.
+
+        Args:
+            environ (Optional[Mapping[str, str]]): The environment (defaults to os.environ).
+            **overrides (Any): Field values taking precedence over the environment.
+
+        Returns:
+            Settings: The settings.
+
+        Raises:
+            ValidatorException: If a value cannot be converted to the field type.
+        """
+        environ = os.environ if environ is None else environ
+        values: Dict[str, Any] = {}
+        for setting in fields(cls):
+            raw = environ.get(setting.name.upper(), environ.get(setting.name))
+            if raw is None:
+                continue
+            try:
+                values[setting.name] = _FIELD_TYPES[setting.name](raw)
+            except ValueError as e:
+                raise ValidatorException(
+                    f'Invalid value for {setting.name.upper()}: {raw!r}') from e
+        values.update(overrides)
+        return cls(**values)
+
+    def validated(self) -> 'Settings':
+        """
+        Validates the settings with pydantic (optional dependency): types are checked
+        strictly and endpoints must be http(s) URLs.
+
+        Returns:
+            Settings: The settings (unchanged).
+
+        Raises:
+            ValidatorException: If a value is invalid.
+            ImportError: If pydantic is not installed.
+        """
+        # Imported on demand, pydantic is an optional extra and slow to import
+        # pylint: disable-next=import-outside-toplevel
+        from pydantic import AnyHttpUrl, TypeAdapter, ValidationError
+
+        url_adapter = TypeAdapter(AnyHttpUrl)
+        try:
+            for setting in fields(self):
+                value = getattr(self, setting.name)
+                TypeAdapter(_FIELD_TYPES[setting.name]).validate_python(value, strict=True)
+                if setting.name.endswith('_endpoint'):
+                    url_adapter.validate_python(value)
+        except ValidationError as e:
+            raise ValidatorException(f'Invalid settings: {e}') from e
+        return self
+
+    def replace(self, **changes: Any) -> 'Settings':
+        """
+        Returns a copy with some fields changed.
+
+        Args:
+            **changes (Any): The new field values.
+
+        Returns:
+            Settings: The new settings.
+        """
+        return replace(self, **changes)
+
+
+# Field types used to convert environment variables
+_FIELD_TYPES: Dict[str, Any] = get_type_hints(Settings)
+
+settings = Settings.from_env()
@@ -5,12 +5,12 @@ Copyright 2023 Dominic Kneup.
 Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
 """
 import logging
+from typing import Optional
 from client.api_client import ApiClient
 from client.api.validators.crumb_validator import CrumbValidator
-from client.api.config import settings
+from client.api.config import Settings
+from client.circuit_breaker import CircuitBreakerRegistry
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -21,12 +21,16 @@ class Crumb(ApiClient):
         cookie_endpoint (str): The cookie endpoint for the crumb.
         crumb_endpoint (str): The crumb API Endpoint URL.
     """
+    endpoint_name = 'crumb'
+
     def __init__(self,
-                 cookie_endpoint: str = settings.crumb_cookie_endpoint,
-                 crumb_endpoint: str = settings.crumb_api_endpoint):
-        super().__init__()
-        self.cookie_endpoint = cookie_endpoint
-        self.crumb_endpoint = crumb_endpoint
+                 cookie_endpoint: Optional[str] = None,
+                 crumb_endpoint: Optional[str] = None,
+                 settings: Optional[Settings] = None,
+                 circuit_breakers: Optional[CircuitBreakerRegistry] = None):
+        super().__init__(settings, circuit_breakers)
+        self.cookie_endpoint = cookie_endpoint or self.settings.crumb_cookie_endpoint
+        self.crumb_endpoint = crumb_endpoint or self.settings.crumb_api_endpoint
 
     def get_crumb(self) -> str:
         """
@@ -34,9 +38,10 @@ class Crumb(ApiClient):
         @return: A new crumb for further use
         """
         # Get cookies into YahooFinanceAPI Instance for Crumb Request
-        self.request_api(self.cookie_endpoint)
+        # (the cookie endpoint answers with an error status but still sets the cookies)
+        self.request_api(self.cookie_endpoint, check_status=False, endpoint='crumb')
 
         # Get crumb
-        crumb = self.request_api(self.crumb_endpoint)
+        crumb = self.request_api(self.crumb_endpoint, endpoint='crumb')
 
         return CrumbValidator.validate_crumb(crumb)
@@ -5,17 +5,20 @@ Copyright 2023 Dominic Kneup.
 Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
 """
 import logging
+from threading import Lock
 from datetime import datetime, timedelta
-from typing import Union, Optional, List, Any, Dict
+from typing import Union, Optional, List, Any, Dict, Sequence
 from client.api_client import ApiClient
 from client.api.crumb import Crumb
 from client.api.validators.validator import Validator
-from client.api.transformers.historic_data_transformer import HistoricDataTransformer
-from client.exceptions.APIClientExceptions import ValidatorException
-from client.api.config import settings
+from client.api.transformers.historic_data_transformer import HistoricDataTransformer, ChartMeta
+from client.exceptions.APIClientExceptions import ValidatorException, CrumbExpired, InvalidSymbol
+from client.api.config import Settings
+from client.circuit_breaker import CircuitBreakerRegistry
+from client.identity_pool import IDENTITY_CRUMB
+from client.metadata_cache import MetadataCache
+from client.trading_calendar import TradingCalendar
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -26,124 +29,283 @@ class HistoricData(ApiClient):
         endpoint (str): API Endpoint URL
         interval (str): Define interval
         output (str): Setup Default Output Format
+        null_policy (str): Handling of bars with missing prices ("drop", "ffill" or "nan")
         yf_crumb (str): Define existing Crumb
+        metadata_cache (Optional[MetadataCache]): Chart metadata per symbol, updated by every
+        chart response (share one cache with a path to persist it, None disables it)
+
+    One instance can be shared by many threads: requests only read the attributes and
+    the crumb is refreshed under a lock (once for all threads that saw it expire).
     """
+    endpoint_name = 'chart'
+
+    # Bar length of the intraday intervals in seconds
+    intraday_seconds: Dict[str, int] = {
+        '1m': 60, '2m': 120, '5m': 300, '15m': 900, '30m': 1800,
+        '60m': 3600, '90m': 5400, '1h': 3600,
+    }
+
     def __init__(
             self,
-            endpoint: str = settings.historic_data_api_endpoint,
-            interval: str = settings.historic_data_interval,
-            output: str = settings.historic_data_output):
-        super().__init__()
-        self.endpoint = endpoint
-        self.interval = interval
-        self.output = output
+            endpoint: Optional[str] = None,
+            interval: Optional[str] = None,
+            output: Optional[str] = None,
+            *,
+            null_policy: Optional[str] = None,
+            settings: Optional[Settings] = None,
+            circuit_breakers: Optional[CircuitBreakerRegistry] = None):
+        super().__init__(settings, circuit_breakers)
+        self.endpoint = endpoint or self.settings.historic_data_api_endpoint
+        self.interval = interval or self.settings.historic_data_interval
+        self.output = output or self.settings.historic_data_output
+        self.null_policy = null_policy or self.settings.historic_data_null_policy
         self.yf_crumb: Optional[str] = None
+        self._crumb_lock = Lock()
+        self.metadata_cache: Optional[MetadataCache] = MetadataCache()
 
     def get_historic_data(
             self,
             symbol: str,
             start_date: datetime,
-            end_date: datetime) -> Union[str, List[Dict[Any, Any]]]:
+            end_date: datetime,
+            events: Optional[Sequence[str]] = None
+    ) -> Union[str, List[Dict[Any, Any]], Dict[str, Any]]:
         """
-        Get Historic Data for a specified period
+        Get Historic Data for a specified period. The request is aligned to whole trading
+        days of the symbol's exchange and intraday bars outside the period are dropped again
+        (except for raw output); a period without sessions of a known exchange calendar
+        sends no request (see trading_calendar).
         @param symbol: The Security / Stock symbol
-        @param start_date: Specify the start date
-        @param end_date: Specify the end date
+        @param start_date: Specify the start date (naive datetimes are exchange time)
+        @param end_date: Specify the end date, exclusive (naive datetimes are exchange time)
+        @param events: Corporate action events to include ("div", "splits", "capitalGains")
         @return: A list / dict of similar securities or raw JSON API response
         """
-        logger.info("Fetching historic data for symbol: %s from %s to %s",
-                    symbol, start_date, end_date)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Fetching historic data for symbol: %s from %s to %s",
+                         symbol, start_date, end_date)
+
+        calendar = self.trading_calendar(symbol)
+        if isinstance(start_date, datetime) and isinstance(end_date, datetime):
+            # Naive and aware datetimes can be mixed, both are compared in exchange time
+            start_date, end_date = calendar.localize(start_date), calendar.localize(end_date)
 
         if Validator.check_interval(self.interval) and \
                 Validator.validate_dates(start_date, end_date):
-            url = self.endpoint + symbol
+            self._skip_known_invalid(symbol)
+            if self.symbol_registry is not None:
+                start_date = self.symbol_registry.clamp_start_date(symbol, start_date)
 
-            if not self.yf_crumb:
-                logger.info("Crumb is empty, fetching new crumb")
-                get_crumb = Crumb()
-                self.yf_crumb = get_crumb.get_crumb()
+            period = calendar.resolve_range(start_date, end_date)
+            if period is None:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("No trading sessions for symbol %s from %s to %s",
+                                 symbol, start_date, end_date)
+                return HistoricDataTransformer.empty_output(self.output)
 
             params = {
-                'period1': int(start_date.timestamp()),
-                'period2': int(end_date.timestamp()),
-                'interval': self.interval,
-                'crumb': self.yf_crumb
+                'period1': int(period[0].timestamp()),
+                'period2': int(period[1].timestamp()),
+                'interval': self.interval
             }
+            data = self._request_chart(symbol, params, events)
+            bar_seconds = self.intraday_seconds.get(self.interval)
+            if bar_seconds is None:
+                # Daily and longer bars start at midnight or the open of a day in the period
+                return data
+            # Intraday bars overlapping the requested period start after start - bar_seconds
+            return HistoricDataTransformer.trim(data, self.output,
+                                                int(start_date.timestamp()) - bar_seconds + 1,
+                                                int(end_date.timestamp()))
 
-            try:
-                response = self.request_api(url, params)
-                Validator.check_response_error(response)
-                return HistoricDataTransformer.output(response, self.output)
+        raise ValidatorException("Cannot validate input")
+
+    def get_historic_data_for_range(
+            self,
+            symbol: str,
+            data_range: str,
+            events: Optional[Sequence[str]] = None
+    ) -> Union[str, List[Dict[Any, Any]], Dict[str, Any]]:
+        """
+        Get Historic Data for a range ending today (e.g. "5d", "1y", "ytd", "max")
+        @param symbol: The Security / Stock symbol
+        @param data_range: The range (see Validator.valid_ranges)
+        @param events: Corporate action events to include ("div", "splits", "capitalGains")
+        @return: A list / dict of historic data or raw JSON API response
+        """
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Fetching historic data for symbol: %s for range %s", symbol, data_range)
 
-            except Exception as e:
-                logger.error("Error fetching historic data for symbol %s: %s", symbol, e)
-                raise
+        if Validator.check_interval(self.interval) and Validator.check_range(data_range):
+            self._skip_known_invalid(symbol)
+            params = {
+                'range': data_range,
+                'interval': self.interval
+            }
+            return self._request_chart(symbol, params, events)
 
         raise ValidatorException("Cannot validate input")
 
-    def get_historic_data_ytd(self, symbol: str) -> Union[str, List[Dict[Any, Any]]]:
+    def _request_chart(
+            self,
+            symbol: str,
+            params: Dict[str, Any],
+            events: Optional[Sequence[str]] = None
+    ) -> Union[str, List[Dict[Any, Any]], Dict[str, Any]]:
+        """
+        Request the chart endpoint and transform the response
+        @param symbol: The Security / Stock symbol
+        @param params: Period or range parameters
+        @param events: Corporate action events to include
+        @return: A list / dict of historic data or raw JSON API response
+        """
+        if events is not None and Validator.check_events(events):
+            params['events'] = ','.join(events)
+
+        url = self.endpoint + symbol
+
+        try:
+            crumb = params['crumb'] = self._get_crumb()
+            try:
+                response = self.request_api_bytes(url, params)
+            except CrumbExpired:
+                logger.info("Crumb expired, fetching new crumb")
+                params['crumb'] = self._get_crumb(stale=crumb)
+                response = self.request_api_bytes(url, params)
+            Validator.check_response_error(response)
+            if self.metadata_cache is None:
+                return HistoricDataTransformer.output(response, self.output, self.null_policy)
+
+            data, meta = HistoricDataTransformer.output_with_meta(response, self.output,
+                                                                  self.null_policy)
+            if meta is not None:
+                self.metadata_cache.update(meta)
+            return data
+
+        except InvalidSymbol as e:
+            logger.error("Invalid symbol %s: %s", symbol, e)
+            self._mark_invalid(symbol)
+            raise
+        except Exception as e:
+            logger.error("Error fetching historic data for symbol %s: %s", symbol, e)
+            raise
+
+    def get_metadata(self, symbol: str) -> Optional[ChartMeta]:
+        """
+        Get the metadata of the latest chart response for a symbol (no request is sent)
+        @param symbol: The Security / Stock symbol
+        @return: The chart metadata or None if no chart of the symbol was fetched yet
+        """
+        if self.metadata_cache is None:
+            return None
+        return self.metadata_cache.get(symbol)
+
+    def trading_calendar(self, symbol: str) -> TradingCalendar:
+        """
+        Get the trading calendar of the symbol's exchange and instrument type, taken from
+        the latest chart response or the symbol registry (see TradingCalendar.for_timezone;
+        unknown symbols and instruments that are not exchange-traded never skip a day)
+        @param symbol: The Security / Stock symbol
+        @return: The trading calendar
+        """
+        meta = self.get_metadata(symbol)
+        if meta is not None:
+            return TradingCalendar.for_timezone(meta.exchange_timezone_name, meta.instrument_type)
+        info = self.symbol_registry.get(symbol) if self.symbol_registry is not None else None
+        if info is not None:
+            return TradingCalendar.for_timezone(info.exchange_timezone_name, info.quote_type)
+        return TradingCalendar.for_timezone(None)
+
+    def _get_crumb(self, stale: Optional[str] = None) -> str:
         """
-        Get Historic data for this year (Jan 1st - today)
+        Get the crumb, fetching a new one if none exists or it is still the rejected one
+        (threads that saw the same crumb expire fetch only one new crumb)
+        @param stale: The crumb the API rejected (e.g. after CrumbExpired)
+        @return: The crumb (IDENTITY_CRUMB with an identity pool)
+        """
+        if self.identity_pool is not None:
+            return IDENTITY_CRUMB
+        with self._crumb_lock:
+            if not self.yf_crumb or self.yf_crumb == stale:
+                logger.info("Fetching new crumb")
+                get_crumb = Crumb(settings=self.settings, circuit_breakers=self.circuit_breakers)
+                get_crumb.session = self.session
+                self.yf_crumb = get_crumb.get_crumb()
+            return self.yf_crumb
+
+    def get_historic_data_ytd(
+            self, symbol: str) -> Union[str, List[Dict[Any, Any]], Dict[str, Any]]:
+        """
+        Get Historic data for this year (Jan 1st - today, exchange time)
         @param symbol: The Security / Stock symbol
         @return: A list / dict of similar securities or raw JSON API response
         """
+        today = self._today(symbol)
         return self._get_historic_data_for_period(
             symbol,
-            datetime(datetime.now().year, 1, 1),
-            datetime.today()
+            datetime(today.year, 1, 1),
+            today + timedelta(days=1)
         )
 
-    def get_historic_data_last_year(self, symbol: str) -> Union[str, List[dict]]:
+    def get_historic_data_last_year(self, symbol: str) -> Union[str, List[dict], Dict[str, Any]]:
         """
         Get Historic data for last year
         @param symbol: The Security / Stock symbol
         @return: A list / dict of similar securities or raw JSON API response
         """
+        year = self._today(symbol).year - 1
         return self._get_historic_data_for_period(
             symbol,
-            datetime(datetime.now().year - 1, 1, 1),
-            datetime(datetime.now().year - 1, 12, 31))
+            datetime(year, 1, 1),
+            datetime(year + 1, 1, 1))
 
-    def get_historic_data_last_30_days(self, symbol: str) -> Union[str, List[dict]]:
+    def get_historic_data_last_30_days(self, symbol: str) -> Union[str, List[dict], Dict[str, Any]]:
         """
-        Get Historic data for last 30 days
+        Get Historic data for last 30 days (including today)
         @param symbol: The Security / Stock symbol
         @return: A list / dict of similar securities or raw JSON API response
         """
-        today = datetime.today()
-        return self._get_historic_data_for_period(symbol, today - timedelta(days=30), today)
+        tomorrow = self._today(symbol) + timedelta(days=1)
+        return self._get_historic_data_for_period(symbol, tomorrow - timedelta(days=30), tomorrow)
 
-    def get_historic_data_last_month(self, symbol: str) -> Union[str, List[dict]]:
+    def get_historic_data_last_month(self, symbol: str) -> Union[str, List[dict], Dict[str, Any]]:
         """
         Get Historic data for the last month (previous calendar month)
         @param symbol: The Security / Stock symbol
         @return: A list / dict of similar securities or raw JSON API response
         """
-        today = datetime.today()
-        last_day_of_last_month = today.replace(day=1) - timedelta(days=1)
-        first_day_of_last_month = last_day_of_last_month.replace(day=1)
+        first_day_of_this_month = self._today(symbol).replace(day=1)
+        first_day_of_last_month = (first_day_of_this_month - timedelta(days=1)).replace(day=1)
         return self._get_historic_data_for_period(
             symbol,
             first_day_of_last_month,
-            last_day_of_last_month
+            first_day_of_this_month
         )
 
-    def get_historic_data_last_week(self, symbol: str) -> Union[str, List[dict]]:
+    def get_historic_data_last_week(self, symbol: str) -> Union[str, List[dict], Dict[str, Any]]:
         """
         Get Historic data for last week (Monday to Sunday last week)
         @param symbol: The Security / Stock symbol
         @return: A list / dict of similar securities or raw JSON API response
         """
-        today = datetime.today()
+        today = self._today(symbol)
         monday = today - timedelta(days=today.weekday() + 7)
-        sunday = monday + timedelta(days=6)
-        return self._get_historic_data_for_period(symbol, monday, sunday)
+        return self._get_historic_data_for_period(symbol, monday, monday + timedelta(days=7))
+
+    def _today(self, symbol: str) -> datetime:
+        """
+        Midnight of the current day at the symbol's exchange
+        @param symbol: The Security / Stock symbol
+        @return: Naive datetime (exchange time)
+        """
+        now = self.trading_calendar(symbol).now()
+        return datetime(now.year, now.month, now.day)
 
     def _get_historic_data_for_period(
             self,
             symbol: str,
             start_date: datetime,
-            end_date: datetime) -> Union[str, List[Dict[Any, Any]]]:
+            end_date: datetime) -> Union[str, List[Dict[Any, Any]], Dict[str, Any]]:
         """
         Helper method to get historic data for a specified period
         @param symbol: The Security / Stock symbol
@@ -5,18 +5,30 @@ Copyright 2023 Dominic Kneup.
 Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
 """
 import logging
-from typing import Union, List, Dict
+from functools import lru_cache
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Union, List, Dict, FrozenSet, Optional, Sequence, Tuple
 from client.api.crumb import Crumb
 from client.api.transformers.quote_transformer import QuoteTransformer
-from client.api.config import settings
-from client.exceptions.APIClientExceptions import ApiException
+from client.api.validators.quote_validator import QuoteValidator
+from client.api.validators.validation_plan import ValidationPlan
+from client.api.validators.validator import Validator
+from client.identity_pool import IDENTITY_CRUMB
+from client.json_loader import loads
+from client.symbol_registry import normalize_symbols
+from client.api.config import Settings
+from client.circuit_breaker import CircuitBreakerRegistry
+from client.exceptions.APIClientExceptions import (
+    ApiException, ValidatorException, TransformerException, CrumbExpired, InvalidSymbol
+)
+
+if TYPE_CHECKING:
+    import numpy as np
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-class Quote(Crumb):
+class Quote(Crumb):  # pylint: disable=too-many-instance-attributes
     """
     Class Quote
     Attributes:
@@ -27,8 +39,15 @@ class Quote(Crumb):
         language (str): Language
         formatted (str): API Output Format
         output (str): Default client Output Format
-        crumb (str): Existing Crumb
+        fields (Optional[Sequence[str]]): Default field projection (None returns all fields)
+        crumb (Optional[str]): Crumb of the client session (fetched on the first request;
+        unused with an identity pool, whose identities fetch their own crumbs)
+
+    One instance can be shared by many threads: requests only read the attributes and
+    the crumb is refreshed under a lock (once for all threads that saw it expire).
     """
+    endpoint_name = 'quote'
+
     allowedFields: List[str] = [
         "longName",
         "shortName",
@@ -52,57 +71,206 @@ class Quote(Crumb):
         "corporateActions"
     ]
 
+    # Fields a projection may contain (requested fields plus the fields every quote carries)
+    allowed_field_set: FrozenSet[str] = frozenset(
+        allowedFields
+        + QuoteValidator.required_properties
+        + QuoteValidator.multi_dimensional_properties
+    )
+
     def __init__(self,
-                 endpoint: str = settings.quote_api_endpoint,
-                 cors_domain: str = settings.quote_cors_domain,
-                 region: str = settings.quote_region,
-                 language: str = settings.quote_language,
-                 formatted: str = settings.quote_formatted,
-                 output: str = settings.quote_output,):
-        super().__init__()
-        self.endpoint = endpoint
-        self.cors_domain = cors_domain
-        self.region = region
-        self.language = language
-        self.formatted = formatted
-        self.output = output
-        self.crumb = self.get_crumb()
-
-    def get_quote(self, symbol: str) -> Union[str, Dict, List]:
+                 endpoint: Optional[str] = None,
+                 cors_domain: Optional[str] = None,
+                 region: Optional[str] = None,
+                 language: Optional[str] = None,
+                 formatted: Optional[str] = None,
+                 output: Optional[str] = None,
+                 *,
+                 fields: Optional[Sequence[str]] = None,
+                 tolerant: bool = False,
+                 settings: Optional[Settings] = None,
+                 circuit_breakers: Optional[CircuitBreakerRegistry] = None):
+        super().__init__(settings=settings, circuit_breakers=circuit_breakers)
+        self.endpoint = endpoint or self.settings.quote_api_endpoint
+        self.cors_domain = cors_domain or self.settings.quote_cors_domain
+        self.region = region or self.settings.quote_region
+        self.language = language or self.settings.quote_language
+        self.formatted = formatted or self.settings.quote_formatted
+        self.output = output or self.settings.quote_output
+        self.fields = fields
+        self.tolerant = tolerant
+        if fields is not None:
+            self.field_projection(fields)
+        self._crumb_lock = Lock()
+        self.crumb: Optional[str] = None
+
+    @classmethod
+    def field_projection(cls, fields: Sequence[str]) -> Tuple[Tuple[str, ...], str]:
+        """
+        Validate a field projection against the allowed fields
+        @param fields: The requested fields
+        @return: The deduplicated fields and the comma-separated string for the API request
+        """
+        return cls._compile_projection(tuple(fields))
+
+    @classmethod
+    @lru_cache(maxsize=128)
+    def _compile_projection(cls, fields: Tuple[str, ...]) -> Tuple[Tuple[str, ...], str]:
+        """
+        Validate and join a field projection (cached per field tuple)
+        @param fields: The requested fields
+        @return: The deduplicated fields and the comma-separated string for the API request
+        """
+        unknown = [field for field in fields if field not in cls.allowed_field_set]
+        if unknown:
+            raise ValidatorException('Invalid fields: ' + ', '.join(unknown))
+        projection = tuple(dict.fromkeys(fields))
+        return projection, ",".join(projection)
+
+    def get_quote(self, symbol: str,
+                  fields: Optional[Sequence[str]] = None) -> Union[str, Dict, List, 'np.ndarray']:
         """
         Get Quote by Symbol (Security)
         @param symbol: The Security / Stock symbol
+        @param fields: Field projection for this call (defaults to the instance projection)
         @return: Returns raw JSON output / formatted List or Dict
         """
-        logger.info("Fetching quote for symbol: %s", symbol)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Fetching quote for symbol: %s", symbol)
+        self._skip_known_invalid(symbol)
 
-        if not self.crumb:
-            logger.info("Crumb is empty, fetching new crumb")
-            self.crumb = self.get_crumb()
+        fields = fields if fields is not None else self.fields
+        projection: Optional[Tuple[str, ...]] = None
+        if fields is None:
+            requested_fields = self.field_projection(self.allowedFields)[1]
+        else:
+            projection, requested_fields = self.field_projection(fields)
 
-        params = {
-            'formatted': self.formatted,
-            'crumb': self.crumb,
-            'lang': self.language,
-            'region': self.region,
-            'symbols': symbol,
-            'fields': QuoteTransformer.transform_fields(
-                fields=self.allowedFields,
-                allowed_fields=self.allowedFields
-            ),
-            'cors_domain': self.cors_domain
-        }
-        print(self.crumb)
         try:
-            response_data = self.request_api(self.endpoint, params=params)
-
-            quote = QuoteTransformer.output(data=response_data, output=self.output)
-            logger.info("Successfully fetched quote for symbol: %s", symbol)
+            response_data = self._request_quotes(symbol, requested_fields)
+            quote = QuoteTransformer.output(data=response_data, output=self.output,
+                                            fields=projection, tolerant=self.tolerant)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Successfully fetched quote for symbol: %s", symbol)
             return quote
 
+        except InvalidSymbol as e:
+            logger.error("Invalid symbol %s: %s", symbol, e)
+            self._mark_invalid(symbol)
+            raise
         except ApiException as e:
             logger.error("API error fetching quote for symbol %s: %s", symbol, e)
             raise
         except Exception as e:
             logger.error("Unexpected error fetching quote for symbol %s: %s", symbol, e)
             raise
+
+    def get_quotes(self, symbols: Sequence[str], fields: Optional[Sequence[str]] = None,
+                   batch_size: int = 100) -> 'np.ndarray':
+        """
+        Get a snapshot of many quotes as one table (multi-symbol requests of batch_size symbols)
+        @param symbols: The Security / Stock symbols (normalized and deduplicated)
+        @param fields: Field projection (defaults to the instance projection, then all fields)
+        @param batch_size: Symbols per request
+        @return: NumPy structured array with one row per valid symbol (see
+        QuoteTransformer.quotes_to_table); every quote is checked against QuoteValidator
+        and quotes failing it are skipped
+        """
+        if batch_size < 1:
+            raise ValidatorException('Batch size must be positive')
+
+        fields = fields if fields is not None else self.fields
+        projection: Optional[Tuple[str, ...]] = None
+        if fields is None:
+            requested_fields = self.field_projection(self.allowedFields)[1]
+        else:
+            projection, requested_fields = self.field_projection(fields)
+
+        if self.symbol_registry is not None:
+            symbols = self.symbol_registry.filter(symbols)
+        else:
+            symbols = normalize_symbols(symbols)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Fetching quotes for %d symbols", len(symbols))
+
+        plan = QuoteValidator.plan()
+        quotes: List[Dict] = []
+        for start in range(0, len(symbols), batch_size):
+            batch = ','.join(symbols[start:start + batch_size])
+            try:
+                response_data = self._request_quotes(batch, requested_fields)
+            except InvalidSymbol:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("No valid symbol in batch: %s", batch)
+                self._mark_invalid(batch)
+                continue
+            batch_quotes, error = plan.entries(loads(response_data))
+            if batch_quotes is None:
+                raise TransformerException(error)
+            quotes.extend(self._valid_quotes(plan, batch_quotes))
+
+        return QuoteTransformer.quotes_to_table(quotes, projection)
+
+    @staticmethod
+    def _valid_quotes(plan: ValidationPlan, quotes: List[Any]) -> List[Dict]:
+        """
+        Validate every quote of a multi-symbol response on its own; quotes failing the
+        plan are logged and skipped, so one malformed quote does not drop the batch
+        @param plan: The compiled QuoteValidator plan
+        @param quotes: The result entries of the response
+        @return: The valid quotes
+        """
+        valid = []
+        for quote in quotes:
+            errors = plan.entry_errors(quote)
+            if errors:
+                symbol = quote.get('symbol') if isinstance(quote, dict) else None
+                logger.warning("Skipping invalid quote for symbol %s: %s", symbol, errors[0])
+            else:
+                valid.append(quote)
+        return valid
+
+    def _request_quotes(self, symbols: str, requested_fields: str) -> bytes:
+        """
+        Request the quote endpoint, refreshing an expired crumb once
+        @param symbols: Comma-separated symbols
+        @param requested_fields: Comma-separated fields
+        @return: The raw response
+        @raise InvalidSymbol: If the response contains no quote
+        """
+        crumb = self._get_crumb()
+        params = {
+            'formatted': self.formatted,
+            'crumb': crumb,
+            'lang': self.language,
+            'region': self.region,
+            'symbols': symbols,
+            'fields': requested_fields,
+            'cors_domain': self.cors_domain
+        }
+        try:
+            response_data = self.request_api_bytes(self.endpoint, params=params)
+        except CrumbExpired:
+            logger.info("Crumb expired, fetching new crumb")
+            params['crumb'] = self._get_crumb(stale=crumb)
+            response_data = self.request_api_bytes(self.endpoint, params=params)
+
+        Validator.check_response_error(response_data)
+        if self.symbol_registry is not None:
+            self.symbol_registry.record_response(response_data, requested=symbols.split(','))
+        return response_data
+
+    def _get_crumb(self, stale: Optional[str] = None) -> str:
+        """
+        Get the crumb, fetching a new one if none exists or it is still the rejected one
+        (threads that saw the same crumb expire fetch only one new crumb)
+        @param stale: The crumb the API rejected (e.g. after CrumbExpired)
+        @return: The crumb (IDENTITY_CRUMB with an identity pool)
+        """
+        if self.identity_pool is not None:
+            return IDENTITY_CRUMB
+        with self._crumb_lock:
+            if not self.crumb or self.crumb == stale:
+                logger.info("Fetching new crumb")
+                self.crumb = self.get_crumb()
+            return self.crumb
@@ -5,14 +5,16 @@ Copyright 2023 Dominic Kneup.
 Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
 """
 import logging
-from typing import Union
+from typing import Optional, Union
 from client.api_client import ApiClient
 from client.api.validators.validator import Validator
 from client.exceptions.APIClientExceptions import ApiException
-from client.api.transformers.similar_securities_transformer import SimilarSecuritiesTransformer
-from client.api.config import settings
+from client.api.transformers.similar_securities_transformer import (
+    OutputFormat, SimilarSecuritiesTransformer
+)
+from client.api.config import Settings
+from client.circuit_breaker import CircuitBreakerRegistry
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -23,13 +25,17 @@ class SimilarSecurities(ApiClient):
         apiEndpoint (str): api Endpoint URL (optional)
         output (str): Setup Default Output Format (optional)
     """
+    endpoint_name = 'recommendations'
+
     def __init__(
             self,
-            api_endpoint: str = settings.similar_securities_api_endpoint,
-            output_format: str = settings.similar_securities_output):
-        super().__init__()
-        self.api_endpoint = api_endpoint
-        self.output_format = output_format
+            api_endpoint: Optional[str] = None,
+            output_format: Optional[Union[str, OutputFormat]] = None,
+            settings: Optional[Settings] = None,
+            circuit_breakers: Optional[CircuitBreakerRegistry] = None):
+        super().__init__(settings, circuit_breakers)
+        self.api_endpoint = api_endpoint or self.settings.similar_securities_api_endpoint
+        self.output_format = output_format or self.settings.similar_securities_output
 
     def get_similar_securities(self, security_symbol: str) -> Union[str, list]:
         """
@@ -37,18 +43,20 @@ class SimilarSecurities(ApiClient):
         @param security: The Security Symbol to get information for (e.g. AMD)
         @return: A list of similar securities or raw json api response
         """
-        logger.info("Fetching similar securities for: %s", security_symbol)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Fetching similar securities for: %s", security_symbol)
 
         try:
             url = f"{self.api_endpoint}{security_symbol}"
-            response_data = self.request_api(url)
+            response_data = self.request_api_bytes(url)
 
             Validator.check_response_error(response_data)
             similar_securities = SimilarSecuritiesTransformer.output(
                 response_data,
                 self.output_format
             )
-            logger.info("Successfully fetched similar securities for: %s", security_symbol)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Successfully fetched similar securities for: %s", security_symbol)
 
             return similar_securities
 
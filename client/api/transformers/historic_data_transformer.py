@@ -4,9 +4,14 @@ Module: HistoricDataTransformer
 Copyright 2023 Dominic Kneup.
 Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
 """
-from typing import Union, List, Dict, Any
+from bisect import bisect_left
+from dataclasses import dataclass, asdict, field
+from functools import partial
+from typing import Union, List, Dict, Any, Optional, Sequence, Tuple
 from enum import Enum
+from client.api.batch import BatchItem, decode_response, run_batch
 from client.api.transformers.transformer import Transformer
+from client.json_loader import JsonInput
 from client.api.validators.historic_data_validator import HistoricDataValidator
 from client.exceptions.APIClientExceptions import TransformerException
 
@@ -15,25 +20,144 @@ class OutputFormat(Enum):
     """Enum for output formats
 
     This enum defines the possible output formats for the historic data data.
-    The available formats are 'dict' and 'raw'.
+    The available formats are 'dict', 'columns', 'chart' (columns plus events) and 'raw'.
     """
     DICT = "dict"
+    COLUMNS = "columns"
+    CHART = "chart"
     RAW = "raw"
 
 
+class NullPolicy(Enum):
+    """Enum for null handling policies
+
+    This enum defines how bars with missing prices (gaps) are handled.
+    'drop' removes them, 'ffill' fills them with the last known prices (volume 0)
+    and 'nan' keeps them with NaN values.
+    """
+    DROP = "drop"
+    FORWARD_FILL = "ffill"
+    NAN = "nan"
+
+
+@dataclass(frozen=True)
+class ChartMeta:  # pylint: disable=too-many-instance-attributes
+    """
+    Instrument metadata from the 'meta' block of a chart response.
+
+    Attributes:
+        symbol (str): The symbol.
+        currency (str): Trading currency.
+        exchange_name (str): Exchange code (e.g. "NYQ").
+        instrument_type (str): Instrument type (e.g. "EQUITY").
+        first_trade_date (int): First trade date (Unix time).
+        timezone (str): Timezone abbreviation (e.g. "EDT").
+        exchange_timezone_name (str): Exchange timezone (e.g. "America/New_York").
+        regular_market_price (float): Last price.
+        chart_previous_close (float): Close before the first bar.
+        price_hint (int): Number of decimals for prices.
+        gmtoffset (Optional[int]): UTC offset of the exchange in seconds.
+        full_exchange_name (Optional[str]): Exchange name (e.g. "NYSE").
+        regular_market_time (Optional[int]): Time of the last price (Unix time).
+        data_granularity (Optional[str]): Interval of the bars.
+        valid_ranges (Tuple[str, ...]): Ranges the API accepts for the symbol.
+    """
+    symbol: str
+    currency: str
+    exchange_name: str
+    instrument_type: str
+    first_trade_date: int
+    timezone: str
+    exchange_timezone_name: str
+    regular_market_price: float
+    chart_previous_close: float
+    price_hint: int
+    gmtoffset: Optional[int] = None
+    full_exchange_name: Optional[str] = None
+    regular_market_time: Optional[int] = None
+    data_granularity: Optional[str] = None
+    valid_ranges: Tuple[str, ...] = field(default_factory=tuple)
+
+    # API property of each field
+    api_names = {
+        'symbol': 'symbol', 'currency': 'currency', 'exchange_name': 'exchangeName',
+        'instrument_type': 'instrumentType', 'first_trade_date': 'firstTradeDate',
+        'timezone': 'timezone', 'exchange_timezone_name': 'exchangeTimezoneName',
+        'regular_market_price': 'regularMarketPrice', 'chart_previous_close': 'chartPreviousClose',
+        'price_hint': 'priceHint', 'gmtoffset': 'gmtoffset',
+        'full_exchange_name': 'fullExchangeName',
+        'regular_market_time': 'regularMarketTime', 'data_granularity': 'dataGranularity',
+        'valid_ranges': 'validRanges',
+    }
+
+    @classmethod
+    def from_api(cls, meta: Dict[str, Any]) -> 'ChartMeta':
+        """
+        Creates the metadata from a validated 'meta' block.
+
+        Args:
+            meta (Dict[str, Any]): The 'meta' block of a chart result.
+
+        Returns:
+            ChartMeta: The typed metadata.
+        """
+        values = {name: meta[api_name] for name, api_name in cls.api_names.items()
+                  if api_name in meta}
+        values['valid_ranges'] = tuple(values.get('valid_ranges', ()))
+        return cls(**values)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ChartMeta':
+        """
+        Creates the metadata from the output of as_dict.
+
+        Args:
+            data (Dict[str, Any]): Field values.
+
+        Returns:
+            ChartMeta: The typed metadata.
+        """
+        return cls(**{**data, 'valid_ranges': tuple(data.get('valid_ranges', ()))})
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Returns the metadata as a dictionary.
+
+        Returns:
+            Dict[str, Any]: Field values (valid_ranges as list).
+        """
+        data = asdict(self)
+        data['valid_ranges'] = list(self.valid_ranges)
+        return data
+
+
 class HistoricDataTransformer:
     """
     Class for transforming historic data API responses.
+
+    Attributes:
+        price_fields (list[str]): Quote indicators that must be present for a bar to be kept.
+        columns (list[str]): Field names of the transformed output, in output order.
+        event_fields (dict[str, list[str]]): Event types and the fields kept per event.
     """
+    price_fields: List[str] = ['open', 'low', 'high', 'close']
+    columns: List[str] = ['timestamp', 'open', 'low', 'high', 'close', 'adjclose', 'volume']
+    event_fields: Dict[str, List[str]] = {
+        'dividends': ['amount'],
+        'splits': ['numerator', 'denominator'],
+        'capitalGains': ['amount'],
+    }
 
     @staticmethod
-    def transform_results(result: str, output: OutputFormat) -> List[Dict[str, Any]]:
+    def transform_results(result: JsonInput, output: OutputFormat,
+                          null_policy: NullPolicy = NullPolicy.DROP) -> List[Dict[str, Any]]:
         """
         Validates and transforms historic data from a raw JSON response.
 
         Args:
-            result (str): Raw JSON from the API.
+            result (JsonInput): Raw JSON (str or bytes) from the API.
             output (OutputFormat): Desired output format.
+            null_policy (NullPolicy): How bars with missing prices are handled.
 
         Returns:
             List[Dict[str, Any]]: A list of dictionaries containing historic data.
@@ -41,49 +165,229 @@ class HistoricDataTransformer:
         Raises:
             TransformerException: If transformation fails.
         """
-        try:
-            data = dict(Transformer.json_to_list(result))
-            HistoricDataValidator.validate_results(data)
-
-            if 'chart' not in data or 'result' not in data['chart'] or not data['chart']['result']:
-                raise TransformerException("Invalid data structure: missing 'chart' or 'result'")
-
-            result_data = data['chart']['result'][0]
-            if 'timestamp' not in result_data or 'indicators' not in result_data:
-                raise TransformerException(
-                    "Invalid data structure: missing 'timestamp' or 'indicators'"
-                )
-
-            timestamps = result_data['timestamp']
-            quote_data = result_data['indicators']['quote'][0]
-            adj_close_data = result_data['indicators']['adjclose'][0]['adjclose']
-
-            processed_data = [
-                HistoricDataTransformer.transform_single_data(
-                    timestamps[i],
-                    (quote_data['open'][i],
-                     quote_data['low'][i],
-                     quote_data['high'][i],
-                     quote_data['close'][i],
-                     adj_close_data[i])
-                )
-                for i in range(len(timestamps))
-                if all(quote_data[field][i] is not None for field in
-                       ['open', 'low', 'high', 'close'])
-                and adj_close_data[i] is not None
-            ]
-
-            if output == OutputFormat.DICT:
-                return processed_data
+        if output != OutputFormat.DICT:
             raise TransformerException("Output format invalid")
 
-        except (KeyError, ValueError) as e:
+        columns = HistoricDataTransformer.transform_columns(result, null_policy)
+        keys = list(columns)
+        return [dict(zip(keys, row)) for row in zip(*columns.values())]
+
+    @staticmethod
+    def transform_columns(result: JsonInput,
+                          null_policy: NullPolicy = NullPolicy.DROP) -> Dict[str, List[Any]]:
+        """
+        Validates and transforms historic data into parallel columns.
+
+        Args:
+            result (JsonInput): Raw JSON (str or bytes) from the API.
+            null_policy (NullPolicy): How bars with missing prices are handled.
+
+        Returns:
+            Dict[str, List[Any]]: One list per field (timestamp, open, low, high, close,
+            adjclose, volume), all of the same length.
+
+        Raises:
+            TransformerException: If transformation fails.
+        """
+        try:
+            result_data = HistoricDataTransformer._load_chart(result)
+            return HistoricDataTransformer._transform_bars(result_data, NullPolicy(null_policy))
+
+        except (KeyError, ValueError, IndexError) as e:
             raise TransformerException(
                 "Transformation failed due to missing keys or value errors."
             ) from e
+        except TransformerException:
+            raise
         except Exception as e:
             raise TransformerException("Transformation failed due to an unexpected error.") from e
 
+    @staticmethod
+    def transform_chart(result: JsonInput,
+                        null_policy: NullPolicy = NullPolicy.DROP) -> Dict[str, Any]:
+        """
+        Validates and transforms bars and corporate action events of one chart response.
+
+        Args:
+            result (JsonInput): Raw JSON (str or bytes) from the API.
+            null_policy (NullPolicy): How bars with missing prices are handled.
+
+        Returns:
+            Dict[str, Any]: "bars" (see transform_columns), "events" (see transform_events)
+            and "meta" (ChartMeta).
+
+        Raises:
+            TransformerException: If transformation fails.
+        """
+        try:
+            result_data = HistoricDataTransformer._load_chart(result)
+            return HistoricDataTransformer._transform_chart_result(result_data,
+                                                                   NullPolicy(null_policy))
+
+        except (KeyError, ValueError, IndexError, TypeError) as e:
+            raise TransformerException(
+                "Transformation failed due to missing keys or value errors."
+            ) from e
+        except TransformerException:
+            raise
+        except Exception as e:
+            raise TransformerException("Transformation failed due to an unexpected error.") from e
+
+    @staticmethod
+    def _transform_chart_result(result_data: Dict[str, Any],
+                                null_policy: NullPolicy) -> Dict[str, Any]:
+        """
+        Transforms bars, events and meta of a validated chart result.
+
+        Args:
+            result_data (Dict[str, Any]): A single chart result.
+            null_policy (NullPolicy): How bars with missing prices are handled.
+
+        Returns:
+            Dict[str, Any]: "bars", "events" and "meta".
+        """
+        return {
+            'bars': HistoricDataTransformer._transform_bars(result_data, null_policy),
+            'events': HistoricDataTransformer.transform_events(result_data.get('events') or {}),
+            'meta': ChartMeta.from_api(result_data['meta']),
+        }
+
+    @staticmethod
+    def transform_events(events: Dict[str, Any]) -> Dict[str, Dict[str, List[Any]]]:
+        """
+        Converts the 'events' section of a chart result into compact tables.
+
+        Args:
+            events (Dict[str, Any]): Events keyed by type and timestamp as returned by the API.
+
+        Returns:
+            Dict[str, Dict[str, List[Any]]]: One table per event type (dividends, splits,
+            capitalGains) with a sorted "timestamp" column and the event fields.
+        """
+        tables = {}
+        for event_type, fields in HistoricDataTransformer.event_fields.items():
+            entries = sorted((events.get(event_type) or {}).values(),
+                             key=lambda event: event['date'])
+            table: Dict[str, List[Any]] = {'timestamp': [event['date'] for event in entries]}
+            for name in fields:
+                table[name] = [event.get(name) for event in entries]
+            tables[event_type] = table
+        return tables
+
+    @staticmethod
+    def _transform_bars(result_data: Dict[str, Any],
+                        null_policy: NullPolicy) -> Dict[str, List[Any]]:
+        """
+        Transforms the bars of a validated chart result into columns.
+
+        Args:
+            result_data (Dict[str, Any]): A single chart result.
+            null_policy (NullPolicy): How bars with missing prices are handled.
+
+        Returns:
+            Dict[str, List[Any]]: The filtered columns.
+        """
+        quote_data = result_data['indicators']['quote'][0]
+        series = [quote_data[field] for field in HistoricDataTransformer.price_fields]
+        series.append(result_data['indicators']['adjclose'][0]['adjclose'])
+        return HistoricDataTransformer.filter_nulls(
+            result_data['timestamp'], series, quote_data['volume'], null_policy
+        )
+
+    @staticmethod
+    def filter_nulls(timestamps: List[int], prices: List[List[Any]], volume: List[Any],
+                     null_policy: NullPolicy) -> Dict[str, List[Any]]:
+        """
+        Finds bars with gaps in one vectorized pass over the parallel price arrays and
+        applies the null policy.
+
+        Args:
+            timestamps (List[int]): Bar timestamps.
+            prices (List[List[Any]]): open, low, high, close and adjclose series (None for gaps).
+            volume (List[Any]): Volume series.
+            null_policy (NullPolicy): How bars with missing prices are handled.
+
+        Returns:
+            Dict[str, List[Any]]: The filtered columns.
+
+        Raises:
+            ValueError: If the series do not have the same length.
+        """
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        matrix = np.array(prices, dtype=np.float64)
+        if matrix.ndim != 2 or matrix.shape[1] != len(timestamps) or len(volume) != len(timestamps):
+            raise ValueError("Indicator series and timestamps differ in length")
+        gaps = np.isnan(matrix)
+        names = HistoricDataTransformer.columns
+
+        if not gaps.any():
+            return dict(zip(names, [timestamps, *prices, volume]))
+
+        if null_policy == NullPolicy.NAN:
+            volumes = np.array(volume, dtype=np.float64)
+            return dict(zip(names, [timestamps, *matrix.tolist(), volumes.tolist()]))
+
+        if null_policy == NullPolicy.FORWARD_FILL:
+            # Index of the last valid value for each element, filled forward per row
+            positions = np.where(gaps, 0, np.arange(matrix.shape[1]))
+            np.maximum.accumulate(positions, axis=1, out=positions)
+            matrix = np.take_along_axis(matrix, positions, axis=1)
+            matrix[np.cumsum(~gaps, axis=1) == 0] = np.nan
+
+            volumes = np.array(volume, dtype=object)
+            volumes[gaps.any(axis=0)] = 0
+            volumes[np.equal(volumes, np.array(None))] = 0
+            valid = np.flatnonzero(~np.isnan(matrix).any(axis=0))
+            return dict(zip(names, [np.array(timestamps, dtype=object)[valid].tolist(),
+                                    *matrix[:, valid].tolist(), volumes[valid].tolist()]))
+
+        valid = np.flatnonzero(~gaps.any(axis=0))
+        return dict(zip(names, [np.array(column, dtype=object)[valid].tolist()
+                                for column in [timestamps, *prices, volume]]))
+
+    @staticmethod
+    def _load_chart(result: JsonInput) -> Dict[str, Any]:
+        """
+        Decodes and validates the raw JSON and returns the first chart result.
+
+        Args:
+            result (JsonInput): Raw JSON (str or bytes) from the API.
+
+        Returns:
+            Dict[str, Any]: The chart result containing meta, timestamp, indicators and events.
+
+        Raises:
+            TransformerException: If the data structure is invalid.
+        """
+        return HistoricDataTransformer._chart_result(dict(Transformer.json_to_list(result)))
+
+    @staticmethod
+    def _chart_result(data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Validates a decoded chart response and returns its first chart result.
+
+        Args:
+            data (Dict[str, Any]): The decoded response.
+
+        Returns:
+            Dict[str, Any]: The chart result containing meta, timestamp, indicators and events.
+
+        Raises:
+            ValidatorException: If a required property is missing.
+            TransformerException: If the data structure is invalid.
+        """
+        HistoricDataValidator.validate_results(data)
+
+        if 'chart' not in data or 'result' not in data['chart'] or not data['chart']['result']:
+            raise TransformerException("Invalid data structure: missing 'chart' or 'result'")
+
+        result_data = data['chart']['result'][0]
+        if 'timestamp' not in result_data or 'indicators' not in result_data:
+            raise TransformerException(
+                "Invalid data structure: missing 'timestamp' or 'indicators'"
+            )
+        return result_data
+
     @staticmethod
     def transform_single_data(timestamp: int, price_values: tuple) -> Dict[str, Any]:
         """
@@ -91,37 +395,233 @@ class HistoricDataTransformer:
 
         Args:
             timestamp (int): Unix timestamp.
-            price_values (tuple): Tuple containing open, low, high, close, and adjclose prices.
+            price_values (tuple): Tuple containing open, low, high, close, adjclose prices
+            and optionally the volume.
 
         Returns:
             Dict[str, Any]: A dictionary containing the transformed data.
         """
-        return {
-            "timestamp": timestamp,
-            "open": price_values[0],
-            "low": price_values[1],
-            "high": price_values[2],
-            "close": price_values[3],
-            "adjclose": price_values[4],
-        }
+        return dict(zip(HistoricDataTransformer.columns, (timestamp, *price_values)))
 
     @classmethod
-    def output(cls, data: str, output: str) -> Union[str, List[Dict[Any, Any]]]:
+    def empty_output(cls, output: str) -> Union[str, List[Dict[Any, Any]], Dict[str, Any]]:
         """
-        Takes raw JSON from API response and converts/formats it.
+        Returns the output of a period without bars (no request is sent for such periods).
 
         Args:
-            data (str): Raw JSON as input.
             output (str): Desired output format (OutputFormat).
 
         Returns:
-            Union[str, List[Dict[Any, Any]]]: Converted and formatted data.
+            Union[str, List[Dict[Any, Any]], Dict[str, Any]]: Empty data in the output format.
 
         Raises:
             TransformerException: If output format is invalid.
         """
+        if output == OutputFormat.RAW.value:
+            return '{"chart":{"result":[],"error":null}}'
         if output == OutputFormat.DICT.value:
-            return cls.transform_results(data, OutputFormat.DICT)
+            return []
+        bars: Dict[str, List[Any]] = {column: [] for column in cls.columns}
+        if output == OutputFormat.COLUMNS.value:
+            return bars
+        if output == OutputFormat.CHART.value:
+            return {'bars': bars, 'events': cls.transform_events({}), 'meta': None}
+        raise TransformerException("Output format invalid")
+
+    @staticmethod
+    def trim(data: Any, output: str, start: int, end: int) -> Any:
+        """
+        Keeps the bars with a timestamp in [start, end); raw output and events are
+        returned unchanged.
+
+        Args:
+            data (Any): Data in the output format (see output).
+            output (str): Output format of data (OutputFormat).
+            start (int): First timestamp to keep (seconds since the epoch).
+            end (int): Timestamp after the last one to keep (seconds since the epoch).
+
+        Returns:
+            Any: The trimmed data in the same format.
+        """
         if output == OutputFormat.RAW.value:
             return data
-        raise TransformerException("Output format invalid")
+        if output == OutputFormat.DICT.value:
+            return [row for row in data if start <= row['timestamp'] < end]
+
+        bars: Dict[str, List[Any]] = data['bars'] if output == OutputFormat.CHART.value else data
+        timestamps = bars['timestamp']
+        first = bisect_left(timestamps, start)
+        last = bisect_left(timestamps, end)
+        if (first, last) != (0, len(timestamps)):
+            bars = {column: values[first:last] for column, values in bars.items()}
+        if output == OutputFormat.CHART.value:
+            return {**data, 'bars': bars}
+        return bars
+
+    @classmethod
+    def output(cls, data: JsonInput, output: str,
+               null_policy: str = NullPolicy.DROP.value
+               ) -> Union[str, List[Dict[Any, Any]], Dict[str, Any]]:
+        """
+        Takes raw JSON from API response and converts/formats it.
+
+        Args:
+            data (JsonInput): Raw JSON (str or bytes) as input.
+            output (str): Desired output format (OutputFormat).
+            null_policy (str): How bars with missing prices are handled (NullPolicy).
+
+        Returns:
+            Union[str, List[Dict[Any, Any]], Dict[str, Any]]: Converted and formatted data.
+
+        Raises:
+            TransformerException: If output or null policy format is invalid.
+        """
+        if output == OutputFormat.RAW.value:
+            return Transformer.to_text(data)
+        return cls.output_with_meta(data, output, null_policy)[0]
+
+    @classmethod
+    def output_with_meta(cls, data: JsonInput, output: str,
+                         null_policy: str = NullPolicy.DROP.value
+                         ) -> Tuple[Union[str, List[Dict[Any, Any]], Dict[str, Any]],
+                                    Optional[ChartMeta]]:
+        """
+        Converts/formats the raw JSON like output and also returns the chart metadata,
+        decoding the response only once.
+
+        Args:
+            data (JsonInput): Raw JSON (str or bytes) as input.
+            output (str): Desired output format (OutputFormat).
+            null_policy (str): How bars with missing prices are handled (NullPolicy).
+
+        Returns:
+            Tuple[Union[str, List[Dict[Any, Any]], Dict[str, Any]], Optional[ChartMeta]]:
+            Converted data and the metadata (None for raw output without a valid meta block).
+
+        Raises:
+            TransformerException: If output or null policy format is invalid or transformation
+                fails.
+        """
+        if output == OutputFormat.RAW.value:
+            return Transformer.to_text(data), cls.transform_meta(data)
+        if output not in (OutputFormat.DICT.value, OutputFormat.COLUMNS.value,
+                          OutputFormat.CHART.value):
+            raise TransformerException("Output format invalid")
+        try:
+            policy = NullPolicy(null_policy)
+        except ValueError as e:
+            raise TransformerException("Null policy invalid") from e
+
+        try:
+            chart = cls._transform_chart_result(cls._load_chart(data), policy)
+        except (KeyError, ValueError, IndexError, TypeError) as e:
+            raise TransformerException(
+                "Transformation failed due to missing keys or value errors."
+            ) from e
+        except TransformerException:
+            raise
+        except Exception as e:
+            raise TransformerException("Transformation failed due to an unexpected error.") from e
+
+        return cls._format_chart(chart, output), chart['meta']
+
+    @classmethod
+    def transform_batch(cls, payloads: Sequence[Any], output: str = OutputFormat.COLUMNS.value,
+                        null_policy: str = NullPolicy.DROP.value,
+                        workers: Optional[int] = None) -> List[BatchItem]:
+        """
+        Validates and transforms many chart responses in one pass. Output format and null
+        policy are checked once for the whole batch.
+
+        Args:
+            payloads (Sequence[Any]): Raw JSON (str or bytes) or decoded responses.
+            output (str): Desired output format (dict, columns or chart).
+            null_policy (str): How bars with missing prices are handled (NullPolicy).
+            workers (Optional[int]): Worker processes for large batches (see batch.run_batch).
+
+        Returns:
+            List[BatchItem]: Per payload the data in the output format, a ValidatorException
+            if the response is invalid or a TransformerException.
+
+        Raises:
+            TransformerException: If output or null policy format is invalid.
+        """
+        if output not in (OutputFormat.DICT.value, OutputFormat.COLUMNS.value,
+                          OutputFormat.CHART.value):
+            raise TransformerException("Output format invalid")
+        try:
+            policy = NullPolicy(null_policy)
+        except ValueError as e:
+            raise TransformerException("Null policy invalid") from e
+        return run_batch(partial(cls._transform_payload, output=output, null_policy=policy),
+                         payloads, workers)
+
+    @classmethod
+    def _transform_payload(cls, payload: Any, output: str,
+                           null_policy: NullPolicy) -> Union[List[Dict[Any, Any]], Dict[str, Any]]:
+        """
+        Validates and transforms one chart response of a batch.
+
+        Args:
+            payload (Any): Raw JSON (str or bytes) or the decoded response.
+            output (str): Output format (dict, columns or chart).
+            null_policy (NullPolicy): How bars with missing prices are handled.
+
+        Returns:
+            Union[List[Dict[Any, Any]], Dict[str, Any]]: The data in the output format.
+
+        Raises:
+            InvalidSymbol: If the API reports an unknown symbol.
+            ValidatorException: If the response reports another error or a required property
+                is missing.
+            TransformerException: If the payload is not valid JSON or transformation fails.
+        """
+        data = decode_response(payload, TransformerException)
+        if not isinstance(data, dict):
+            raise TransformerException("Invalid data structure: missing 'chart' or 'result'")
+        result_data = cls._chart_result(data)
+        try:
+            chart = cls._transform_chart_result(result_data, null_policy)
+        except (KeyError, ValueError, IndexError, TypeError) as e:
+            raise TransformerException(
+                "Transformation failed due to missing keys or value errors."
+            ) from e
+        return cls._format_chart(chart, output)
+
+    @staticmethod
+    def _format_chart(chart: Dict[str, Any],
+                      output: str) -> Union[List[Dict[Any, Any]], Dict[str, Any]]:
+        """
+        Shapes a transformed chart into the output format.
+
+        Args:
+            chart (Dict[str, Any]): See transform_chart.
+            output (str): Output format (dict, columns or chart).
+
+        Returns:
+            Union[List[Dict[Any, Any]], Dict[str, Any]]: The data in the output format.
+        """
+        if output == OutputFormat.CHART.value:
+            return chart
+        bars = chart['bars']
+        if output == OutputFormat.COLUMNS.value:
+            return bars
+        keys = list(bars)
+        return [dict(zip(keys, row)) for row in zip(*bars.values())]
+
+    @staticmethod
+    def transform_meta(data: JsonInput) -> Optional[ChartMeta]:
+        """
+        Extracts the metadata of a chart response without validating the bars.
+
+        Args:
+            data (JsonInput): Raw JSON (str or bytes) from the API.
+
+        Returns:
+            Optional[ChartMeta]: The metadata or None if the response has no valid meta block.
+        """
+        try:
+            meta = Transformer.json_to_list(data)['chart']['result'][0]['meta']
+            return ChartMeta.from_api(meta)
+        except (KeyError, ValueError, IndexError, TypeError):
+            return None
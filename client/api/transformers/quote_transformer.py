@@ -5,19 +5,27 @@ Copyright 2023 Dominic Kneup.
 Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
 """
 from enum import Enum
-from typing import Dict, List, Union
+from functools import partial
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple, Union
+from client.api.batch import BatchItem, decode_response, run_batch
 from client.api.transformers.transformer import Transformer
+from client.json_loader import JsonInput
 from client.api.validators.quote_validator import QuoteValidator
 from client.exceptions import APIClientExceptions
 
+if TYPE_CHECKING:
+    import numpy as np
+
 
 class OutputFormat(Enum):
     """Enum for output formats
 
     This enum defines the possible output formats for the quote data.
-    The available formats are 'list' and 'raw'.
+    The available formats are 'dict' (first quote), 'table' (all quotes as a NumPy
+    structured array) and 'raw'.
     """
     DICT = "dict"
+    TABLE = "table"
     RAW = "raw"
 
 
@@ -29,13 +37,17 @@ class QuoteTransformer:
         self.transformer = Transformer()
         self.validator = QuoteValidator()
 
-    def _data_transformation(self, result: str, data_type: str) -> Dict:
+    def _data_transformation(self, result: JsonInput, data_type: str,
+                             fields: Optional[Sequence[str]] = None,
+                             tolerant: bool = False) -> Dict:
         """
         Validates and transforms quote data.
 
         Args:
-            result (str): Raw JSON from API.
+            result (JsonInput): Raw JSON (str or bytes) from API.
             data_type (str): Type of data (e.g., "quote").
+            fields (Optional[Sequence[str]]): Only extract these fields (and the symbol).
+            tolerant (bool): Keep lists and None values and skip values of unknown shape.
 
         Returns:
             Dict: Transformed quote data.
@@ -46,7 +58,10 @@ class QuoteTransformer:
         try:
             data = self.transformer.json_to_list(result)
             self.validator.validate_results(data)
-            return self.transformer.flatten_dict(data[data_type]["result"][0])
+            quote = data[data_type]["result"][0]
+            if fields is not None:
+                quote = self.project(quote, fields)
+            return self.transformer.flatten(quote, tolerant)
         except (KeyError, ValueError) as e:
             raise APIClientExceptions.TransformerException(
                 "Error transforming quote data due to missing keys or value errors."
@@ -68,39 +83,278 @@ class QuoteTransformer:
         Returns:
             str: Comma-separated string of valid fields for API requests.
         """
-        valid_fields = [field for field in fields if field in allowed_fields]
+        allowed = set(allowed_fields)
+        valid_fields = [field for field in fields if field in allowed]
         return ",".join(valid_fields)
 
-    def _return_quote_dict(self, data: str) -> Dict:
+    @staticmethod
+    def project(quote: Dict, fields: Sequence[str]) -> Dict:
+        """
+        Extract the requested fields of a single quote (the symbol is always kept).
+
+        Args:
+            quote (Dict): A single quote result.
+            fields (Sequence[str]): Fields to extract.
+
+        Returns:
+            Dict: The quote reduced to the requested fields that are present.
+        """
+        projected = {'symbol': quote['symbol']} if 'symbol' in quote else {}
+        for field in fields:
+            if field in quote:
+                projected[field] = quote[field]
+        return projected
+
+    def _return_quote_dict(self, data: JsonInput, fields: Optional[Sequence[str]] = None,
+                           tolerant: bool = False) -> Dict:
         """
         Converts and returns quote data as a dictionary.
 
         Args:
-            data (str): Raw JSON data.
+            data (JsonInput): Raw JSON data (str or bytes).
+            fields (Optional[Sequence[str]]): Only extract these fields (and the symbol).
+            tolerant (bool): Keep lists and None values and skip values of unknown shape.
 
         Returns:
             Dict: Converted quote data.
         """
-        return self._data_transformation(data, "quoteResponse")
+        return self._data_transformation(data, "quoteResponse", fields, tolerant)
+
+    @classmethod
+    def transform_quotes(cls, result: JsonInput, fields: Optional[Sequence[str]] = None,
+                         tolerant: bool = False) -> List[Dict]:
+        """
+        Validates and flattens all quotes of a (bulk) response. Quotes with the same
+        fields share one cached flattener.
+
+        Args:
+            result (JsonInput): Raw JSON (str or bytes) from API.
+            fields (Optional[Sequence[str]]): Only extract these fields (and the symbol).
+            tolerant (bool): Keep lists and None values and skip values of unknown shape.
+
+        Returns:
+            List[Dict]: The flattened quotes in response order.
+
+        Raises:
+            APIClientExceptions.TransformerException: If transformation fails.
+        """
+        try:
+            data = Transformer.json_to_list(result)
+            QuoteValidator.validate_results(data)
+            quotes = data["quoteResponse"]["result"]
+            if fields is not None:
+                quotes = [cls.project(quote, fields) for quote in quotes]
+            return [Transformer.flatten(quote, tolerant) for quote in quotes]
+        except (KeyError, ValueError) as e:
+            raise APIClientExceptions.TransformerException(
+                "Error transforming quote data due to missing keys or value errors."
+            ) from e
+        except Exception as e:
+            raise APIClientExceptions.TransformerException(
+                "Error transforming quote data due to an unexpected error."
+            ) from e
+
+    @classmethod
+    def transform_batch(cls, payloads: Sequence[Any], fields: Optional[Sequence[str]] = None,
+                        tolerant: bool = False, workers: Optional[int] = None) -> List[BatchItem]:
+        """
+        Validates and flattens the quotes of many responses in one pass. The field list is
+        prepared once and all responses share the cached flatteners.
+
+        Args:
+            payloads (Sequence[Any]): Raw JSON (str or bytes) or decoded responses.
+            fields (Optional[Sequence[str]]): Only extract these fields (and the symbol).
+            tolerant (bool): Keep lists and None values and skip values of unknown shape.
+            workers (Optional[int]): Worker processes for large batches (see batch.run_batch).
+
+        Returns:
+            List[BatchItem]: Per payload the flattened quotes (see transform_quotes), a
+            ValidatorException if the response is invalid or a TransformerException.
+        """
+        fields = None if fields is None else tuple(dict.fromkeys(fields))
+        return run_batch(partial(cls._transform_payload, fields=fields, tolerant=tolerant),
+                         payloads, workers)
+
+    @classmethod
+    def _transform_payload(cls, payload: Any, fields: Optional[Tuple[str, ...]],
+                           tolerant: bool) -> List[Dict]:
+        """
+        Validates and flattens the quotes of one response of a batch.
+
+        Args:
+            payload (Any): Raw JSON (str or bytes) or the decoded response.
+            fields (Optional[Tuple[str, ...]]): Only extract these fields (and the symbol).
+            tolerant (bool): Keep lists and None values and skip values of unknown shape.
+
+        Returns:
+            List[Dict]: The flattened quotes in response order.
+
+        Raises:
+            InvalidSymbol: If the response contains no quote.
+            ValidatorException: If the response reports an error or is invalid.
+            APIClientExceptions.TransformerException: If the payload is not valid JSON or
+            a value has an unsupported shape.
+        """
+        data = decode_response(payload, APIClientExceptions.TransformerException)
+        QuoteValidator.validate_results(data)
+        quotes = data["quoteResponse"]["result"]
+        if fields is not None:
+            quotes = [cls.project(quote, fields) for quote in quotes]
+        try:
+            return [Transformer.flatten(quote, tolerant) for quote in quotes]
+        except (KeyError, ValueError, TypeError) as e:
+            raise APIClientExceptions.TransformerException(
+                "Error transforming quote data due to missing keys or value errors."
+            ) from e
+
+    @classmethod
+    def transform_table(cls, result: JsonInput,
+                        fields: Optional[Sequence[str]] = None) -> 'np.ndarray':
+        """
+        Transforms every quote of a (multi-symbol) quote response into a structured array.
+
+        Args:
+            result (JsonInput): Raw JSON (str or bytes) from API.
+            fields (Optional[Sequence[str]]): Only extract these fields (and the symbol).
+
+        Returns:
+            np.ndarray: One row per quote (see quotes_to_table).
+
+        Raises:
+            APIClientExceptions.TransformerException: If transformation fails.
+        """
+        try:
+            data = Transformer.json_to_list(result)
+        except ValueError as e:
+            raise APIClientExceptions.TransformerException(
+                "Error transforming quote data due to missing keys or value errors."
+            ) from e
+        quotes, error = QuoteValidator.plan().entries(data)
+        if quotes is None:
+            raise APIClientExceptions.TransformerException(error)
+        return cls.quotes_to_table(quotes, fields)
+
+    @classmethod
+    def quotes_to_table(cls, quotes: Sequence[Dict[str, Any]],
+                        fields: Optional[Sequence[str]] = None) -> 'np.ndarray':
+        """
+        Flattens quotes into a structured array with typed columns inferred from the 'raw'
+        values: int64 / float64 for numbers (float64 with NaN if values are missing),
+        bool, fixed-width unicode for strings ('' if missing) and object for anything else.
+
+        Args:
+            quotes (Sequence[Dict[str, Any]]): Quote results (entries without symbol are skipped).
+            fields (Optional[Sequence[str]]): Only extract these fields (and the symbol);
+            all fields of all quotes otherwise.
+
+        Returns:
+            np.ndarray: One row per quote, one column per field ("symbol" first).
+        """
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        quotes = [quote for quote in quotes if isinstance(quote, dict) and 'symbol' in quote]
+        if fields is None:
+            names = list(dict.fromkeys(name for quote in quotes for name in quote))
+        else:
+            names = list(fields)
+        names = ['symbol'] + [name for name in dict.fromkeys(names) if name != 'symbol']
+
+        columns = [cls._typed_column([cls._raw_value(quote.get(name)) for quote in quotes])
+                   for name in names]
+        table = np.empty(len(quotes),
+                         dtype=[(name, column.dtype) for name, column in zip(names, columns)])
+        for name, column in zip(names, columns):
+            table[name] = column
+        return table
+
+    @staticmethod
+    def _raw_value(value: Any) -> Any:
+        """
+        Unwraps {"raw": ..., "fmt": ...} values.
+
+        Args:
+            value (Any): A quote value.
+
+        Returns:
+            Any: The raw value.
+        """
+        if isinstance(value, dict) and 'raw' in value:
+            return value['raw']
+        return value
+
+    @staticmethod
+    def _typed_column(values: List[Any]) -> 'np.ndarray':
+        """
+        Builds a typed column from the values of one field.
+
+        Args:
+            values (List[Any]): Values (None if missing).
+
+        Returns:
+            np.ndarray: The column.
+        """
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        present = [value for value in values if value is not None]
+        missing = len(present) != len(values)
+        kinds = {QuoteTransformer._kind(value) for value in present}
+
+        if kinds == {'bool'} and not missing:
+            return np.array(values, dtype=np.bool_)
+        if kinds == {'int'} and not missing:
+            return np.array(values, dtype=np.int64)
+        if kinds and kinds <= {'int', 'float'}:
+            return np.array([np.nan if value is None else value for value in values],
+                            dtype=np.float64)
+        if kinds == {'str'}:
+            return np.array(['' if value is None else value for value in values], dtype=np.str_)
+        column = np.empty(len(values), dtype=object)
+        column[:] = values
+        return column
+
+    @staticmethod
+    def _kind(value: Any) -> str:
+        """
+        Classifies a raw value for type inference.
+
+        Args:
+            value (Any): The raw value.
+
+        Returns:
+            str: 'bool', 'int', 'float', 'str' or 'object'.
+        """
+        if isinstance(value, bool):
+            return 'bool'
+        if isinstance(value, int):
+            return 'int'
+        if isinstance(value, float):
+            return 'float'
+        if isinstance(value, str):
+            return 'str'
+        return 'object'
 
     @classmethod
-    def output(cls, data: str, output: str) -> Union[Dict, str]:
+    def output(cls, data: JsonInput, output: str, fields: Optional[Sequence[str]] = None,
+               tolerant: bool = False) -> Union[Dict, str, 'np.ndarray']:
         """
         Returns quote data in the specified output format.
 
         Args:
-            data (str): Raw JSON data.
+            data (JsonInput): Raw JSON data (str or bytes).
             output (str): Desired output format (OutputFormat).
+            fields (Optional[Sequence[str]]): Only extract these fields (and the symbol).
+            tolerant (bool): Keep lists and None values and skip values of unknown shape
+            (dict output only).
 
         Returns:
-            Union[Dict, str]: Converted and formatted data.
+            Union[Dict, str, np.ndarray]: Converted and formatted data.
 
         Raises:
             APIClientExceptions.TransformerException: If output format is invalid.
         """
         instance = cls()
         if output == OutputFormat.DICT.value:
-            return instance._return_quote_dict(data)
+            return instance._return_quote_dict(data, fields, tolerant)
+        if output == OutputFormat.TABLE.value:
+            return cls.transform_table(data, fields)
         if output == OutputFormat.RAW.value:
-            return data
+            return Transformer.to_text(data)
         raise APIClientExceptions.TransformerException("Output format invalid")
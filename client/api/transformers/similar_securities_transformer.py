@@ -6,8 +6,10 @@ Licensed under the MIT License; you can find the LICENSE file in the project's r
 """
 import json
 from enum import Enum
-from typing import Union, List
+from typing import Any, Optional, Sequence, Union, List
+from client.api.batch import BatchItem, decode_response, run_batch
 from client.api.transformers.transformer import Transformer
+from client.json_loader import JsonInput, loads
 from client.api.validators.similar_securities_validator import SimilarSecuritiesValidator
 from client.exceptions import APIClientExceptions
 
@@ -48,13 +50,13 @@ class SimilarSecuritiesTransformer(Transformer):
         return symbols
 
     @classmethod
-    def data_transformation(cls, data: str) -> List[str]:
+    def data_transformation(cls, data: JsonInput) -> List[str]:
         """Validates and transforms similar securities data
 
         This method validates and transforms the similar securities data from the API response.
 
         Args:
-            data (str): The raw JSON data from the API response.
+            data (JsonInput): The raw JSON data (str or bytes) from the API response.
 
         Returns:
             List[str]: The list of similar securities symbols.
@@ -63,25 +65,59 @@ class SimilarSecuritiesTransformer(Transformer):
             APIClientExceptions.TransformerException: If an error occurs during transformation.
         """
         try:
-            data = json.loads(data)
+            response = loads(data)
         except json.JSONDecodeError as e:
             raise APIClientExceptions.JSONDecodeError(
                 "API response contains error. Maybe your parameters are invalid"
             ) from e
         try:
-            SimilarSecuritiesValidator.validate_results(data)
+            SimilarSecuritiesValidator.validate_results(response)
         except APIClientExceptions.ValidatorException as e:
             raise APIClientExceptions.TransformerException(str(e))
-        finance_result = data.get('finance', {})
+        finance_result = response.get('finance', {})
         return cls._extract_symbols(finance_result)
 
     @classmethod
-    def output(cls, data: str, output_format: OutputFormat) -> Union[str, List[str]]:
+    def transform_batch(cls, payloads: Sequence[Any],
+                        workers: Optional[int] = None) -> List[BatchItem]:
+        """Validates and transforms many similar securities responses in one pass
+
+        Args:
+            payloads (Sequence[Any]): Raw JSON data (str or bytes) or decoded responses.
+            workers (Optional[int]): Worker processes for large batches (see batch.run_batch).
+
+        Returns:
+            List[BatchItem]: Per payload the list of similar securities symbols, a
+            ValidatorException if the response is invalid or a TransformerException.
+        """
+        return run_batch(cls._transform_payload, payloads, workers)
+
+    @classmethod
+    def _transform_payload(cls, payload: Any) -> List[str]:
+        """Validates and transforms one similar securities response of a batch
+
+        Args:
+            payload (Any): Raw JSON data (str or bytes) or the decoded response.
+
+        Returns:
+            List[str]: The list of similar securities symbols.
+
+        Raises:
+            APIClientExceptions.InvalidSymbol: If the response contains no result.
+            APIClientExceptions.ValidatorException: If the response reports an error or is invalid.
+            APIClientExceptions.TransformerException: If the payload is not valid JSON.
+        """
+        data = decode_response(payload, APIClientExceptions.TransformerException)
+        SimilarSecuritiesValidator.validate_results(data)
+        return cls._extract_symbols(data['finance'])
+
+    @classmethod
+    def output(cls, data: JsonInput, output_format: OutputFormat) -> Union[str, List[str]]:
         """
         Returns similar securities in the specified output format.
 
         Args:
-            data (str): Raw JSON data from the API response.
+            data (JsonInput): Raw JSON data (str or bytes) from the API response.
             output_format (OutputFormat): Desired output format.
 
         Returns:
@@ -90,6 +126,6 @@ class SimilarSecuritiesTransformer(Transformer):
         try:
             if output_format == OutputFormat.LIST:
                 return cls.data_transformation(data)
-            return data
+            return Transformer.to_text(data)
         except (APIClientExceptions.JSONDecodeError, APIClientExceptions.TransformerException) as e:
             raise APIClientExceptions.TransformerException(str(e))
@@ -5,7 +5,16 @@ Copyright 2023 Dominic Kneup.
 Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
 """
 import json
-from typing import List, Dict, Any
+from typing import Callable, Dict, Any, Tuple
+from client.json_loader import JsonInput, loads
+
+Flattener = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+# Value types copied unchanged by the flatteners
+SCALAR_TYPES = frozenset((str, int, float, bool))
+
+# Upper bound of cached flatteners (the cache is cleared when reached)
+MAX_FLATTENERS = 256
 
 
 class Transformer:
@@ -13,34 +22,54 @@ class Transformer:
     Class for transforming JSON data.
     """
     @staticmethod
-    def json_to_list(response: str) -> List[Any]:
+    def json_to_list(response: JsonInput) -> Any:
         """
         Converts a JSON string into a list.
 
         Args:
-            response (str): The JSON string to convert.
+            response (JsonInput): The JSON string or bytes to convert.
 
         Returns:
-            List[Any]: The converted list.
+            Any: The decoded JSON (a dict for API responses).
 
         Raises:
             ValueError: If the input is not a valid JSON string.
         """
         try:
-            return json.loads(response)
+            return loads(response)
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON: {e}") from e
 
     @staticmethod
-    def flatten_dict(data: Dict[str, Any]) -> Dict[str, Any]:
+    def to_text(response: JsonInput) -> str:
+        """
+        Returns the raw JSON as text (bytes are decoded as UTF-8).
+
+        Args:
+            response (JsonInput): The raw JSON string or bytes.
+
+        Returns:
+            str: The JSON text.
+        """
+        if isinstance(response, str):
+            return response
+        return bytes(response).decode('utf-8')
+
+    @staticmethod
+    def flatten_dict(data: Dict[str, Any], tolerant: bool = False) -> Dict[str, Any]:
         """
         Flattens a multi-dimensional dictionary into a 1-dimensional one.
 
         Args:
             data (Dict[str, Any]): The dictionary to flatten.
+            tolerant (bool): Keep lists and None values as they are and skip values of
+            unknown shape instead of raising.
 
         Returns:
             Dict[str, Any]: The flattened dictionary.
+
+        Raises:
+            ValueError: If a value has an unsupported shape (strict mode only).
         """
         converted = {}
         for key, value in data.items():
@@ -49,8 +78,113 @@ class Transformer:
             elif isinstance(value, (str, int, float)):
                 converted[key] = value
             elif isinstance(value, list):
-                # Convert list to a string representation
-                converted[key] = ','.join(map(str, value))
+                # Convert list to a string representation (kept as list in tolerant mode)
+                converted[key] = value if tolerant else ','.join(map(str, value))
+            elif tolerant:
+                if value is None:
+                    converted[key] = None
             else:
                 raise ValueError(f"Unsupported value type: {type(value)}")
         return converted
+
+    @staticmethod
+    def flatten(data: Dict[str, Any], tolerant: bool = False) -> Dict[str, Any]:
+        """
+        Flattens a dictionary like flatten_dict, using a flattener generated for the keys
+        of the dictionary. Flatteners are generated once per key set and cached, so records
+        of the same schema (e.g. all quotes of a bulk response) skip the per-value dispatch.
+        Records whose values do not match the cached schema use flatten_dict.
+
+        Args:
+            data (Dict[str, Any]): The dictionary to flatten.
+            tolerant (bool): See flatten_dict.
+
+        Returns:
+            Dict[str, Any]: The flattened dictionary.
+
+        Raises:
+            ValueError: If a value has an unsupported shape (strict mode only).
+        """
+        schema = (tuple(data), tolerant)
+        flattener = _flatteners.get(schema)
+        if flattener is None:
+            flattener = Transformer.compile_flattener(data, tolerant)
+            if len(_flatteners) >= MAX_FLATTENERS:
+                _flatteners.clear()
+            _flatteners[schema] = flattener
+        try:
+            return flattener(data)
+        except (KeyError, TypeError):
+            # A value of another shape than in the cached schema
+            return Transformer.flatten_dict(data, tolerant)
+
+    @staticmethod
+    def compile_flattener(sample: Dict[str, Any], tolerant: bool = False) -> Flattener:
+        """
+        Generates a flattener for the schema of a sample record. Every value is checked
+        against the shape seen in the sample; a mismatch raises TypeError (or KeyError for
+        a nested dict without 'raw'). Values skipped in tolerant mode are checked as well,
+        so a later record with a value of a known shape at that key is not dropped.
+
+        Args:
+            sample (Dict[str, Any]): A record of the schema.
+            tolerant (bool): See flatten_dict.
+
+        Returns:
+            Flattener: The flattener.
+        """
+        entries = []
+        skipped = []
+        for key, value in sample.items():
+            item = f'data[{key!r}]'
+            if isinstance(value, dict):
+                entries.append(f"{key!r}: {item}['raw']")
+            elif isinstance(value, list):
+                converted = 'value' if tolerant else "','.join(map(str, value))"
+                entries.append(f'{key!r}: {converted} if type(value := {item}) is list '
+                               f'else _mismatch()')
+            elif tolerant and value is None:
+                entries.append(f'{key!r}: None if {item} is None else _mismatch()')
+            elif type(value) in SCALAR_TYPES:
+                entries.append(f'{key!r}: value if type(value := {item}) in SCALAR_TYPES '
+                               f'else _mismatch()')
+            elif not tolerant:
+                # Strict mode rejects the record in flatten_dict
+                entries.append(f'{key!r}: _mismatch()')
+            else:
+                skipped.append(f'    if _is_kept({item}):\n        _mismatch()\n')
+
+        source = ('def flattener(data):\n' + ''.join(skipped)
+                  + '    return {' + ', '.join(entries) + '}\n')
+        namespace: Dict[str, Any] = {'SCALAR_TYPES': SCALAR_TYPES, '_mismatch': _mismatch,
+                                     '_is_kept': _is_kept}
+        exec(compile(source, '<flattener>', 'exec'), namespace)  # pylint: disable=exec-used
+        return namespace['flattener']
+
+
+def _mismatch() -> Any:
+    """
+    Signals a value that does not match the schema of a generated flattener.
+
+    Raises:
+        TypeError: Always.
+    """
+    raise TypeError('Value does not match the flattener schema')
+
+
+def _is_kept(value: Any) -> bool:
+    """
+    Checks if tolerant flatten_dict keeps a value.
+
+    Args:
+        value (Any): The value.
+
+    Returns:
+        bool: True for nested dicts with 'raw', scalars, lists and None.
+    """
+    return (isinstance(value, dict) and 'raw' in value) or value is None \
+        or isinstance(value, (str, int, float, list))
+
+
+# Generated flatteners keyed by (keys, tolerant)
+_flatteners: Dict[Tuple[Tuple[str, ...], bool], Flattener] = {}
@@ -4,7 +4,36 @@ Module: HistoricDataValidator
 Copyright 2023 Dominic Kneup.
 Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
 """
-from client.exceptions.APIClientExceptions import ValidatorException
+from typing import Any, List, Optional, Sequence
+from client.api.batch import BatchItem, validate_batch
+from client.api.validators.validation_plan import ValidationPlan, Rule, cached_plan, truthy
+
+
+def _compile_plan(required_properties: List[str],
+                  indicator_properties: dict[str, list[str]]) -> ValidationPlan:
+    """
+    Compiles the validation plan for chart responses.
+
+    Args:
+        required_properties (List[str]): Required properties of the 'meta' section.
+        indicator_properties (dict[str, list[str]]): Required indicators and their sub-properties.
+
+    Returns:
+        ValidationPlan: The compiled plan.
+    """
+    rules = [Rule(('meta',), data_property, truthy, f'Missing {data_property} property')
+             for data_property in required_properties]
+    for data_property, sub_properties in indicator_properties.items():
+        rules.append(Rule(('indicators',), data_property, truthy,
+                          f'Missing {data_property} property'))
+        rules.extend(Rule(('indicators', data_property, 0), sub_data_property, truthy,
+                          f'Invalid sub-properties for {sub_data_property}')
+                     for sub_data_property in sub_properties)
+    return ValidationPlan(
+        root=(('chart', 'Missing chart property'), ('result', 'Missing result property')),
+        empty_message='Missing result property',
+        rules=rules
+    )
 
 
 class HistoricDataValidator:
@@ -26,10 +55,21 @@ class HistoricDataValidator:
         'adjclose': ['adjclose']
     }
 
+    @classmethod
+    def plan(cls) -> ValidationPlan:
+        """
+        Get the validation plan compiled from the properties above (see cached_plan).
+
+        Returns:
+            ValidationPlan: The compiled plan.
+        """
+        return cached_plan(cls, _compile_plan, cls.required_properties, cls.indicator_properties)
+
     @classmethod
     def validate_results(cls, data: dict) -> None:
         """
-        Validates that all required properties and indicator sub-properties exist in the given data.
+        Validates that all required properties and indicator sub-properties exist in every
+        result entry of the given data.
 
         Args:
             data (dict): The data to validate.
@@ -37,18 +77,25 @@ class HistoricDataValidator:
         Raises:
             ValidatorException: If any required property or sub-property is missing.
         """
-        for data_property in cls.required_properties:
-            if not data['chart']['result'][0]['meta'].get(data_property):
-                raise ValidatorException('Missing ' + data_property + ' property')
-
-            for data_property, sub_properties in cls.indicator_properties.items():
-                if not data['chart']['result'][0]['indicators'].get(data_property):
-                    raise ValidatorException('Missing ' + data_property + ' property')
-
-                if isinstance(sub_properties, list):
-                    for sub_data_property in sub_properties:
-                        if not (data['chart']['result'][0]['indicators'][data_property][0]
-                                .get(sub_data_property)):
-                            raise ValidatorException(
-                                'Invalid sub-properties for ' + sub_data_property
-                            )
+        cls.plan().validate(data)
+
+    @classmethod
+    def collect_errors(cls, data: dict) -> List[str]:
+        """
+        Collects all validation errors of the given data without raising.
+
+        Args:
+            data (dict): The data to validate.
+
+        Returns:
+            List[str]: All error messages (empty if the data is valid).
+        """
+        return cls.plan().collect(data)
+
+    @classmethod
+    def validate_batch(cls, payloads: Sequence[Any],
+                       workers: Optional[int] = None) -> List[BatchItem]:
+        """
+        Validates many responses in one pass (see batch.validate_batch).
+        """
+        return validate_batch(cls, payloads, workers)
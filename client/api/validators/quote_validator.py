@@ -4,7 +4,35 @@ Module: QuoteValidator
 Copyright 2023 Dominic Kneup.
 Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
 """
-from client.exceptions.APIClientExceptions import ValidatorException
+from typing import Any, List, Optional, Sequence
+from client.api.batch import BatchItem, validate_batch
+from client.api.validators.validation_plan import (
+    ValidationPlan, Rule, cached_plan, present, has_keys
+)
+
+
+def _compile_plan(required_properties: List[str],
+                  multi_dimensional_properties: List[str]) -> ValidationPlan:
+    """
+    Compiles the validation plan for quote responses.
+
+    Args:
+        required_properties (List[str]): Required properties of every quote.
+        multi_dimensional_properties (List[str]): Required properties with "raw" and "fmt" values.
+
+    Returns:
+        ValidationPlan: The compiled plan.
+    """
+    return ValidationPlan(
+        root=(('quoteResponse', 'Missing quoteResponse property'),
+              ('result', 'Missing quoteResponse property')),
+        empty_message='Missing quoteResponse property',
+        rules=[Rule((), data_property, present, f'Missing {data_property} property')
+               for data_property in required_properties]
+        + [Rule((), data_property, has_keys('raw', 'fmt'),
+                f'Invalid sub-properties for {data_property}')
+           for data_property in multi_dimensional_properties]
+    )
 
 
 class QuoteValidator:
@@ -41,11 +69,22 @@ class QuoteValidator:
         'regularMarketDayLow',
     ]
 
-    @staticmethod
-    def validate_results(data) -> None:
+    @classmethod
+    def plan(cls) -> ValidationPlan:
+        """
+        Get the validation plan compiled from the properties above (see cached_plan).
+
+        Returns:
+            ValidationPlan: The compiled plan.
+        """
+        return cached_plan(cls, _compile_plan, cls.required_properties,
+                           cls.multi_dimensional_properties)
+
+    @classmethod
+    def validate_results(cls, data) -> None:
         """
         Validates that all required properties and multi-dimensional properties exist
-        in the given data.
+        in every quote of the given data.
 
         Args:
             data (dict): The data to validate.
@@ -54,20 +93,25 @@ class QuoteValidator:
             ValidatorException: If any required property or multi-dimensional property
             is missing or invalid.
         """
-        if 'quoteResponse' not in data or 'result' not in data['quoteResponse'] or \
-                not data['quoteResponse']['result']:
-            raise ValidatorException('Missing quoteResponse property')
-
-        quote = data['quoteResponse']['result'][0]
-
-        # Check each required property in the quote data
-        for data_property in QuoteValidator.required_properties:
-            if data_property not in quote:
-                raise ValidatorException(f'Missing {data_property} property')
-
-        # Check each multi-dimensional property and ensure 'raw' and 'fmt' keys are present
-        for data_property in QuoteValidator.multi_dimensional_properties:
-            if data_property not in quote or \
-                    'raw' not in quote[data_property] or \
-                    'fmt' not in quote[data_property]:
-                raise ValidatorException(f'Invalid sub-properties for {data_property}')
+        cls.plan().validate(data)
+
+    @classmethod
+    def collect_errors(cls, data) -> List[str]:
+        """
+        Collects all validation errors of the given data without raising.
+
+        Args:
+            data (dict): The data to validate.
+
+        Returns:
+            List[str]: All error messages (empty if the data is valid).
+        """
+        return cls.plan().collect(data)
+
+    @classmethod
+    def validate_batch(cls, payloads: Sequence[Any],
+                       workers: Optional[int] = None) -> List[BatchItem]:
+        """
+        Validates many responses in one pass (see batch.validate_batch).
+        """
+        return validate_batch(cls, payloads, workers)
@@ -4,8 +4,36 @@ Module: SimilarSecuritiesValidator
 Copyright 2023 Dominic Kneup.
 Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
 """
-from typing import Dict, List
-from client.exceptions.APIClientExceptions import ValidatorException
+from typing import Any, Dict, List, Optional, Sequence
+from client.api.batch import BatchItem, validate_batch
+from client.api.validators.validation_plan import (
+    ValidationPlan, Rule, cached_plan, present, is_list_if_present, items_have
+)
+
+
+def _compile_plan(required_properties: List[str],
+                  indicator_properties: Dict[str, List[str]]) -> ValidationPlan:
+    """
+    Compiles the validation plan for similar securities responses.
+
+    Args:
+        required_properties (List[str]): Required properties of every result.
+        indicator_properties (Dict[str, List[str]]): Required sub-properties of the
+            recommendedSymbols items.
+
+    Returns:
+        ValidationPlan: The compiled plan.
+    """
+    return ValidationPlan(
+        root=(('finance', "Invalid similar securities data. Missing 'finance' field."),
+              ('result', "Invalid similar securities data. Missing 'result' field in 'finance'.")),
+        empty_message="Invalid similar securities data. 'result' field is empty.",
+        rules=[Rule((), prop, present, f'Missing {prop} property') for prop in required_properties]
+        + [Rule((), 'recommendedSymbols', is_list_if_present, 'Invalid recommendedSymbols format')]
+        + [Rule((), 'recommendedSymbols', items_have(sub_prop),
+                f'Invalid sub-properties for {sub_prop}')
+           for sub_prop in indicator_properties['recommendedSymbols']]
+    )
 
 
 class SimilarSecuritiesValidator:
@@ -33,10 +61,21 @@ class SimilarSecuritiesValidator:
         ]
     }
 
+    @classmethod
+    def plan(cls) -> ValidationPlan:
+        """
+        Get the validation plan compiled from the properties above (see cached_plan).
+
+        Returns:
+            ValidationPlan: The compiled plan.
+        """
+        return cached_plan(cls, _compile_plan, cls.required_properties, cls.indicator_properties)
+
     @classmethod
     def validate_results(cls, data) -> None:
         """
-        Validates that all required properties and indicator sub-properties exist in the given data.
+        Validates that all required properties and indicator sub-properties exist in every
+        result entry of the given data.
 
         Args:
             data (dict): The data to validate.
@@ -44,29 +83,25 @@ class SimilarSecuritiesValidator:
         Raises:
             ValidatorException: If any required property or sub-property is missing or invalid.
         """
-        if 'finance' not in data:
-            raise ValidatorException("Invalid similar securities data. Missing 'finance' field.")
-        if 'result' not in data['finance']:
-            raise ValidatorException(
-                "Invalid similar securities data. Missing 'result' field in 'finance'."
-            )
-        if not data['finance']['result']:
-            raise ValidatorException("Invalid similar securities data. 'result' field is empty.")
-
-        # Check each required property in the similar securities data
-        for prop in cls.required_properties:
-            if prop not in data['finance']['result'][0]:
-                raise ValidatorException(f'Missing {prop} property')
-
-        # Check the 'recommendedSymbols' property
-        recommended_symbols = data['finance']['result'][0]['recommendedSymbols']
-
-        # Ensure 'recommendedSymbols' is a list
-        if not isinstance(recommended_symbols, list):
-            raise ValidatorException('Invalid recommendedSymbols format')
-
-        # Check each sub-property within 'recommendedSymbols'
-        for recommended_symbol in recommended_symbols:
-            for sub_prop in cls.indicator_properties['recommendedSymbols']:
-                if sub_prop not in recommended_symbol:
-                    raise ValidatorException(f'Invalid sub-properties for {sub_prop}')
+        cls.plan().validate(data)
+
+    @classmethod
+    def collect_errors(cls, data) -> List[str]:
+        """
+        Collects all validation errors of the given data without raising.
+
+        Args:
+            data (dict): The data to validate.
+
+        Returns:
+            List[str]: All error messages (empty if the data is valid).
+        """
+        return cls.plan().collect(data)
+
+    @classmethod
+    def validate_batch(cls, payloads: Sequence[Any],
+                       workers: Optional[int] = None) -> List[BatchItem]:
+        """
+        Validates many responses in one pass (see batch.validate_batch).
+        """
+        return validate_batch(cls, payloads, workers)
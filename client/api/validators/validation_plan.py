@@ -0,0 +1,238 @@
+"""
+Module: ValidationPlan
+
+Copyright 2023 Dominic Kneup.
+Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+"""
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+from client.exceptions.APIClientExceptions import ValidatorException
+
+# Marker for values that are not present in the response
+MISSING: Any = object()
+
+Path = Tuple[Union[str, int], ...]
+Predicate = Callable[[Any], bool]
+
+
+class Rule(NamedTuple):
+    """
+    A single check of a validation plan.
+
+    Attributes:
+        path (Path): Path of the container, relative to one result entry.
+        key (str): The key to look up in the container.
+        predicate (Predicate): Called with the value (or MISSING); must return True if valid.
+        message (str): Error message if the predicate fails.
+    """
+    path: Path
+    key: str
+    predicate: Predicate
+    message: str
+
+
+def present(value: Any) -> bool:
+    """
+    The key exists (its value may be falsy).
+    """
+    return value is not MISSING
+
+
+def truthy(value: Any) -> bool:
+    """
+    The key exists and its value is not empty / zero.
+    """
+    return value is not MISSING and bool(value)
+
+
+def has_keys(*keys: str) -> Predicate:
+    """
+    The value is a dictionary containing all given keys.
+    """
+    return lambda value: isinstance(value, dict) and all(key in value for key in keys)
+
+
+def is_list_if_present(value: Any) -> bool:
+    """
+    The value is a list (missing values are reported by another rule).
+    """
+    return value is MISSING or isinstance(value, list)
+
+
+def items_have(key: str) -> Predicate:
+    """
+    Every item of a list value is a dictionary containing the key (non-lists are skipped).
+    """
+    return lambda value: not isinstance(value, list) or \
+        all(isinstance(item, dict) and key in item for item in value)
+
+
+class ValidationPlan:
+    """
+    Compiled set of rules for one response type.
+
+    Rules are grouped by container path at compile time, so every path is resolved once per
+    result entry and every rule runs exactly once. All entries of multi-result responses are
+    validated and all errors are collected in one pass.
+
+    Attributes:
+        root (Tuple[Tuple[str, str], ...]): Keys leading to the result list with the error message
+        used if the key is missing.
+        empty_message (str): Error message if the result list is empty.
+    """
+    def __init__(self, root: Sequence[Tuple[str, str]], empty_message: str, rules: Sequence[Rule]):
+        self.root = tuple(root)
+        self.empty_message = empty_message
+
+        groups: Dict[Path, List[Tuple[str, Predicate, str]]] = {}
+        for rule in rules:
+            groups.setdefault(tuple(rule.path), []).append((rule.key, rule.predicate, rule.message))
+        self._groups = tuple(
+            (path, self._missing_message(path), tuple(checks)) for path, checks in groups.items()
+        )
+
+    def entries(self, data: Any) -> Tuple[Optional[List[Any]], Optional[str]]:
+        """
+        Resolves the result list of a response.
+
+        Args:
+            data (Any): The decoded response.
+
+        Returns:
+            Tuple[Optional[List[Any]], Optional[str]]: The result entries or an error message.
+        """
+        node = data
+        for key, message in self.root:
+            if not isinstance(node, dict) or key not in node:
+                return None, message
+            node = node[key]
+        if not node or not isinstance(node, list):
+            return None, self.empty_message
+        return node, None
+
+    def collect(self, data: Any) -> List[str]:
+        """
+        Runs all rules against every result entry and collects the error messages.
+
+        Args:
+            data (Any): The decoded response.
+
+        Returns:
+            List[str]: Error messages in rule order, without duplicates (empty if valid).
+        """
+        entries, error = self.entries(data)
+        if entries is None:
+            return [error] if error else []
+
+        errors: Dict[str, None] = {}
+        for index, entry in enumerate(entries):
+            self._collect_entry(entry, f' (result {index})' if index else '', errors)
+        return list(errors)
+
+    def entry_errors(self, entry: Any) -> List[str]:
+        """
+        Runs all rules against one result entry (e.g. one quote of a multi-symbol response).
+
+        Args:
+            entry (Any): The result entry.
+
+        Returns:
+            List[str]: Error messages in rule order (empty if valid).
+        """
+        errors: Dict[str, None] = {}
+        self._collect_entry(entry, '', errors)
+        return list(errors)
+
+    def _collect_entry(self, entry: Any, suffix: str, errors: Dict[str, None]) -> None:
+        """
+        Runs all rules against one result entry.
+
+        Args:
+            entry (Any): The result entry.
+            suffix (str): Appended to the messages (identifies the entry).
+            errors (Dict[str, None]): Receives the error messages in rule order.
+        """
+        for path, missing_message, checks in self._groups:
+            container = self._resolve(entry, path)
+            if container is MISSING:
+                errors.setdefault(missing_message + suffix)
+                continue
+            for key, predicate, message in checks:
+                value = container.get(key, MISSING) if isinstance(container, dict) else MISSING
+                if not predicate(value):
+                    errors.setdefault(message + suffix)
+
+    def validate(self, data: Any) -> None:
+        """
+        Validates a response.
+
+        Args:
+            data (Any): The decoded response.
+
+        Raises:
+            ValidatorException: With the first error as message and all errors in `errors`.
+        """
+        errors = self.collect(data)
+        if errors:
+            raise ValidatorException(errors[0], errors)
+
+    @staticmethod
+    def _resolve(entry: Any, path: Path) -> Any:
+        """
+        Follows a container path inside one result entry.
+
+        Args:
+            entry (Any): The result entry.
+            path (Path): Keys and list indices to follow.
+
+        Returns:
+            Any: The container or MISSING.
+        """
+        node = entry
+        for segment in path:
+            if isinstance(segment, int):
+                if not isinstance(node, list) or len(node) <= segment:
+                    return MISSING
+            elif not isinstance(node, dict) or segment not in node:
+                return MISSING
+            node = node[segment]
+        return node
+
+    @staticmethod
+    def _missing_message(path: Path) -> str:
+        """
+        Error message used if a container path cannot be resolved.
+
+        Args:
+            path (Path): The container path.
+
+        Returns:
+            str: "Missing <last named segment> property".
+        """
+        names = [segment for segment in path if isinstance(segment, str)]
+        return f'Missing {names[-1]} property' if names else 'Missing result property'
+
+
+# Plans per validator class with the properties they were compiled from
+_plans: Dict[type, Tuple[str, ValidationPlan]] = {}
+
+
+def cached_plan(owner: type, compile_plan: Callable[..., ValidationPlan],
+                *properties: Any) -> ValidationPlan:
+    """
+    Get the plan of a validator class, compiled on first use and again after the properties
+    it was compiled from changed. Every class is keyed on its own, so subclasses overriding
+    the properties get their own plan.
+
+    Args:
+        owner (type): The validator class.
+        compile_plan (Callable[..., ValidationPlan]): Compiles the plan from the properties.
+        *properties (Any): The properties of the class the plan is compiled from.
+
+    Returns:
+        ValidationPlan: The compiled plan.
+    """
+    key = repr(properties)
+    cached = _plans.get(owner)
+    if cached is None or cached[0] != key:
+        cached = _plans[owner] = (key, compile_plan(*properties))
+    return cached[1]
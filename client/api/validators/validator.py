@@ -8,7 +8,12 @@ import re
 import json
 import os
 import datetime
-from client.exceptions.APIClientExceptions import ValidatorException
+from typing import Any, Mapping, Optional, Sequence
+from client.exceptions.APIClientExceptions import (
+    ValidatorException, UpstreamError, RateLimited, CrumbExpired, NotFound, InvalidSymbol,
+    UpstreamUnavailable
+)
+from client.json_loader import loads
 
 
 class Validator:
@@ -17,13 +22,23 @@ class Validator:
 
     Attributes:
         valid_intervals (list[str]): Valid intervals for chart/time series data.
+        valid_ranges (list[str]): Valid ranges for chart/time series data.
+        valid_events (list[str]): Valid events for chart/time series data.
     """
 
-    # Valid intervals for chart/time series data
+    # Valid intervals (bar sizes) for chart/time series data
     valid_intervals: list[str] = [
-        "1d", "5d", "1wk", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd", "max"
+        "1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h", "1d", "5d", "1wk", "1mo", "3mo"
     ]
 
+    # Valid ranges (periods ending today) for chart/time series data
+    valid_ranges: list[str] = [
+        "1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd", "max"
+    ]
+
+    # Valid events for chart/time series data
+    valid_events: list[str] = ["div", "splits", "capitalGains"]
+
     @staticmethod
     def valid_url(url: str) -> bool:
         """
@@ -54,6 +69,36 @@ class Validator:
             return True
         raise ValidatorException("Invalid Interval")
 
+    @staticmethod
+    def check_range(data_range: str) -> bool:
+        """
+        Checks if the given range is valid.
+
+        Args:
+            data_range (str): Range to check.
+
+        Returns:
+            bool: True if valid range, raises ValidatorException if not.
+        """
+        if data_range and data_range in Validator.valid_ranges:
+            return True
+        raise ValidatorException("Invalid Range")
+
+    @staticmethod
+    def check_events(events: Sequence[str]) -> bool:
+        """
+        Checks if all given events are valid.
+
+        Args:
+            events (Sequence[str]): Events to check.
+
+        Returns:
+            bool: True if all events are valid, raises ValidatorException if not.
+        """
+        if events and all(event in Validator.valid_events for event in events):
+            return True
+        raise ValidatorException("Invalid Events")
+
     @staticmethod
     def validate_dates(start_date: datetime.datetime, end_date: datetime.datetime) -> bool:
         """
@@ -110,33 +155,114 @@ class Validator:
         return True
 
     @staticmethod
-    def check_response_error(data: str) -> None:
+    def check_response_error(data: Any) -> None:
         """
         Checks if the API response contains an error message.
 
         Args:
-            data (str): The raw API response.
+            data (Any): The raw API response (str or bytes) or the decoded response.
 
         Raises:
-            ValidatorException: If the API response contains an error message.
+            InvalidSymbol: If the API reports an unknown symbol or returns no result.
+            ValidatorException: If the API response contains another error message.
         """
         ex_message = "API response contains error. Maybe your parameters are invalid"
-        response_data = json.loads(data)
+        is_text = isinstance(data, (str, bytes, bytearray, memoryview))
+        response_data = loads(data) if is_text else data
+        if not isinstance(response_data, dict):
+            return
 
         # Check for errors in 'chart' section
         if "chart" in response_data and "error" in response_data["chart"]:
             chart_error = response_data["chart"]["error"]
             if chart_error is not None:
+                if Validator._is_not_found(chart_error):
+                    raise InvalidSymbol(ex_message)
                 raise ValidatorException(ex_message)
 
         # Check for empty 'result' in 'quoteResponse' section
         if "quoteResponse" in response_data and "result" in response_data["quoteResponse"]:
             result = response_data["quoteResponse"]["result"]
             if not result:
-                raise ValidatorException(ex_message)
+                raise InvalidSymbol(ex_message)
 
         # Check for empty 'result' in 'finance' section
         if "finance" in response_data and "result" in response_data["finance"]:
             result = response_data["finance"]["result"]
             if not result:
-                raise ValidatorException(ex_message)
+                raise InvalidSymbol(ex_message)
+
+    @staticmethod
+    def check_status(status_code: int, body: bytes,
+                     headers: Optional[Mapping[str, str]] = None) -> None:
+        """
+        Classifies an error response by status code and body.
+
+        Args:
+            status_code (int): The HTTP status code.
+            body (bytes): The raw response body.
+            headers (Optional[Mapping[str, str]]): The response headers.
+
+        Raises:
+            RateLimited: HTTP 429.
+            CrumbExpired: HTTP 401, or 403 mentioning the crumb / cookie.
+            InvalidSymbol: HTTP 404 with a "Not Found" chart / finance error.
+            NotFound: Other HTTP 404.
+            UpstreamUnavailable: HTTP 5xx.
+            UpstreamError: Any other status code >= 400.
+        """
+        if status_code < 400:
+            return
+
+        message = f"API responded with status {status_code}"
+        if status_code == 429:
+            retry_after = (headers or {}).get('Retry-After')
+            raise RateLimited(message, status_code,
+                              float(retry_after) if retry_after and retry_after.isdigit() else None)
+        if status_code >= 500:
+            raise UpstreamUnavailable(message, status_code)
+
+        lowered = body[:512].lower()
+        if status_code == 401 or \
+                (status_code == 403 and (b'crumb' in lowered or b'cookie' in lowered)):
+            raise CrumbExpired(message, status_code)
+        if status_code == 404:
+            if Validator._is_not_found(Validator._error_section(body)):
+                raise InvalidSymbol(message, status_code)
+            raise NotFound(message, status_code)
+        raise UpstreamError(message, status_code)
+
+    @staticmethod
+    def _error_section(body: bytes) -> Any:
+        """
+        Extracts the 'error' entry of a chart / quote / finance error body.
+
+        Args:
+            body (bytes): The raw response body.
+
+        Returns:
+            Any: The error entry or None if the body is not such a JSON document.
+        """
+        try:
+            response_data = loads(body)
+        except ValueError:
+            return None
+        if not isinstance(response_data, dict):
+            return None
+        for section in response_data.values():
+            if isinstance(section, dict) and section.get('error'):
+                return section['error']
+        return None
+
+    @staticmethod
+    def _is_not_found(error: Any) -> bool:
+        """
+        Checks if an api error entry reports an unknown symbol.
+
+        Args:
+            error (Any): The 'error' entry of a response.
+
+        Returns:
+            bool: True for "Not Found" errors.
+        """
+        return isinstance(error, dict) and error.get('code') == 'Not Found'
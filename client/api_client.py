@@ -4,87 +4,296 @@ Module: ApiClient
 Copyright 2023 Dominic Kneup.
 Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
 """
-import os
-import json
-import random
-from typing import Dict, Optional, Any
+import time
+from typing import Callable, Dict, Optional, Any, Tuple
 import logging
 import requests
 from client.api.validators.validator import Validator
-from client.exceptions.APIClientExceptions import BaseAPIClientException, APIClientException
+from client import request_log
+from client.response_cache import CachedResponse, ResponseCache, TransferMetrics
+from client.circuit_breaker import CircuitBreakerRegistry, shared_registry
+from client.identity_pool import Identity, IdentityPool
+from client.user_agents import random_user_agent
+from client.symbol_registry import SymbolRegistry
+from client.api import config
+from client.api.config import Settings
+from client.exceptions.APIClientExceptions import (
+    ValidatorException, UpstreamError, UpstreamUnavailable, InvalidSymbol, RateLimited,
+    CrumbExpired
+)
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 class ApiClient:
     """
     Class APIClient
+    Attributes:
+        session_factory (Callable): Creates the HTTP session of new clients
+        (replaced e.g. by Cassette.install for recording / replaying).
+        endpoint_name (str): Name of the circuit breaker guarding the requests of this client
+        timeout (float): Request timeout in seconds
+        circuit_breakers (CircuitBreakerRegistry): Circuit breakers of the endpoints (shared by
+        all clients with the same circuit settings unless a registry is passed to the constructor)
+        settings (Settings): Endpoint and client settings of this client
+        symbol_registry (Optional[SymbolRegistry]): Index of known-valid / known-invalid symbols
+        (None disables skipping and start date clamping)
+        identity_pool (Optional[IdentityPool]): Identities (session, proxy, user agent, crumb)
+        the requests are spread across (None sends all requests with the client's session)
     """
+    session_factory: Callable[[], Any] = requests.Session
+    endpoint_name: str = 'default'
 
-    def __init__(self):
+    def __init__(self, settings: Optional[Settings] = None,
+                 circuit_breakers: Optional[CircuitBreakerRegistry] = None):
         """
         Setup API client
+        @param settings: Settings of this client (defaults to the module settings at call time)
+        @param circuit_breakers: Circuit breakers of this client (defaults to the registry shared
+        by the clients with the same circuit settings, see circuit_breaker.shared_registry)
         """
-        self.session = requests.Session()
+        self.settings: Settings = settings if settings is not None else config.settings
+        self.session = type(self).session_factory()
+        self.response_cache: Optional[ResponseCache] = ResponseCache()
+        self.timeout: float = self.settings.request_timeout
+        self.circuit_breakers: CircuitBreakerRegistry = (
+            circuit_breakers if circuit_breakers is not None else shared_registry(self.settings))
+        self.symbol_registry: Optional[SymbolRegistry] = None
+        self.identity_pool: Optional[IdentityPool] = None
 
     def request_api(self, url: str, params: Optional[Any] = None,
-                    headers: Optional[Dict[str, str]] = None) -> str:
+                    headers: Optional[Dict[str, str]] = None, check_status: bool = True,
+                    endpoint: Optional[str] = None) -> str:
         """
         Send GET request with URL to endpoint and return answer
         @param url: The URL for the API request.
         @param params: The parameters for the API request.
         @param headers: The headers for the API request (can be specified manually)
+        @param check_status: Raise a classified UpstreamError for error status codes
+        @param endpoint: Circuit breaker name (defaults to endpoint_name)
         @return: The response from the API as a string.
         """
-        if Validator.valid_url(url):
-            try:
-                if headers is None:
-                    headers = {
-                        'User-Agent': self.get_random_user_agent()
-                    }
-                response = self.session.get(
-                    url,
-                    headers=headers,
-                    params=params
-                )
-
-                return response.text
-
-            except requests.exceptions.RequestException as e:
-                logger.error('An error occurred: %s', str(e))
-                return response.text if response else None
-        else:
-            return "An error occurred"
+        content, encoding = self._send(url, params, headers, check_status, endpoint)
+        return content.decode(encoding, errors='replace')
 
-    @staticmethod
-    def get_random_user_agent() -> str:
+    def request_api_bytes(self, url: str, params: Optional[Any] = None,
+                          headers: Optional[Dict[str, str]] = None,
+                          check_status: bool = True, endpoint: Optional[str] = None) -> bytes:
         """
-        Get a random User Agent from useragents.json file
-        @return: Returns a random User Agent string
+        Send GET request with URL to endpoint and return the undecoded body
+        (JSON parsers accept bytes, so no str copy of the body is built)
+        @param url: The URL for the API request.
+        @param params: The parameters for the API request.
+        @param headers: The headers for the API request (can be specified manually)
+        @param check_status: Raise a classified UpstreamError for error status codes
+        @param endpoint: Circuit breaker name (defaults to endpoint_name)
+        @return: The response body as bytes.
+        """
+        return self._send(url, params, headers, check_status, endpoint)[0]
+
+    def _send(self, url: str, params: Optional[Any] = None,
+              headers: Optional[Dict[str, str]] = None,
+              check_status: bool = True, endpoint: Optional[str] = None) -> Tuple[bytes, str]:
+        """
+        Send GET request through the endpoint's circuit breaker
+        @param url: The URL for the API request.
+        @param params: The parameters for the API request.
+        @param headers: The headers for the API request (can be specified manually)
+        @param check_status: Raise a classified UpstreamError for error status codes
+        @param endpoint: Circuit breaker name (defaults to endpoint_name)
+        @return: The response body and its character encoding.
+        @raise ValidatorException: If the URL is invalid
+        @raise CircuitOpen: If the circuit breaker is open (no request is sent)
+        @raise UpstreamError: If the API answers with an error status (see Validator.check_status)
+        @raise UpstreamUnavailable: If the request fails (connection error, timeout)
+        """
+        if not Validator.valid_url(url):
+            raise ValidatorException(f'Invalid URL: {url}')
+
+        breaker = self.circuit_breakers.get(endpoint or self.endpoint_name)
+        return breaker.call(self._send_request, url, params, headers, check_status)
+
+    def _send_request(self, url: str, params: Optional[Any] = None,
+                      headers: Optional[Dict[str, str]] = None,
+                      check_status: bool = True) -> Tuple[bytes, str]:
+        """
+        Send GET request, revalidating cached responses. With an identity pool a request
+        answered with HTTP 429 is retried once with another healthy identity.
+        @param url: The URL for the API request.
+        @param params: The parameters for the API request.
+        @param headers: The headers for the API request (can be specified manually)
+        @param check_status: Raise a classified UpstreamError for error status codes
+        @return: The response body and its character encoding.
+        """
+        pool = self.identity_pool
+        if pool is None:
+            return self._send_with(None, url, params, headers, check_status)
+        try:
+            return self._send_with(pool.acquire(), url, params, headers, check_status)
+        except RateLimited:
+            # The identity was quarantined (see _report); give up if no other one is left
+            if not pool.healthy():
+                raise
+            logger.info('Retrying request to %s with another identity', url)
+            return self._send_with(pool.acquire(), url, params, headers, check_status)
+
+    def _send_with(self, identity: Optional[Identity], url: str, params: Optional[Any],
+                   headers: Optional[Dict[str, str]], check_status: bool) -> Tuple[bytes, str]:
+        """
+        Send one GET request, revalidating cached responses
+        @param identity: The identity to send the request with (None uses the client's session)
+        @param url: The URL for the API request.
+        @param params: The parameters for the API request.
+        @param headers: The headers for the API request (can be specified manually)
+        @param check_status: Raise a classified UpstreamError for error status codes
+        @return: The response body and its character encoding.
         """
+        cache = self.response_cache
+        cache_key = ResponseCache.key(url, params)
+        cached = cache.get(cache_key) if cache is not None else None
+        headers = self._request_headers(identity, headers, cached)
+
+        session = self.session
+        started = time.perf_counter()
         try:
-            file_path = os.path.join(os.path.dirname(__file__), 'data/useragents.json')
+            if identity is not None:
+                session = identity.session
+                if isinstance(params, dict) and 'crumb' in params:
+                    # A crumb is only valid with the cookies of the session that fetched it
+                    params = {**params, 'crumb': identity.get_crumb(self.settings, self.timeout)}
+            response = session.get(
+                url,
+                headers=headers,
+                params=params,
+                timeout=self.timeout
+            )
+        except requests.exceptions.RequestException as e:
+            logger.error('Request to %s failed: %s', url, str(e))
+            if request_log.enabled():
+                self._log_request(url, started, identity, error=type(e).__name__)
+            raise UpstreamUnavailable(f'Request failed: {str(e)}') from e
+        except UpstreamError as e:
+            self._report(identity, e)
+            raise
 
-            if not os.path.exists(file_path) or not os.access(file_path, os.R_OK):
-                raise APIClientException('Failed to read useragents.json file')
+        if request_log.enabled():
+            self._log_request(url, started, identity, response=response,
+                              conditional=cached is not None)
 
-            with open(file_path, encoding='utf-8') as file:
-                user_agents_json = file.read()
+        if cache is not None:
+            cache.record_transfer(response, cached is not None)
+            if response.status_code == 304 and cached is not None:
+                cache.record_not_modified(cached)
+                return cached.body, cached.encoding
+            if response.status_code == 200:
+                cache.store(cache_key, response)
 
-            if not user_agents_json:
-                raise APIClientException('Failed to read useragents.json file')
+        if check_status and response.status_code >= 400:
+            try:
+                Validator.check_status(response.status_code, response.content, response.headers)
+            except UpstreamError as e:
+                logger.error('API error for %s: %s', url, str(e))
+                self._report(identity, e)
+                raise
 
-            user_agents = json.loads(user_agents_json)
+        return response.content, response.encoding or 'utf-8'
+
+    def _request_headers(self, identity: Optional[Identity], headers: Optional[Dict[str, str]],
+                         cached: Optional[CachedResponse]) -> Dict[str, str]:
+        """
+        Build the headers of a request: a user agent unless headers are given, the accepted
+        encodings and the revalidation headers of a cached response
+        @param identity: The identity of the request (None uses a random user agent)
+        @param headers: The headers for the API request (can be specified manually)
+        @param cached: The cached response of the request (None if not cached)
+        @return: A new dict with the request headers
+        """
+        if headers is None:
+            headers = {'User-Agent': (identity.user_agent if identity is not None
+                                      else self.get_random_user_agent())}
+        headers = dict(headers)
+        headers.setdefault('Accept-Encoding', requests.utils.DEFAULT_ACCEPT_ENCODING)
+        if cached is not None:
+            headers.update(cached.conditional_headers())
+        return headers
+
+    def _log_request(self, url: str, started: float, identity: Optional[Identity], *,
+                     response: Optional[requests.Response] = None, error: Optional[str] = None,
+                     conditional: bool = False) -> None:
+        """
+        Emit a structured request log (see client.request_log)
+        @param url: The URL of the request (logged without the query string)
+        @param started: perf_counter value before the request was sent
+        @param identity: The identity of the request (None without identity pool)
+        @param response: The response (None if the request failed)
+        @param error: Exception class name of a failed request
+        @param conditional: Whether the request was sent with conditional headers
+        """
+        fields: Dict[str, Any] = {
+            'endpoint': self.endpoint_name,
+            'latency_ms': round((time.perf_counter() - started) * 1000, 3),
+        }
+        if identity is not None:
+            fields['identity'] = identity.name
+        if response is not None:
+            decoded = len(response.content)
+            fields.update(status=response.status_code, bytes=decoded,
+                          wire_bytes=ResponseCache.wire_size(response, decoded),
+                          conditional=conditional)
+        if error is not None:
+            fields['error'] = error
+        request_log.log_request(url, **fields)
+
+    def _report(self, identity: Optional[Identity], error: UpstreamError) -> None:
+        """
+        Quarantine a rate limited identity or discard its expired crumb
+        @param identity: The identity of the request (None without identity pool)
+        @param error: The classified error
+        """
+        if identity is None:
+            return
+        if isinstance(error, RateLimited):
+            logger.warning('Identity %s is rate limited, quarantining it', identity.name)
+            # The pool may have been detached while the request was running
+            if self.identity_pool is not None:
+                self.identity_pool.report_rate_limited(identity, error.retry_after)
+        elif isinstance(error, CrumbExpired):
+            identity.reset_crumb()
 
-            if not isinstance(user_agents, list):
-                raise APIClientException('Failed to decode useragents.json')
+    def _skip_known_invalid(self, symbol: str) -> None:
+        """
+        Fail without a request if the symbol registry knows the symbol is invalid
+        @param symbol: The Security / Stock symbol (or comma-separated symbols)
+        @raise InvalidSymbol: If all symbols are known to be invalid
+        """
+        registry = self.symbol_registry
+        if registry is not None and \
+                all(registry.is_known_invalid(name) for name in symbol.split(',')):
+            raise InvalidSymbol(f'Known invalid symbol: {symbol}')
 
-            if not user_agents:
-                raise APIClientException('No user agents found in useragents.json')
+    def _mark_invalid(self, symbol: str) -> None:
+        """
+        Record an invalid symbol in the symbol registry
+        @param symbol: The Security / Stock symbol (or comma-separated symbols)
+        """
+        if self.symbol_registry is not None:
+            for name in symbol.split(','):
+                self.symbol_registry.mark_invalid(name)
 
-        except Exception as e:
-            raise BaseAPIClientException(f'An error occurred: {str(e)}') from e
+    @property
+    def transfer_metrics(self) -> TransferMetrics:
+        """
+        Byte counters for this client (received, decoded and saved by revalidation)
+        @return: The transfer metrics of the response cache
+        """
+        if self.response_cache is None:
+            return TransferMetrics()
+        return self.response_cache.metrics
 
-        return random.choice(user_agents)
+    @staticmethod
+    def get_random_user_agent() -> str:
+        """
+        Get a random User Agent from useragents.json file
+        @return: Returns a random User Agent string
+        """
+        return random_user_agent()
@@ -0,0 +1,368 @@
+"""
+Module: BarArchive
+
+Copyright 2023 Dominic Kneup.
+Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+"""
+import mmap
+import os
+import re
+import struct
+from datetime import datetime
+from threading import Lock
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+import numpy as np
+from client.exceptions.APIClientExceptions import APIClientException
+
+# Columns of an archive file and their fixed-width, little-endian types
+COLUMNS: Tuple[Tuple[str, np.dtype], ...] = (
+    ('timestamp', np.dtype('<i8')),
+    ('open', np.dtype('<f8')),
+    ('low', np.dtype('<f8')),
+    ('high', np.dtype('<f8')),
+    ('close', np.dtype('<f8')),
+    ('adjclose', np.dtype('<f8')),
+    ('volume', np.dtype('<f8')),
+)
+
+MAGIC = b'YFBARS\x00\x00'
+VERSION = 1
+# magic, version, column count, header size, rows, first timestamp, last timestamp
+HEADER = struct.Struct('<8sHHIQqq')
+# column name, numpy dtype string
+COLUMN = struct.Struct('<16s8s')
+# Column data starts at a multiple of the alignment
+ALIGNMENT = 64
+SUFFIX = '.bars'
+
+Moment = Union[int, datetime, None]
+
+
+def file_name(symbol: str) -> str:
+    """
+    Maps a symbol to its archive file name (reversible, e.g. "^GSPC" to "%5EGSPC.bars").
+
+    Args:
+        symbol (str): The symbol.
+
+    Returns:
+        str: The file name.
+    """
+    escaped = re.sub(r'[^A-Z0-9.\-]', lambda match: f'%{ord(match.group()):02X}', symbol.upper())
+    return escaped + SUFFIX
+
+
+def symbol_name(name: str) -> str:
+    """
+    Maps an archive file name back to its symbol.
+
+    Args:
+        name (str): The file name.
+
+    Returns:
+        str: The symbol.
+    """
+    return re.sub(r'%([0-9A-F]{2})', lambda match: chr(int(match.group(1), 16)),
+                  name[:-len(SUFFIX)])
+
+
+class ArchivedBars:  # pylint: disable=too-many-instance-attributes
+    """
+    The bars of one symbol, memory-mapped read-only. The columns are views on the mapped
+    file, so processes reading the same archive share the page cache and slices copy nothing.
+
+    Attributes:
+        symbol (str): The symbol.
+        path (str): The archive file.
+        rows (int): Number of bars.
+        first (Optional[int]): Timestamp of the first bar.
+        last (Optional[int]): Timestamp of the last bar.
+        columns (Dict[str, np.ndarray]): Read-only column views (see COLUMNS).
+    """
+    def __init__(self, symbol: str, path: str):
+        self.symbol = symbol
+        self.path = path
+        with open(path, 'rb') as file:
+            stat = os.fstat(file.fileno())
+            self.file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            self._map: Optional[mmap.mmap] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.columns = self._read_columns(self._map)
+        except APIClientException:
+            self.close()
+            raise
+
+    def _read_columns(self, mapped: mmap.mmap) -> Dict[str, np.ndarray]:
+        """
+        Parses the header and creates the column views.
+
+        Args:
+            mapped (mmap.mmap): The mapped file.
+
+        Returns:
+            Dict[str, np.ndarray]: The column views.
+
+        Raises:
+            APIClientException: If the file is not an archive file or truncated.
+        """
+        if len(mapped) < HEADER.size:
+            raise APIClientException(f'Invalid bar archive {self.path}: file too short')
+        magic, version, column_count, header_size, rows, first, last = HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC or version != VERSION:
+            raise APIClientException(f'Invalid bar archive {self.path}: unknown format')
+        self.rows = rows
+        self.first = first if rows else None
+        self.last = last if rows else None
+
+        columns = {}
+        offset = header_size
+        for index in range(column_count):
+            name, dtype = COLUMN.unpack_from(mapped, HEADER.size + index * COLUMN.size)
+            dtype = np.dtype(dtype.rstrip(b'\x00').decode('ascii'))
+            if offset + rows * dtype.itemsize > len(mapped):
+                raise APIClientException(f'Invalid bar archive {self.path}: file truncated')
+            columns[name.rstrip(b'\x00').decode('ascii')] = np.frombuffer(
+                mapped, dtype=dtype, count=rows, offset=offset)
+            offset += rows * dtype.itemsize
+        return columns
+
+    def bounds(self, start: Moment = None, end: Moment = None) -> Tuple[int, int]:
+        """
+        Finds the rows of a period with a binary search on the timestamp column.
+
+        Args:
+            start (Moment): Period start (Unix timestamp or aware datetime; None = first bar).
+            end (Moment): Period end, exclusive (None = after the last bar).
+
+        Returns:
+            Tuple[int, int]: First row and end row (exclusive).
+        """
+        timestamps = self.columns['timestamp']
+        low = (0 if start is None
+               else int(np.searchsorted(timestamps, _timestamp(start), side='left')))
+        high = (self.rows if end is None
+                else int(np.searchsorted(timestamps, _timestamp(end), side='left')))
+        return low, max(low, high)
+
+    def slice(self, start: Moment = None, end: Moment = None) -> Dict[str, np.ndarray]:
+        """
+        Get the bars of a period as views (no copy, no parsing).
+
+        Args:
+            start (Moment): Period start (Unix timestamp or aware datetime; None = first bar).
+            end (Moment): Period end, exclusive (None = after the last bar).
+
+        Returns:
+            Dict[str, np.ndarray]: Read-only column views (copy them to modify the values).
+        """
+        low, high = self.bounds(start, end)
+        return {name: column[low:high] for name, column in self.columns.items()}
+
+    def close(self) -> None:
+        """
+        Release the mapping. Views still in use keep it alive until they are released.
+        """
+        mapped, self._map = self._map, None
+        self.columns = {}
+        if mapped is not None:
+            try:
+                mapped.close()
+            except BufferError:
+                # Views handed out earlier still reference the mapping; it is unmapped with them
+                pass
+
+
+class BarArchive:
+    """
+    Directory of memory-mapped bar files, one file per symbol: a fixed header (row count,
+    first / last timestamp, column table) followed by one fixed-width column after another.
+    The file name identifies the symbol, the sorted timestamp column is the date index.
+
+    Files are replaced atomically, so readers never see a partial file; readers that keep
+    a file open see the previous version until they open it again. Writing a symbol
+    releases the archive's own mapping of its file first; on Windows, views of the file
+    still held by readers prevent the replacement. Use one archive directory per interval
+    and a single writer.
+
+    Attributes:
+        path (str): The archive directory.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._open: Dict[str, ArchivedBars] = {}
+        self._lock = Lock()
+
+    def write(self, symbol: str, columns: Mapping[str, Any]) -> int:
+        """
+        Write the bars of a symbol, replacing the archived bars.
+
+        Args:
+            symbol (str): The symbol.
+            columns (Mapping[str, Any]): HistoricData "columns" output (lists or arrays,
+                None becomes NaN) or "chart" output.
+
+        Returns:
+            int: Number of archived bars.
+
+        Raises:
+            APIClientException: If the timestamps are not strictly increasing.
+        """
+        arrays = _to_arrays(columns)
+        timestamps = arrays['timestamp']
+        if timestamps.size > 1 and np.any(timestamps[1:] <= timestamps[:-1]):
+            raise APIClientException('Bar timestamps must be strictly increasing')
+
+        rows = int(timestamps.size)
+        table = b''.join(COLUMN.pack(name.encode('ascii'), dtype.str.encode('ascii'))
+                         for name, dtype in COLUMNS)
+        header_size = -(-(HEADER.size + len(table)) // ALIGNMENT) * ALIGNMENT
+        header = HEADER.pack(MAGIC, VERSION, len(COLUMNS), header_size, rows,
+                             int(timestamps[0]) if rows else 0, int(timestamps[-1]) if rows else 0)
+
+        path = self._path(symbol)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as file:
+            file.write((header + table).ljust(header_size, b'\x00'))
+            for name, dtype in COLUMNS:
+                file.write(arrays[name].astype(dtype, copy=False).tobytes())
+        # A mapped file cannot be replaced on Windows; the next open maps the new file
+        with self._lock:
+            bars = self._open.pop(symbol.upper(), None)
+        if bars is not None:
+            bars.close()
+        os.replace(temporary, path)
+        return rows
+
+    def append(self, symbol: str, columns: Mapping[str, Any]) -> int:
+        """
+        Add bars to the archived bars of a symbol. Archived bars at or after the first new
+        bar are replaced (e.g. the incomplete bar of the current day).
+
+        Args:
+            symbol (str): The symbol.
+            columns (Mapping[str, Any]): See write.
+
+        Returns:
+            int: Number of archived bars.
+        """
+        if symbol not in self:
+            return self.write(symbol, columns)
+        arrays = _to_arrays(columns)
+        if arrays['timestamp'].size == 0:
+            return self.open(symbol).rows
+        kept = self.open(symbol).slice(end=int(arrays['timestamp'][0]))
+        merged = {name: np.concatenate((kept[name], arrays[name])) for name, _ in COLUMNS}
+        # Release the views, so write can unmap the file before replacing it
+        del kept
+        return self.write(symbol, merged)
+
+    def open(self, symbol: str) -> ArchivedBars:
+        """
+        Get the mapped bars of a symbol. The mapping is shared by all callers of this
+        archive and renewed when the file was replaced.
+
+        Args:
+            symbol (str): The symbol.
+
+        Returns:
+            ArchivedBars: The bars.
+
+        Raises:
+            APIClientException: If the symbol is not archived or the file is invalid.
+        """
+        path = self._path(symbol)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError as e:
+            raise APIClientException(f'Symbol not archived: {symbol}') from e
+        with self._lock:
+            bars = self._open.get(symbol.upper())
+            if bars is None or bars.file_id != (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+                if bars is not None:
+                    bars.close()
+                bars = self._open[symbol.upper()] = ArchivedBars(symbol.upper(), path)
+            return bars
+
+    def read(self, symbol: str, start: Moment = None, end: Moment = None) -> Dict[str, np.ndarray]:
+        """
+        Get the bars of a symbol in a period as read-only views.
+
+        Args:
+            symbol (str): The symbol.
+            start (Moment): Period start (Unix timestamp or aware datetime; None = first bar).
+            end (Moment): Period end, exclusive (None = after the last bar).
+
+        Returns:
+            Dict[str, np.ndarray]: The column views.
+        """
+        return self.open(symbol).slice(start, end)
+
+    def symbols(self) -> List[str]:
+        """
+        Lists the archived symbols.
+
+        Returns:
+            List[str]: The symbols, sorted.
+        """
+        return sorted(symbol_name(name) for name in os.listdir(self.path) if name.endswith(SUFFIX))
+
+    def close(self) -> None:
+        """
+        Release all mappings of this archive.
+        """
+        with self._lock:
+            opened, self._open = self._open, {}
+        for bars in opened.values():
+            bars.close()
+
+    def _path(self, symbol: str) -> str:
+        """
+        Get the file of a symbol.
+
+        Args:
+            symbol (str): The symbol.
+
+        Returns:
+            str: The path.
+        """
+        return os.path.join(self.path, file_name(symbol))
+
+    def __contains__(self, symbol: str) -> bool:
+        return os.path.exists(self._path(symbol))
+
+    def __len__(self) -> int:
+        return len(self.symbols())
+
+
+def _to_arrays(columns: Mapping[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Converts bars into arrays of the archive types.
+
+    Args:
+        columns (Mapping[str, Any]): "columns" or "chart" output.
+
+    Returns:
+        Dict[str, np.ndarray]: One array per archive column (missing columns are NaN).
+    """
+    columns = columns.get('bars', columns)
+    timestamps = np.asarray(columns['timestamp'], dtype=np.int64)
+    arrays = {'timestamp': timestamps}
+    for name, dtype in COLUMNS[1:]:
+        values: Optional[Sequence[Any]] = columns.get(name)
+        arrays[name] = (np.asarray(values, dtype=dtype) if values is not None
+                        else np.full(timestamps.size, np.nan, dtype=dtype))
+    return arrays
+
+
+def _timestamp(moment: Union[int, datetime]) -> int:
+    """
+    Converts a period bound to a Unix timestamp.
+
+    Args:
+        moment (Union[int, datetime]): Unix timestamp or aware datetime.
+
+    Returns:
+        int: The Unix timestamp.
+    """
+    return int(moment.timestamp()) if isinstance(moment, datetime) else int(moment)
@@ -0,0 +1,274 @@
+"""
+Module: Cassette
+
+Copyright 2023 Dominic Kneup.
+Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+"""
+import base64
+import gzip
+import json
+import os
+from contextlib import contextmanager
+from enum import Enum
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode
+import requests
+from requests.structures import CaseInsensitiveDict
+from client.exceptions.APIClientExceptions import APIClientException
+
+
+class CassetteMode(Enum):
+    """Enum for cassette modes
+
+    'record' always sends requests and writes a new archive (replacing an existing one),
+    'replay' only serves recorded responses and never touches the network,
+    'auto' replays recorded responses and records missing ones.
+    """
+    RECORD = "record"
+    REPLAY = "replay"
+    AUTO = "auto"
+
+
+# Parameters that change between sessions and must not be part of the request key
+VOLATILE_PARAMS = frozenset(['crumb'])
+
+# Response headers kept in the archive (the body is stored decoded)
+RECORDED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Retry-After')
+
+RecordedResponse = Tuple[int, Dict[str, str], bytes]
+
+
+class Cassette:
+    """
+    Archive of raw HTTP responses stored as gzip compressed JSON lines.
+
+    Attributes:
+        path (str): Path of the archive file (e.g. "tests/data/quotes.jsonl.gz").
+        mode (CassetteMode): Record, replay or auto mode.
+    """
+    def __init__(self, path: str, mode: str = CassetteMode.REPLAY.value):
+        self.path = path
+        self.mode = CassetteMode(mode)
+        self._responses: Dict[str, List[RecordedResponse]] = {}
+        self._positions: Dict[str, int] = {}
+        self._lock = Lock()
+        if self.mode == CassetteMode.RECORD:
+            # A new recording replaces the archive, responses are not appended to old ones
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        else:
+            self._load()
+
+    @staticmethod
+    def request_key(url: str, params: Optional[Any] = None) -> str:
+        """
+        Build the archive key of a request.
+
+        Args:
+            url (str): The request URL.
+            params (Optional[Any]): The request parameters.
+
+        Returns:
+            str: URL plus the sorted, non volatile parameters.
+        """
+        if not params:
+            return url
+        items = params.items() if isinstance(params, dict) else params
+        kept = sorted((str(name), str(value)) for name, value in items
+                      if name not in VOLATILE_PARAMS)
+        return f'{url}?{urlencode(kept)}' if kept else url
+
+    def play(self, key: str) -> Optional[RecordedResponse]:
+        """
+        Get the next recorded response for a key; the last one is repeated once all were served.
+
+        Args:
+            key (str): The request key.
+
+        Returns:
+            Optional[RecordedResponse]: Status code, headers and body or None.
+        """
+        with self._lock:
+            responses = self._responses.get(key)
+            if not responses:
+                return None
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            return responses[min(position, len(responses) - 1)]
+
+    def record(self, key: str, response: requests.Response) -> None:
+        """
+        Append a response to the archive.
+
+        Args:
+            key (str): The request key.
+            response (requests.Response): The response to record.
+        """
+        body = response.content or b''
+        headers = {name: response.headers[name] for name in RECORDED_HEADERS
+                   if name in response.headers}
+        entry: Dict[str, Any] = {'key': key, 'status': response.status_code, 'headers': headers}
+        try:
+            entry['body'] = body.decode('utf-8')
+        except UnicodeDecodeError:
+            entry['body'] = base64.b64encode(body).decode('ascii')
+            entry['encoding'] = 'base64'
+
+        line = (json.dumps(entry, separators=(',', ':')) + '\n').encode('utf-8')
+        with self._lock:
+            self._responses.setdefault(key, []).append((response.status_code, headers, body))
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with gzip.open(self.path, 'ab') as file:
+                file.write(line)
+
+    def session(self, session: Optional[requests.Session] = None) -> 'CassetteSession':
+        """
+        Wrap a session so that its GET requests go through this cassette.
+
+        Args:
+            session (Optional[requests.Session]): The session used for recording.
+
+        Returns:
+            CassetteSession: A drop-in replacement for the session.
+        """
+        return CassetteSession(self, session or requests.Session())
+
+    def attach(self, client: Any) -> Any:
+        """
+        Route the requests of an existing ApiClient through this cassette, including the
+        sessions of the identities of its identity pool (shared with other clients of the pool).
+
+        Args:
+            client (Any): An ApiClient instance.
+
+        Returns:
+            Any: The same client.
+        """
+        client.session = self.session(client.session)
+        pool = getattr(client, 'identity_pool', None)
+        if pool is not None:
+            for identity in pool.identities:
+                if not isinstance(identity.session, CassetteSession):
+                    identity.session = self.session(identity.session)
+        return client
+
+    @contextmanager
+    def install(self) -> Iterator['Cassette']:
+        """
+        Route the requests of all ApiClient instances created inside the block through this
+        cassette (including clients created internally, e.g. for the crumb). Identity pools
+        have their own sessions: create them with session_factory=cassette.session or
+        attach the clients using them.
+
+        Returns:
+            Iterator[Cassette]: Context manager yielding the cassette.
+        """
+        # Imported here because the api client module does not depend on cassettes
+        from client.api_client import ApiClient  # pylint: disable=import-outside-toplevel
+
+        previous = ApiClient.session_factory
+        ApiClient.session_factory = self.session
+        try:
+            yield self
+        finally:
+            ApiClient.session_factory = previous
+
+    def __len__(self) -> int:
+        return sum(len(responses) for responses in self._responses.values())
+
+    def _load(self) -> None:
+        """
+        Load the archive into memory.
+
+        Raises:
+            APIClientException: If the archive cannot be decoded.
+        """
+        if not os.path.exists(self.path):
+            if self.mode == CassetteMode.REPLAY:
+                raise APIClientException(f'Cassette {self.path} does not exist')
+            return
+        try:
+            with gzip.open(self.path, 'rt', encoding='utf-8') as file:
+                for line in file:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    body = entry.get('body', '')
+                    data = base64.b64decode(body) if entry.get('encoding') == 'base64' \
+                        else body.encode('utf-8')
+                    self._responses.setdefault(entry['key'], []).append(
+                        (entry['status'], entry.get('headers', {}), data)
+                    )
+        except (OSError, ValueError, KeyError) as e:
+            raise APIClientException(f'Failed to read cassette {self.path}') from e
+
+
+class CassetteSession:
+    """
+    Session replacement that records or replays GET requests.
+
+    Attributes:
+        cassette (Cassette): The cassette used for recording / replaying.
+        session (requests.Session): The wrapped session for live requests.
+    """
+    def __init__(self, cassette: Cassette, session: requests.Session):
+        self.cassette = cassette
+        self.session = session
+
+    @property
+    def cookies(self) -> Any:
+        """
+        Cookies of the wrapped session.
+        """
+        return self.session.cookies
+
+    def get(self, url: str, params: Optional[Any] = None, **kwargs: Any) -> requests.Response:
+        """
+        Serve a GET request from the cassette or record it.
+
+        Args:
+            url (str): The request URL.
+            params (Optional[Any]): The request parameters.
+            **kwargs (Any): Further arguments for requests.Session.get.
+
+        Returns:
+            requests.Response: The recorded or live response.
+
+        Raises:
+            APIClientException: If a request is missing in replay mode.
+        """
+        key = self.cassette.request_key(url, params)
+        if self.cassette.mode != CassetteMode.RECORD:
+            recorded = self.cassette.play(key)
+            if recorded is not None:
+                return self._build_response(url, recorded)
+            if self.cassette.mode == CassetteMode.REPLAY:
+                raise APIClientException(f'No recorded response for {key}')
+
+        response = self.session.get(url, params=params, **kwargs)
+        self.cassette.record(key, response)
+        return response
+
+    @staticmethod
+    def _build_response(url: str, recorded: RecordedResponse) -> requests.Response:
+        """
+        Build a response object from a recorded response.
+
+        Args:
+            url (str): The request URL.
+            recorded (RecordedResponse): Status code, headers and body.
+
+        Returns:
+            requests.Response: The response.
+        """
+        status_code, headers, body = recorded
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body  # pylint: disable=protected-access
+        response.encoding = 'utf-8'
+        response.url = url
+        return response
@@ -0,0 +1,367 @@
+"""
+Module: CircuitBreaker
+
+Copyright 2023 Dominic Kneup.
+Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+"""
+import time
+from enum import Enum
+from threading import Lock
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+from client.exceptions.APIClientExceptions import CircuitOpen, UpstreamError, UpstreamUnavailable
+from client.api.config import Settings, settings
+
+
+class CircuitState(Enum):
+    """Enum for circuit breaker states
+
+    'closed' lets all requests pass, 'open' fails fast without sending requests and
+    'half_open' lets a single probe request through to test if the upstream recovered.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+# Called with the endpoint name, the previous and the new state
+StateChangeHook = Callable[[str, CircuitState, CircuitState], None]
+
+# Returns True if the upstream of an endpoint is healthy
+HealthProbe = Callable[[], bool]
+
+
+class CircuitBreaker:  # pylint: disable=too-many-instance-attributes
+    """
+    Circuit breaker guarding the requests of one endpoint.
+
+    Attributes:
+        name (str): Endpoint name (e.g. "quote").
+        failure_threshold (int): Consecutive failures that open the circuit.
+        recovery_timeout (float): Seconds the circuit stays open before a probe is allowed.
+        health_probe (Optional[HealthProbe]): Optional health check run instead of a
+            trial request once the recovery timeout elapsed.
+        on_state_change (Optional[StateChangeHook]): Metrics hook called on every transition.
+    """
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0, *,
+                 health_probe: Optional[HealthProbe] = None,
+                 on_state_change: Optional[StateChangeHook] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.health_probe = health_probe
+        self.on_state_change = on_state_change
+        self._clock = clock
+        self._lock = Lock()
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._counters = {'successes': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+
+    @property
+    def state(self) -> CircuitState:
+        """
+        The current state.
+        """
+        return self._state
+
+    def before_request(self) -> None:
+        """
+        Check if a request may be sent.
+
+        Raises:
+            CircuitOpen: If the circuit is open or a probe is already in flight.
+        """
+        with self._lock:
+            if self._state == CircuitState.CLOSED:
+                return
+            if self._state == CircuitState.OPEN:
+                remaining = self.recovery_timeout - (self._clock() - self._opened_at)
+                if remaining > 0:
+                    self._reject(remaining)
+                self._transition(CircuitState.HALF_OPEN)
+            if self._probing:
+                self._reject(None)
+            self._probing = True
+            health_probe = self.health_probe
+
+        if health_probe is not None:
+            self._run_health_probe(health_probe)
+
+    def record_success(self) -> None:
+        """
+        Record a successful request; closes a half-open circuit.
+        """
+        with self._lock:
+            self._counters['successes'] += 1
+            self._failures = 0
+            self._probing = False
+            if self._state != CircuitState.CLOSED:
+                self._transition(CircuitState.CLOSED)
+
+    def record_failure(self) -> None:
+        """
+        Record a failed request; opens the circuit once the threshold is reached
+        or if the probe of a half-open circuit failed.
+        """
+        with self._lock:
+            self._counters['failures'] += 1
+            self._failures += 1
+            self._probing = False
+            if self._state == CircuitState.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._open()
+
+    def call(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a function guarded by the circuit breaker.
+
+        Args:
+            func (Callable[..., Any]): The function sending the request.
+            *args (Any): Positional arguments for func.
+            **kwargs (Any): Keyword arguments for func.
+
+        Returns:
+            Any: The return value of func.
+
+        Raises:
+            CircuitOpen: If the circuit is open.
+            UpstreamUnavailable: If func fails because the upstream is unavailable.
+            UpstreamError: Other classified upstream errors (counted as a success).
+            BaseException: Any other error of func (the state is left unchanged).
+        """
+        self.before_request()
+        succeeded: Optional[bool] = None
+        try:
+            result = func(*args, **kwargs)
+            succeeded = True
+        except CircuitOpen:
+            # Rejected by another circuit breaker, the upstream was not asked
+            raise
+        except UpstreamUnavailable:
+            succeeded = False
+            raise
+        except UpstreamError:
+            # The upstream answered (e.g. 404 or 429), it is not unavailable
+            succeeded = True
+            raise
+        finally:
+            if succeeded is None:
+                # No upstream outcome (e.g. a bug or KeyboardInterrupt), only end the probe
+                self._end_probe()
+            elif succeeded:
+                self.record_success()
+            else:
+                self.record_failure()
+        return result
+
+    def reset(self) -> None:
+        """
+        Close the circuit and reset all counters.
+        """
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            self._counters = dict.fromkeys(self._counters, 0)
+            if self._state != CircuitState.CLOSED:
+                self._transition(CircuitState.CLOSED)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns the state and counters of the circuit breaker.
+
+        Returns:
+            Dict[str, Any]: name, state, consecutive_failures and the counters
+            (successes, failures, rejected, opened).
+        """
+        with self._lock:
+            return {
+                'name': self.name,
+                'state': self._state.value,
+                'consecutive_failures': self._failures,
+                **self._counters,
+            }
+
+    def _run_health_probe(self, health_probe: HealthProbe) -> None:
+        """
+        Run the health probe of a half-open circuit and close or reopen it.
+
+        Args:
+            health_probe (HealthProbe): The probe (read under the lock, it may be replaced).
+
+        Raises:
+            CircuitOpen: If the health probe failed.
+        """
+        try:
+            healthy = bool(health_probe())
+        except Exception:  # pylint: disable=broad-except
+            healthy = False
+        if healthy:
+            self.record_success()
+            return
+        self.record_failure()
+        with self._lock:
+            self._reject(self.recovery_timeout)
+
+    def _end_probe(self) -> None:
+        """
+        Let the next request probe a half-open circuit without changing the state.
+        """
+        with self._lock:
+            self._probing = False
+
+    def _open(self) -> None:
+        """
+        Open the circuit (lock must be held).
+        """
+        self._opened_at = self._clock()
+        if self._state != CircuitState.OPEN:
+            self._counters['opened'] += 1
+            self._transition(CircuitState.OPEN)
+
+    def _reject(self, retry_after: Optional[float]) -> None:
+        """
+        Count and raise a fast-fail (lock must be held).
+
+        Args:
+            retry_after (Optional[float]): Seconds until the next probe is allowed.
+
+        Raises:
+            CircuitOpen: Always.
+        """
+        self._counters['rejected'] += 1
+        raise CircuitOpen(f'Circuit for {self.name} is {self._state.value}',
+                          retry_after=retry_after)
+
+    def _transition(self, state: CircuitState) -> None:
+        """
+        Change the state and notify the metrics hook (lock must be held).
+
+        Args:
+            state (CircuitState): The new state.
+        """
+        previous, self._state = self._state, state
+        if self.on_state_change is not None:
+            self.on_state_change(self.name, previous, state)
+
+
+class CircuitBreakerRegistry:
+    """
+    Shared circuit breakers, one per endpoint name.
+
+    Attributes:
+        failure_threshold (int): Failure threshold of new circuit breakers.
+        recovery_timeout (float): Recovery timeout of new circuit breakers.
+        on_state_change (Optional[StateChangeHook]): Metrics hook of new circuit breakers.
+    """
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 on_state_change: Optional[StateChangeHook] = None,
+                 health_probes: Optional[Mapping[str, HealthProbe]] = None):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.on_state_change = on_state_change
+        self._health_probes: Dict[str, HealthProbe] = dict(health_probes or {})
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        """
+        Get the circuit breaker of an endpoint, creating it if necessary.
+
+        Args:
+            name (str): Endpoint name.
+
+        Returns:
+            CircuitBreaker: The shared circuit breaker.
+        """
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(name, self.failure_threshold, self.recovery_timeout,
+                                         health_probe=self._health_probes.get(name),
+                                         on_state_change=self._notify)
+                self._breakers[name] = breaker
+            return breaker
+
+    def set_health_probe(self, name: str, probe: Optional[HealthProbe]) -> None:
+        """
+        Set the health probe of an endpoint (used instead of a trial request once its
+        recovery timeout elapsed), for the existing and all future breakers of the endpoint.
+
+        Args:
+            name (str): Endpoint name.
+            probe (Optional[HealthProbe]): The health check (None removes it).
+        """
+        with self._lock:
+            if probe is None:
+                self._health_probes.pop(name, None)
+            else:
+                self._health_probes[name] = probe
+            breaker = self._breakers.get(name)
+        if breaker is not None:
+            breaker.health_probe = probe
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the snapshots of all circuit breakers.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Snapshots keyed by endpoint name.
+        """
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.snapshot() for breaker in breakers}
+
+    def reset(self) -> None:
+        """
+        Close all circuits and reset their counters.
+        """
+        with self._lock:
+            breakers = list(self._breakers.values())
+        for breaker in breakers:
+            breaker.reset()
+
+    def _notify(self, name: str, previous: CircuitState, state: CircuitState) -> None:
+        """
+        Forward a state change to the registry hook (so it can be set after breakers exist).
+        """
+        if self.on_state_change is not None:
+            self.on_state_change(name, previous, state)
+
+
+def shared_registry(client_settings: Settings) -> CircuitBreakerRegistry:
+    """
+    Get the registry shared by all clients whose settings have the same failure threshold
+    and recovery timeout, creating it on first use.
+
+    Args:
+        client_settings (Settings): The settings of the client.
+
+    Returns:
+        CircuitBreakerRegistry: The shared registry.
+    """
+    key = (client_settings.circuit_failure_threshold, client_settings.circuit_recovery_timeout)
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = _registries[key] = CircuitBreakerRegistry(*key)
+        return registry
+
+
+def shared_registries() -> List[CircuitBreakerRegistry]:
+    """
+    Returns all shared registries created so far (e.g. to reset them).
+
+    Returns:
+        List[CircuitBreakerRegistry]: The registries.
+    """
+    with _registries_lock:
+        return list(_registries.values())
+
+
+# Shared registries keyed by (failure threshold, recovery timeout)
+_registries: Dict[Tuple[int, float], CircuitBreakerRegistry] = {}
+_registries_lock = Lock()
+
+# Registry of the clients with the module settings
+circuit_breakers = shared_registry(settings)
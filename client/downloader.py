@@ -0,0 +1,520 @@
+"""
+Module: Downloader
+
+Copyright 2023 Dominic Kneup.
+Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+"""
+import csv
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, TextIO
+from client.api.historic_data import HistoricData
+from client.api.quote import Quote
+from client.api.similar_securities import SimilarSecurities
+from client.api.transformers.similar_securities_transformer import OutputFormat
+from client.exceptions.APIClientExceptions import APIClientException
+from client.rate_limiter import RateLimiter
+from client.symbol_registry import normalize_symbols
+
+try:
+    import pyarrow  # type: ignore[import-not-found]
+    import pyarrow.parquet  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - pyarrow is only needed for Parquet output
+    pyarrow = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+Record = Dict[str, Any]
+
+
+class Checkpoint:
+    """
+    Symbols that were downloaded completely, appended to a text file (one symbol per line)
+    so an interrupted job can be resumed.
+
+    Attributes:
+        path (Optional[str]): Path of the checkpoint file (None keeps it in memory only).
+    """
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._done: Set[str] = set()
+        self._file: Optional[TextIO] = None
+        if path is not None and os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                self._done.update(line.strip() for line in file if line.strip())
+
+    def mark(self, symbol: str) -> None:
+        """
+        Record a completed symbol (flushed immediately).
+
+        Args:
+            symbol (str): The symbol.
+        """
+        self._done.add(symbol)
+        if self.path is None:
+            return
+        if self._file is None:
+            # pylint: disable-next=consider-using-with
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(f'{symbol}\n')
+        self._file.flush()
+
+    def close(self) -> None:
+        """
+        Close the checkpoint file.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._done
+
+
+class JsonlWriter:
+    """
+    Writes records as JSON lines.
+
+    Attributes:
+        path (str): Output path.
+    """
+    # Records written but not yet durable (always 0, every write is flushed)
+    buffered = 0
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        # pylint: disable-next=consider-using-with
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8')
+
+    def write(self, records: Sequence[Record]) -> None:
+        """
+        Write the records of one symbol.
+
+        Args:
+            records (Sequence[Record]): The records.
+        """
+        self._file.writelines(json.dumps(record, default=str) + '\n' for record in records)
+        self._file.flush()
+
+    def flush(self) -> None:
+        """
+        Records are flushed by write already.
+        """
+
+    def close(self) -> None:
+        """
+        Close the output file.
+        """
+        self._file.close()
+
+
+class CsvWriter:
+    """
+    Writes records as CSV. The columns are taken from the first record (or from the
+    header of the existing file when appending); other fields are dropped.
+
+    Attributes:
+        path (str): Output path.
+    """
+    # Records written but not yet durable (always 0, every write is flushed)
+    buffered = 0
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        self._columns: Optional[List[str]] = None
+        if append and os.path.exists(path):
+            with open(path, newline='', encoding='utf-8') as file:
+                self._columns = next(csv.reader(file), None)
+        # pylint: disable-next=consider-using-with
+        self._file = open(path, 'a' if append else 'w', newline='', encoding='utf-8')
+        self._writer: Optional[csv.DictWriter] = None
+
+    def write(self, records: Sequence[Record]) -> None:
+        """
+        Write the records of one symbol.
+
+        Args:
+            records (Sequence[Record]): The records.
+        """
+        if not records:
+            return
+        if self._writer is None:
+            header = self._columns is None
+            self._columns = self._columns or list(records[0])
+            self._writer = csv.DictWriter(self._file, self._columns, extrasaction='ignore')
+            if header:
+                self._writer.writeheader()
+        self._writer.writerows({key: self._cell(value) for key, value in record.items()}
+                               for record in records)
+        self._file.flush()
+
+    def flush(self) -> None:
+        """
+        Records are flushed by write already.
+        """
+
+    def close(self) -> None:
+        """
+        Close the output file.
+        """
+        self._file.close()
+
+    @staticmethod
+    def _cell(value: Any) -> Any:
+        """
+        Converts nested values to JSON text.
+
+        Args:
+            value (Any): The field value.
+
+        Returns:
+            Any: The value to write.
+        """
+        return json.dumps(value, default=str) if isinstance(value, (dict, list)) else value
+
+
+class ParquetWriter:
+    """
+    Writes records as a Parquet dataset (requires pyarrow): a directory of part files
+    ("part-00000.parquet", ...), each written atomically once row_group_size records are
+    buffered. Appending continues the numbering of the existing parts.
+
+    Attributes:
+        path (str): Output directory.
+        row_group_size (int): Records buffered per part file.
+    """
+    def __init__(self, path: str, append: bool = False, row_group_size: int = 10000):
+        if pyarrow is None:
+            raise APIClientException('Parquet output requires pyarrow')
+        self.path = path
+        self.row_group_size = row_group_size
+        os.makedirs(path, exist_ok=True)
+        parts = sorted(name for name in os.listdir(path)
+                       if name.startswith('part-') and name.endswith('.parquet'))
+        if not append:
+            for name in parts:
+                os.remove(os.path.join(path, name))
+            parts = []
+        self._next_part = int(parts[-1][5:-8]) + 1 if parts else 0
+        self._buffer: List[Record] = []
+
+    @property
+    def buffered(self) -> int:
+        """
+        Records not yet written to a part file.
+        """
+        return len(self._buffer)
+
+    def write(self, records: Sequence[Record]) -> None:
+        """
+        Write the records of one symbol.
+
+        Args:
+            records (Sequence[Record]): The records.
+        """
+        self._buffer.extend(records)
+        if len(self._buffer) >= self.row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write the buffered records as a new part file.
+        """
+        if not self._buffer:
+            return
+        table = pyarrow.Table.from_pylist(self._buffer)
+        target = os.path.join(self.path, f'part-{self._next_part:05d}.parquet')
+        pyarrow.parquet.write_table(table, f'{target}.tmp')
+        os.replace(f'{target}.tmp', target)
+        self._next_part += 1
+        self._buffer = []
+
+    def close(self) -> None:
+        """
+        Write the buffered records.
+        """
+        self.flush()
+
+
+WRITERS: Dict[str, Callable[..., Any]] = {
+    'jsonl': JsonlWriter,
+    'csv': CsvWriter,
+    'parquet': ParquetWriter,
+}
+
+
+def open_writer(path: str, output_format: Optional[str] = None, append: bool = False) -> Any:
+    """
+    Create the writer for an output file.
+
+    Args:
+        path (str): Output path.
+        output_format (Optional[str]): "jsonl", "csv" or "parquet" (None infers it from the
+            file extension).
+        append (bool): Append to an existing file (resumed jobs).
+
+    Returns:
+        Any: The writer (write(records), flush(), close() and the number of buffered records).
+
+    Raises:
+        APIClientException: If the format is unknown.
+    """
+    if output_format is None:
+        output_format = os.path.splitext(path)[1].lstrip('.').lower()
+        output_format = 'jsonl' if output_format in ('json', 'ndjson') else output_format
+    if output_format not in WRITERS:
+        raise APIClientException(f'Unknown output format: {output_format!r}')
+    return WRITERS[output_format](path, append=append)
+
+
+def read_symbols(lines: Iterable[str]) -> List[str]:
+    """
+    Parses a symbol list (whitespace or comma separated, "#" starts a comment).
+
+    Args:
+        lines (Iterable[str]): Lines of the symbol file.
+
+    Returns:
+        List[str]: The normalized, unique symbols (malformed symbols are skipped).
+    """
+    symbols: List[str] = []
+    for line in lines:
+        symbols.extend(line.split('#', 1)[0].replace(',', ' ').split())
+    return normalize_symbols(symbols)
+
+
+@dataclass
+class DownloadOptions:
+    """
+    Request options of a download job.
+
+    Attributes:
+        start_date (Optional[datetime]): History start (history only).
+        end_date (Optional[datetime]): History end, exclusive (defaults to now).
+        data_range (Optional[str]): History range instead of dates (e.g. "1y").
+        interval (Optional[str]): History interval (defaults to the settings).
+        fields (Optional[List[str]]): Quote field projection.
+    """
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    data_range: Optional[str] = None
+    interval: Optional[str] = None
+    fields: Optional[List[str]] = None
+
+
+def create_client(kind: str, options: DownloadOptions) -> Any:
+    """
+    Create the API client of a job kind.
+
+    Args:
+        kind (str): "quote", "history" or "recommendations".
+        options (DownloadOptions): The request options.
+
+    Returns:
+        Any: The client.
+    """
+    if kind == 'quote':
+        return Quote(fields=options.fields)
+    if kind == 'history':
+        client = HistoricData(output='dict')
+        if options.interval is not None:
+            client.interval = options.interval
+        return client
+    return SimilarSecurities(output_format=OutputFormat.LIST)
+
+
+def fetch_records(client: Any, kind: str, symbol: str, options: DownloadOptions) -> List[Record]:
+    """
+    Fetch the records of one symbol.
+
+    Args:
+        client (Any): The client created by create_client.
+        kind (str): "quote", "history" or "recommendations".
+        symbol (str): The symbol.
+        options (DownloadOptions): The request options.
+
+    Returns:
+        List[Record]: One record per quote, bar or recommended symbol (each with "symbol").
+    """
+    if kind == 'quote':
+        return [client.get_quote(symbol)]
+    if kind == 'history':
+        if options.data_range is not None:
+            bars = client.get_historic_data_for_range(symbol, options.data_range)
+        else:
+            end_date = options.end_date or datetime.now(timezone.utc)
+            bars = client.get_historic_data(symbol, options.start_date, end_date)
+        return [{'symbol': symbol, **row} for row in bars]
+    return [{'symbol': symbol, 'recommended': recommended}
+            for recommended in client.get_similar_securities(symbol)]
+
+
+@dataclass
+class DownloadSummary:  # pylint: disable=too-many-instance-attributes
+    """
+    Outcome of a download job.
+
+    Attributes:
+        total (int): Symbols of the job.
+        skipped (int): Symbols skipped because the checkpoint lists them.
+        succeeded (int): Symbols downloaded.
+        failed (int): Symbols that raised an error.
+        records (int): Records written.
+        elapsed (float): Seconds the job took.
+        errors (Counter): Failures per exception type.
+        failures (Dict[str, str]): Error message per failed symbol.
+        interrupted (bool): True if the job was stopped (KeyboardInterrupt) before all
+        symbols completed.
+    """
+    total: int = 0
+    skipped: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    records: int = 0
+    elapsed: float = 0.0
+    errors: Counter = field(default_factory=Counter)
+    failures: Dict[str, str] = field(default_factory=dict)
+    interrupted: bool = False
+
+    def format(self, max_failures: int = 10) -> str:
+        """
+        Formats the summary for the terminal.
+
+        Args:
+            max_failures (int): Failed symbols listed at most.
+
+        Returns:
+            str: The summary text.
+        """
+        rate = self.succeeded / self.elapsed if self.elapsed > 0 else 0.0
+        lines = [
+            f'{self.succeeded}/{self.total} symbols downloaded, {self.skipped} skipped, '
+            f'{self.failed} failed, {self.records} records in {self.elapsed:.1f}s '
+            f'({rate:.2f} symbols/s)'
+        ]
+        if self.interrupted:
+            lines.append('  interrupted, resume with the same checkpoint')
+        for error, count in self.errors.most_common():
+            lines.append(f'  {error}: {count}')
+        for symbol, message in list(self.failures.items())[:max_failures]:
+            lines.append(f'  {symbol}: {message}')
+        if len(self.failures) > max_failures:
+            lines.append(f'  ... and {len(self.failures) - max_failures} more')
+        return '\n'.join(lines)
+
+
+class Downloader:  # pylint: disable=too-many-instance-attributes
+    """
+    Downloads quotes, history or recommendations of many symbols concurrently and streams
+    the records to a writer. Every worker thread uses its own client.
+
+    Attributes:
+        kind (str): "quote", "history" or "recommendations".
+        writer (Any): The output writer (see open_writer).
+        workers (int): Worker threads.
+        rate_limiter (RateLimiter): Limits the symbol fetches per second across all workers.
+        checkpoint (Checkpoint): Completed symbols (skipped when the job is resumed).
+        options (DownloadOptions): The request options.
+    """
+    kinds = ('quote', 'history', 'recommendations')
+
+    def __init__(self, kind: str, writer: Any, *, workers: int = 4, rate: float = 0.0,
+                 checkpoint: Optional[Checkpoint] = None,
+                 options: Optional[DownloadOptions] = None,
+                 client_factory: Callable[[str, DownloadOptions], Any] = create_client,
+                 fetch: Callable[[Any, str, str, DownloadOptions], List[Record]] = fetch_records):
+        if kind not in self.kinds:
+            raise APIClientException(f'Unknown download kind: {kind!r}')
+        self.kind = kind
+        self.writer = writer
+        self.workers = max(workers, 1)
+        self.rate_limiter = RateLimiter(rate, burst=self.workers)
+        self.checkpoint = checkpoint if checkpoint is not None else Checkpoint()
+        self.options = options if options is not None else DownloadOptions()
+        self._client_factory = client_factory
+        self._fetch = fetch
+        self._local = threading.local()
+
+    def run(self, symbols: Sequence[str]) -> DownloadSummary:
+        """
+        Download all symbols that are not in the checkpoint. Records are written as soon as
+        a symbol completes and the symbol is checkpointed once the writer made its records
+        durable; failed symbols are retried when the job is resumed. A KeyboardInterrupt
+        cancels the pending symbols and returns the summary so far.
+
+        Args:
+            symbols (Sequence[str]): The symbols.
+
+        Returns:
+            DownloadSummary: The outcome.
+        """
+        summary = DownloadSummary(total=len(symbols))
+        pending = [symbol for symbol in symbols if symbol not in self.checkpoint]
+        summary.skipped = summary.total - len(pending)
+        written: List[str] = []
+        started = time.monotonic()
+
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            futures = {executor.submit(self._download, symbol): symbol for symbol in pending}
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    records = future.result()
+                except Exception as e:  # pylint: disable=broad-except
+                    logger.warning("Download of %s failed: %s", symbol, e)
+                    summary.failed += 1
+                    summary.errors[type(e).__name__] += 1
+                    summary.failures[symbol] = str(e)
+                    continue
+                self.writer.write(records)
+                written.append(symbol)
+                summary.succeeded += 1
+                summary.records += len(records)
+                if not self.writer.buffered:
+                    self._mark(written)
+        except KeyboardInterrupt:
+            summary.interrupted = True
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.writer.flush()
+            self._mark(written)
+            summary.elapsed = time.monotonic() - started
+        return summary
+
+    def _mark(self, written: List[str]) -> None:
+        """
+        Checkpoint symbols whose records the writer made durable.
+
+        Args:
+            written (List[str]): The written symbols (emptied).
+        """
+        for symbol in written:
+            self.checkpoint.mark(symbol)
+        written.clear()
+
+    def _download(self, symbol: str) -> List[Record]:
+        """
+        Fetch one symbol with the client of the current thread.
+
+        Args:
+            symbol (str): The symbol.
+
+        Returns:
+            List[Record]: The records.
+        """
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self._client_factory(self.kind, self.options)
+        self.rate_limiter.acquire()
+        return self._fetch(client, self.kind, symbol, self.options)
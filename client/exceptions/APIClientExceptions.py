@@ -1,4 +1,6 @@
 # APIClientExceptions.py
+from typing import List, Optional
+
 
 class BaseAPIClientException(Exception):
     """Base class for api client exceptions."""
@@ -17,7 +19,67 @@ class TransformerException(BaseAPIClientException):
 
 class ValidatorException(BaseAPIClientException):
     """Exception for authorization-related errors."""
-    pass
+
+    def __init__(self, message: str = '', errors: Optional[List[str]] = None):
+        super().__init__(message)
+        self.errors = errors if errors is not None else [message]
+
+    def __reduce__(self):
+        # Keep the collected errors when the exception is sent to / from worker processes
+        return self.__class__, (str(self), self.errors)
+
+
+class UpstreamError(APIClientException):
+    """Base class for classified errors returned by the upstream api.
+
+    Attributes:
+        retryable (bool): Whether retrying the same request later can succeed.
+        status_code (Optional[int]): HTTP status code (None for connection errors).
+        retry_after (Optional[float]): Seconds to wait as announced by the upstream.
+    """
+    retryable: bool = False
+
+    def __init__(self, message: str = '', status_code: Optional[int] = None,
+                 retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    def __reduce__(self):
+        # Keep status code and retry delay when the exception is sent to / from worker processes
+        return self.__class__, (str(self), self.status_code, self.retry_after)
+
+
+class RateLimited(UpstreamError):
+    """Too many requests (HTTP 429); retry after a pause."""
+    retryable = True
+
+
+class CrumbExpired(UpstreamError):
+    """Crumb or cookie rejected (HTTP 401); retry with a new crumb."""
+    retryable = True
+
+
+class NotFound(UpstreamError):
+    """Resource not found (HTTP 404)."""
+
+
+class InvalidSymbol(NotFound, ValidatorException):
+    """Symbol unknown or delisted; also a ValidatorException for existing handlers."""
+
+
+class UpstreamUnavailable(UpstreamError):
+    """Upstream outage, server error (HTTP 5xx), timeout or connection error."""
+    retryable = True
+
+
+class CircuitOpen(UpstreamError):
+    """Request rejected without being sent because the endpoint's circuit breaker is open.
+
+    Not an UpstreamUnavailable: no request reached the upstream, so a rejection is never
+    counted as a failure by another circuit breaker.
+    """
+    retryable = True
 
 
 class ApiException(Exception):
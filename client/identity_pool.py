@@ -0,0 +1,212 @@
+"""
+Module: IdentityPool
+
+Copyright 2023 Dominic Kneup.
+Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+"""
+import itertools
+import time
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import requests
+from client.api import config
+from client.api.config import Settings
+from client.api.validators.crumb_validator import CrumbValidator
+from client.api.validators.validator import Validator
+from client.exceptions.APIClientExceptions import APIClientException, RateLimited
+from client.rate_limiter import RateLimiter
+from client.user_agents import random_user_agent
+
+# Crumb parameter of clients with an identity pool: every request replaces it with the
+# crumb of its identity, so no crumb is fetched with the client's own session
+IDENTITY_CRUMB = 'identity'
+
+
+class Identity:  # pylint: disable=too-many-instance-attributes
+    """
+    One egress identity: its own session (cookie jar and optional proxy), user agent,
+    crumb and rate limit.
+
+    Attributes:
+        name (str): Name used in logs and snapshots (e.g. the proxy URL).
+        session (Any): The HTTP session of this identity.
+        user_agent (str): User agent sent with every request of this identity.
+        proxy (Optional[str]): Proxy URL (None sends requests directly).
+        rate_limiter (RateLimiter): Requests per second of this identity.
+        crumb (Optional[str]): Crumb bound to the cookies of the session.
+        counters (Dict[str, int]): requests, rate_limited and quarantined counts.
+    """
+    def __init__(self, name: str, user_agent: str, proxy: Optional[str] = None,
+                 rate: float = 0.0, *,
+                 session: Optional[Any] = None, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.name = name
+        self.user_agent = user_agent
+        self.proxy = proxy
+        self.session = session if session is not None else requests.Session()
+        if proxy is not None:
+            self.session.proxies = {'http': proxy, 'https': proxy}
+        self.rate_limiter = RateLimiter(rate, clock=clock, sleep=sleep)
+        self.crumb: Optional[str] = None
+        self.quarantined_until = 0.0
+        self._crumb_lock = Lock()
+        self.counters = {'requests': 0, 'rate_limited': 0, 'quarantined': 0}
+
+    def get_crumb(self, settings: Optional[Settings] = None,
+                  timeout: Optional[float] = None) -> str:
+        """
+        Get the crumb of this identity, fetching it with the identity's session on first use.
+
+        Args:
+            settings (Optional[Settings]): Crumb endpoints (defaults to the module settings).
+            timeout (Optional[float]): Request timeout in seconds.
+
+        Returns:
+            str: The crumb.
+
+        Raises:
+            UpstreamError: If the crumb request fails with an error status.
+            ValidatorException: If the crumb response is invalid.
+        """
+        with self._crumb_lock:
+            if self.crumb is None:
+                settings = settings if settings is not None else config.settings
+                headers = {'User-Agent': self.user_agent}
+                # The cookie endpoint answers with an error status but still sets the cookies
+                self.session.get(settings.crumb_cookie_endpoint, headers=headers, timeout=timeout)
+                response = self.session.get(settings.crumb_api_endpoint, headers=headers,
+                                            timeout=timeout)
+                if response.status_code >= 400:
+                    Validator.check_status(response.status_code, response.content, response.headers)
+                self.crumb = CrumbValidator.validate_crumb(response.text)
+            return self.crumb
+
+    def reset_crumb(self) -> None:
+        """
+        Discard the crumb (fetched again on next use), e.g. after CrumbExpired.
+        """
+        with self._crumb_lock:
+            self.crumb = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns the state and counters of the identity.
+
+        Returns:
+            Dict[str, Any]: name, proxy, quarantined_until and the counters
+            (requests, rate_limited, quarantined).
+        """
+        return {'name': self.name, 'proxy': self.proxy,
+                'quarantined_until': self.quarantined_until, **self.counters}
+
+
+class IdentityPool:
+    """
+    Schedules requests across identities: every request uses the healthy identity that
+    can send soonest under its own rate limit, identities answered with HTTP 429 are
+    quarantined.
+
+    Attributes:
+        identities (List[Identity]): The identities.
+        quarantine (float): Seconds an identity is quarantined after a 429 (at least
+            the announced Retry-After).
+    """
+    def __init__(self, identities: Sequence[Identity], quarantine: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        if not identities:
+            raise APIClientException('Identity pool needs at least one identity')
+        self.identities: List[Identity] = list(identities)
+        self.quarantine = quarantine
+        self._clock = clock
+        self._lock = Lock()
+        self._rotation = itertools.count()
+
+    @classmethod
+    def from_proxies(cls, proxies: Sequence[Optional[str]], rate: float = 1.0,
+                     user_agents: Optional[Sequence[str]] = None, quarantine: float = 300.0,
+                     session_factory: Callable[[], Any] = requests.Session) -> 'IdentityPool':
+        """
+        Creates one identity per proxy.
+
+        Args:
+            proxies (Sequence[Optional[str]]): Proxy URLs (None for a direct identity).
+            rate (float): Requests per second of every identity (0 = unlimited).
+            user_agents (Optional[Sequence[str]]): User agents (assigned in turn; a random
+                one from useragents.json per identity if None).
+            quarantine (float): See IdentityPool.
+            session_factory (Callable[[], Any]): Creates the session of every identity.
+
+        Returns:
+            IdentityPool: The pool.
+        """
+        identities = []
+        for index, proxy in enumerate(proxies):
+            user_agent = (user_agents[index % len(user_agents)] if user_agents
+                          else random_user_agent())
+            identities.append(Identity(proxy or f'direct-{index}', user_agent, proxy, rate,
+                                       session=session_factory()))
+        return cls(identities, quarantine)
+
+    def acquire(self) -> Identity:
+        """
+        Pick the healthy identity that can send soonest and wait for its rate limit.
+
+        Returns:
+            Identity: The identity to send the request with.
+
+        Raises:
+            RateLimited: If all identities are quarantined (retry_after is the time until
+            the first one is released).
+        """
+        with self._lock:
+            now = self._clock()
+            healthy = [identity for identity in self.identities
+                       if identity.quarantined_until <= now]
+            if not healthy:
+                release = min(identity.quarantined_until for identity in self.identities)
+                raise RateLimited('All identities are quarantined', retry_after=release - now)
+            # Rotate the start so identities with equal waits take turns
+            offset = next(self._rotation) % len(healthy)
+            rotated = healthy[offset:] + healthy[:offset]
+            identity = min(rotated, key=lambda candidate: candidate.rate_limiter.available_in())
+            identity.counters['requests'] += 1
+        identity.rate_limiter.acquire()
+        return identity
+
+    def report_rate_limited(self, identity: Identity, retry_after: Optional[float] = None) -> None:
+        """
+        Quarantine an identity that was answered with HTTP 429.
+
+        Args:
+            identity (Identity): The identity.
+            retry_after (Optional[float]): Seconds announced by the upstream.
+        """
+        with self._lock:
+            until = self._clock() + max(self.quarantine, retry_after or 0.0)
+            counters = identity.counters
+            counters['rate_limited'] += 1
+            if identity.quarantined_until < until:
+                if identity.quarantined_until <= self._clock():
+                    counters['quarantined'] += 1
+                identity.quarantined_until = until
+
+    def healthy(self) -> List[Identity]:
+        """
+        Lists the identities that are not quarantined.
+
+        Returns:
+            List[Identity]: The healthy identities.
+        """
+        now = self._clock()
+        with self._lock:
+            return [identity for identity in self.identities if identity.quarantined_until <= now]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Returns the snapshots of all identities.
+
+        Returns:
+            List[Dict[str, Any]]: One snapshot per identity (see Identity.snapshot).
+        """
+        with self._lock:
+            return [identity.snapshot() for identity in self.identities]
@@ -0,0 +1,400 @@
+"""
+Module: Jobs
+
+Copyright 2023 Dominic Kneup.
+Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+"""
+import logging
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from client.api.historic_data import HistoricData
+from client.exceptions.APIClientExceptions import (
+    APIClientException, BaseAPIClientException, UpstreamError
+)
+
+logger = logging.getLogger(__name__)
+
+
+class WindowStatus(Enum):
+    """Enum for backfill window states
+
+    'pending' windows were not fetched yet, 'done' windows were delivered to the sink,
+    'failed' windows ran out of attempts with a retryable error (retried by the next run)
+    and 'skipped' windows failed with a permanent error (e.g. an unknown symbol).
+    """
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+
+@dataclass(frozen=True)
+class BackfillWindow:
+    """
+    A period of one symbol fetched with a single request.
+
+    Attributes:
+        symbol (str): The symbol.
+        start (datetime): Window start.
+        end (datetime): Window end, exclusive.
+    """
+    symbol: str
+    start: datetime
+    end: datetime
+
+
+def split_windows(symbol: str, start: datetime, end: datetime,
+                  window: timedelta = timedelta(days=365)) -> List[BackfillWindow]:
+    """
+    Splits a period into consecutive windows. The same arguments always produce the
+    same windows, so planning a job twice does not add work.
+
+    Args:
+        symbol (str): The symbol.
+        start (datetime): Period start.
+        end (datetime): Period end, exclusive.
+        window (timedelta): Window length.
+
+    Returns:
+        List[BackfillWindow]: The windows in order (the last one may be shorter).
+
+    Raises:
+        APIClientException: If the window length is not positive.
+    """
+    if window <= timedelta(0):
+        raise APIClientException('Backfill window must be positive')
+    windows = []
+    while start < end:
+        windows.append(BackfillWindow(symbol, start, min(start + window, end)))
+        start += window
+    return windows
+
+
+class CheckpointStore:
+    """
+    Progress of backfill windows in a SQLite database.
+
+    Attributes:
+        path (str): Database path (":memory:" keeps the progress in memory only).
+    """
+    schema = '''
+        CREATE TABLE IF NOT EXISTS windows (
+            symbol TEXT NOT NULL,
+            start TEXT NOT NULL,
+            end TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            records INTEGER,
+            error TEXT,
+            updated REAL,
+            PRIMARY KEY (symbol, start, end)
+        )
+    '''
+
+    def __init__(self, path: str = ':memory:'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute(self.schema)
+
+    def add(self, windows: Iterable[BackfillWindow]) -> int:
+        """
+        Adds windows; windows that already exist keep their progress.
+
+        Args:
+            windows (Iterable[BackfillWindow]): The windows.
+
+        Returns:
+            int: Number of new windows.
+        """
+        rows = [(window.symbol, window.start.isoformat(), window.end.isoformat())
+                for window in windows]
+        with self._lock, self._connection:
+            before = self._connection.total_changes
+            self._connection.executemany(
+                'INSERT OR IGNORE INTO windows (symbol, start, end) VALUES (?, ?, ?)', rows)
+            return self._connection.total_changes - before
+
+    def pending(self) -> List[BackfillWindow]:
+        """
+        Lists the windows that still need to be fetched (pending and failed).
+
+        Returns:
+            List[BackfillWindow]: The windows ordered by symbol and start.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT symbol, start, end FROM windows WHERE status IN (?, ?) '
+                'ORDER BY symbol, start',
+                (WindowStatus.PENDING.value, WindowStatus.FAILED.value)).fetchall()
+        return [BackfillWindow(symbol, datetime.fromisoformat(start), datetime.fromisoformat(end))
+                for symbol, start, end in rows]
+
+    def mark(self, window: BackfillWindow, status: WindowStatus, attempts: int = 0,
+             records: Optional[int] = None, error: Optional[str] = None) -> None:
+        """
+        Records the outcome of a window.
+
+        Args:
+            window (BackfillWindow): The window.
+            status (WindowStatus): The new status.
+            attempts (int): Attempts made in this run (added to the total).
+            records (Optional[int]): Records delivered (done windows).
+            error (Optional[str]): The last error (failed and skipped windows).
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                'UPDATE windows SET status = ?, attempts = attempts + ?, records = ?, error = ?, '
+                'updated = ? '
+                'WHERE symbol = ? AND start = ? AND end = ?',
+                (status.value, attempts, records, error, time.time(),
+                 window.symbol, window.start.isoformat(), window.end.isoformat()))
+
+    def status(self, window: BackfillWindow) -> Optional[WindowStatus]:
+        """
+        Get the status of a window.
+
+        Args:
+            window (BackfillWindow): The window.
+
+        Returns:
+            Optional[WindowStatus]: The status or None if the window is unknown.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT status FROM windows WHERE symbol = ? AND start = ? AND end = ?',
+                (window.symbol, window.start.isoformat(), window.end.isoformat())).fetchone()
+        return WindowStatus(row[0]) if row else None
+
+    def progress(self) -> Dict[str, int]:
+        """
+        Counts the windows per status.
+
+        Returns:
+            Dict[str, int]: Window count per status value (all statuses included).
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT status, COUNT(*) FROM windows GROUP BY status').fetchall()
+        counts = dict.fromkeys((status.value for status in WindowStatus), 0)
+        counts.update(rows)
+        return counts
+
+    def reset(self, status: WindowStatus = WindowStatus.SKIPPED) -> int:
+        """
+        Makes windows of a status pending again (e.g. skipped windows after a symbol was fixed).
+
+        Args:
+            status (WindowStatus): The status to reset.
+
+        Returns:
+            int: Number of reset windows.
+        """
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                'UPDATE windows SET status = ?, error = NULL WHERE status = ?',
+                (WindowStatus.PENDING.value, status.value))
+            return cursor.rowcount
+
+    def close(self) -> None:
+        """
+        Close the database.
+        """
+        with self._lock:
+            self._connection.close()
+
+
+@dataclass
+class BackfillReport:
+    """
+    Outcome of a backfill run.
+
+    Attributes:
+        done (int): Windows delivered in this run.
+        failed (int): Windows that ran out of attempts (retried by the next run).
+        skipped (int): Windows with a permanent error.
+        records (int): Records delivered.
+        elapsed (float): Seconds the run took.
+    """
+    done: int = 0
+    failed: int = 0
+    skipped: int = 0
+    records: int = 0
+    elapsed: float = 0.0
+
+
+# Receives a window and its data; must be idempotent because a window delivered right
+# before a crash is delivered again after the restart
+Sink = Callable[[BackfillWindow, Any], None]
+
+
+class BackfillJob:  # pylint: disable=too-many-instance-attributes
+    """
+    Fetches the history of many symbols window by window and persists the progress, so a
+    restarted job only fetches the windows that were not delivered yet.
+
+    Attributes:
+        store (CheckpointStore): Progress of the windows.
+        sink (Sink): Receives the data of every window (e.g. writes it to a file or database).
+        window (timedelta): Window length used by plan.
+        max_attempts (int): Attempts per window and run.
+        backoff (float): Delay before the first retry in seconds, doubled for every attempt.
+        max_backoff (float): Upper bound of the retry delay.
+        workers (int): Windows fetched in parallel (one client per worker thread).
+        output (str): HistoricData output format passed to the sink.
+    """
+    def __init__(self, store: CheckpointStore, sink: Sink, *,
+                 window: timedelta = timedelta(days=365), max_attempts: int = 5,
+                 backoff: float = 1.0, max_backoff: float = 60.0, workers: int = 1,
+                 output: str = 'columns',
+                 client_factory: Callable[[], HistoricData] = HistoricData,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.store = store
+        self.sink = sink
+        self.window = window
+        self.max_attempts = max(max_attempts, 1)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.workers = max(workers, 1)
+        self.output = output
+        self._client_factory = client_factory
+        self._sleep = sleep
+        self._local = threading.local()
+
+    def plan(self, symbols: Sequence[str], start: datetime, end: datetime) -> int:
+        """
+        Adds the windows of a period for every symbol to the store (idempotent).
+
+        Args:
+            symbols (Sequence[str]): The symbols.
+            start (datetime): Period start.
+            end (datetime): Period end, exclusive.
+
+        Returns:
+            int: Number of new windows.
+        """
+        return self.store.add(window for symbol in symbols
+                              for window in split_windows(symbol, start, end, self.window))
+
+    def run(self) -> BackfillReport:
+        """
+        Fetches all pending and failed windows.
+
+        Returns:
+            BackfillReport: The outcome of this run.
+        """
+        report = BackfillReport()
+        lock = threading.Lock()
+        started = time.monotonic()
+
+        def process(window: BackfillWindow) -> None:
+            status, records = self._process(window)
+            with lock:
+                if status == WindowStatus.DONE:
+                    report.done += 1
+                    report.records += records
+                elif status == WindowStatus.FAILED:
+                    report.failed += 1
+                else:
+                    report.skipped += 1
+
+        windows = self.store.pending()
+        if self.workers == 1:
+            for window in windows:
+                process(window)
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                list(executor.map(process, windows))
+        report.elapsed = time.monotonic() - started
+        logger.info("Backfill run finished: %s", report)
+        return report
+
+    def retry_delay(self, attempt: int, error: Exception) -> float:
+        """
+        Computes the delay before the next attempt: exponential backoff with full jitter,
+        but at least the Retry-After announced by the upstream.
+
+        Args:
+            attempt (int): The failed attempt (1-based).
+            error (Exception): The error of the attempt.
+
+        Returns:
+            float: Seconds to wait.
+        """
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+        retry_after = getattr(error, 'retry_after', None)
+        return max(delay, retry_after) if retry_after is not None else delay
+
+    def _process(self, window: BackfillWindow) -> Tuple[WindowStatus, int]:
+        """
+        Fetches one window with retries, delivers it and records the outcome. Errors of the
+        sink are not caught; the window stays pending.
+
+        Args:
+            window (BackfillWindow): The window.
+
+        Returns:
+            Tuple[WindowStatus, int]: The final status and the number of records.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                data = self._client().get_historic_data(window.symbol, window.start, window.end)
+            except UpstreamError as e:
+                if e.retryable and attempt < self.max_attempts:
+                    self._sleep(self.retry_delay(attempt, e))
+                    continue
+                status = WindowStatus.FAILED if e.retryable else WindowStatus.SKIPPED
+                logger.warning("Window %s %s after %d attempts: %s",
+                               window, status.value, attempt, e)
+                self.store.mark(window, status, attempt, error=str(e))
+                return status, 0
+            except BaseAPIClientException as e:
+                logger.warning("Window %s skipped: %s", window, e)
+                self.store.mark(window, WindowStatus.SKIPPED, attempt, error=str(e))
+                return WindowStatus.SKIPPED, 0
+
+            self.sink(window, data)
+            records = self._count(data)
+            self.store.mark(window, WindowStatus.DONE, attempt, records=records)
+            return WindowStatus.DONE, records
+
+    def _client(self) -> HistoricData:
+        """
+        Get the client of the current thread.
+
+        Returns:
+            HistoricData: The client.
+        """
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self._client_factory()
+            client.output = self.output
+        return client
+
+    @staticmethod
+    def _count(data: Any) -> int:
+        """
+        Counts the bars of a HistoricData result.
+
+        Args:
+            data (Any): List of bars, columns, chart output or raw JSON.
+
+        Returns:
+            int: Number of bars (0 for raw JSON).
+        """
+        if isinstance(data, list):
+            return len(data)
+        if isinstance(data, dict):
+            columns = data.get('bars', data)
+            return len(columns.get('timestamp', []))
+        return 0
@@ -0,0 +1,57 @@
+"""
+Module: JsonLoader
+
+Copyright 2023 Dominic Kneup.
+Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+"""
+import json
+import os
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None  # type: ignore[assignment]
+
+JsonInput = Union[str, bytes, bytearray, memoryview]
+
+
+def loads(data: JsonInput) -> Any:
+    """
+    Decodes JSON from str or bytes without building an intermediate str copy.
+
+    Uses orjson if it is installed, otherwise the standard library json module
+    (which also accepts UTF-8 encoded bytes).
+
+    Args:
+        data (JsonInput): The JSON document.
+
+    Returns:
+        Any: The decoded document.
+
+    Raises:
+        json.JSONDecodeError: If the input is not valid JSON (orjson raises a subclass).
+    """
+    if orjson is not None:
+        return orjson.loads(data)  # pylint: disable=no-member
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def dump_file(path: str, data: Any) -> None:
+    """
+    Writes a JSON document to a file, atomically replacing the previous file
+    (missing directories are created).
+
+    Args:
+        path (str): The file path.
+        data (Any): The document.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(data, file, separators=(',', ':'))
+    os.replace(temporary, path)
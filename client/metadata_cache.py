@@ -0,0 +1,98 @@
+"""
+Module: MetadataCache
+
+Copyright 2023 Dominic Kneup.
+Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+"""
+import json
+import os
+from threading import Lock
+from typing import Dict, List, Optional
+from client.api.transformers.historic_data_transformer import ChartMeta
+from client.json_loader import dump_file
+from client.exceptions.APIClientExceptions import APIClientException
+
+
+class MetadataCache:
+    """
+    Latest chart metadata per symbol, kept in memory and optionally persisted as a JSON file.
+
+    Attributes:
+        path (Optional[str]): Path of the JSON file (None keeps the cache in memory only).
+    """
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._entries: Dict[str, ChartMeta] = {}
+        self._lock = Lock()
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def get(self, symbol: str) -> Optional[ChartMeta]:
+        """
+        Get the metadata of a symbol.
+
+        Args:
+            symbol (str): The symbol as returned by the API (e.g. "SAP.DE").
+
+        Returns:
+            Optional[ChartMeta]: The metadata or None if the symbol was not seen yet.
+        """
+        with self._lock:
+            return self._entries.get(symbol.upper())
+
+    def update(self, meta: ChartMeta) -> None:
+        """
+        Store the metadata of a chart response (replacing older metadata of the symbol).
+
+        Args:
+            meta (ChartMeta): The metadata.
+        """
+        with self._lock:
+            self._entries[meta.symbol.upper()] = meta
+
+    def symbols(self) -> List[str]:
+        """
+        Lists the cached symbols.
+
+        Returns:
+            List[str]: The symbols.
+        """
+        with self._lock:
+            return list(self._entries)
+
+    def load(self) -> None:
+        """
+        Load the cache from path.
+
+        Raises:
+            APIClientException: If no path is configured or the file cannot be read.
+        """
+        if self.path is None:
+            raise APIClientException('Metadata cache has no path')
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                stored = json.load(file)
+            entries = {symbol: ChartMeta.from_dict(meta) for symbol, meta in stored.items()}
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            raise APIClientException(f'Failed to read metadata cache {self.path}') from e
+        with self._lock:
+            self._entries = entries
+
+    def save(self) -> None:
+        """
+        Write the cache to path (atomically replacing the previous file).
+
+        Raises:
+            APIClientException: If no path is configured.
+        """
+        if self.path is None:
+            raise APIClientException('Metadata cache has no path')
+        with self._lock:
+            stored = {symbol: meta.as_dict() for symbol, meta in self._entries.items()}
+        dump_file(self.path, stored)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, symbol: str) -> bool:
+        return self.get(symbol) is not None
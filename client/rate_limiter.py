@@ -0,0 +1,62 @@
+"""
+Module: RateLimiter
+
+Copyright 2023 Dominic Kneup.
+Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+"""
+import threading
+import time
+from typing import Callable
+
+
+class RateLimiter:
+    """
+    Token bucket limiting the rate of requests across threads.
+
+    Attributes:
+        rate (float): Requests per second (0 disables the limit).
+        burst (int): Requests that may be sent at once after an idle period.
+    """
+    def __init__(self, rate: float, burst: int = 1,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def available_in(self) -> float:
+        """
+        Seconds until a request may be sent without waiting (nothing is consumed).
+
+        Returns:
+            float: 0 if a token is available.
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            tokens = min(self.burst, self._tokens + (self._clock() - self._updated) * self.rate)
+        return max(0.0, (1 - tokens) / self.rate)
+
+    def acquire(self) -> float:
+        """
+        Wait until a request may be sent.
+
+        Returns:
+            float: Seconds waited.
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            # A negative balance is the wait of this caller; later callers queue behind it
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self._sleep(wait)
+        return wait
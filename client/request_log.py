@@ -0,0 +1,94 @@
+"""
+Module: RequestLog
+
+Copyright 2023 Dominic Kneup.
+Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+"""
+import json
+import logging
+from typing import Any, IO, Optional
+
+# Structured request logs; disabled unless the logger is enabled for INFO (see enable)
+logger = logging.getLogger('client.requests')
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats every record as one JSON object per line: time, level, logger and message
+    plus the fields passed with extra={'fields': {...}}.
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Formats a record.
+
+        Args:
+            record (logging.LogRecord): The record.
+
+        Returns:
+            str: The JSON line.
+        """
+        entry = {
+            'time': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def enabled() -> bool:
+    """
+    Checks if request logs are emitted (cheap, call it before collecting the fields).
+
+    Returns:
+        bool: True if the request logger is enabled for INFO.
+    """
+    return logger.isEnabledFor(logging.INFO)
+
+
+def log_request(url: str, **fields: Any) -> None:
+    """
+    Emits one request log.
+
+    Args:
+        url (str): The request URL (without query string, it may contain the crumb).
+        **fields (Any): Further fields (endpoint, status, latency_ms, bytes, ...).
+    """
+    logger.info('GET %s', url, extra={'fields': {'url': url, **fields}})
+
+
+def enable(stream: Optional[IO[str]] = None, level: int = logging.INFO) -> logging.Handler:
+    """
+    Writes request logs as JSON lines to a stream (they no longer propagate to the root
+    logger). Applications with their own logging setup can instead attach a handler with
+    JsonFormatter to the "client.requests" logger.
+
+    Args:
+        stream (Optional[IO[str]]): The stream (defaults to stderr).
+        level (int): The level of the request logger.
+
+    Returns:
+        logging.Handler: The handler (pass it to disable).
+    """
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    return handler
+
+
+def disable(handler: logging.Handler) -> None:
+    """
+    Removes a handler added by enable; the logger is reset once no handler is left.
+
+    Args:
+        handler (logging.Handler): The handler.
+    """
+    logger.removeHandler(handler)
+    if not logger.handlers:
+        logger.setLevel(logging.NOTSET)
+        logger.propagate = True
@@ -0,0 +1,223 @@
+"""
+Module: ResponseCache
+
+Copyright 2023 Dominic Kneup.
+Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+import requests
+
+CacheKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+@dataclass
+class CachedResponse:
+    """
+    A response body together with the validators needed to revalidate it.
+
+    Attributes:
+        body (bytes): The response body (after content decoding).
+        encoding (str): Character encoding of the body.
+        etag (Optional[str]): Value of the ETag response header.
+        last_modified (Optional[str]): Value of the Last-Modified response header.
+    """
+    body: bytes
+    encoding: str = 'utf-8'
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def size(self) -> int:
+        """
+        Size of the body in bytes.
+        """
+        return len(self.body)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """
+        Build the conditional request headers for this cached response.
+
+        Returns:
+            Dict[str, str]: If-None-Match / If-Modified-Since headers.
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+@dataclass
+class TransferMetrics:
+    """
+    Counters describing how many bytes were transferred and saved.
+
+    Attributes:
+        requests (int): Number of requests sent.
+        revalidations (int): Number of conditional requests sent.
+        not_modified (int): Number of 304 Not Modified answers.
+        bytes_received (int): Bytes received on the wire (before content decoding).
+        bytes_decoded (int): Bytes after content decoding.
+        bytes_saved (int): Bytes served from the cache instead of being downloaded again.
+    """
+    requests: int = 0
+    revalidations: int = 0
+    not_modified: int = 0
+    bytes_received: int = 0
+    bytes_decoded: int = 0
+    bytes_saved: int = 0
+
+    @property
+    def compression_saved(self) -> int:
+        """
+        Bytes saved by transfer encoding (gzip / br).
+
+        Returns:
+            int: Difference between decoded and received bytes.
+        """
+        return max(self.bytes_decoded - self.bytes_received, 0)
+
+    def as_dict(self) -> Dict[str, int]:
+        """
+        Returns the metrics as a dictionary.
+
+        Returns:
+            Dict[str, int]: All counters including compression_saved.
+        """
+        metrics = asdict(self)
+        metrics['compression_saved'] = self.compression_saved
+        return metrics
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache of revalidatable responses, keyed by URL and parameters.
+
+    Attributes:
+        max_entries (int): Maximum number of cached responses.
+    """
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.metrics = TransferMetrics()
+        self._entries: "OrderedDict[CacheKey, CachedResponse]" = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def key(url: str, params: Optional[Any] = None) -> CacheKey:
+        """
+        Build a cache key from URL and request parameters.
+
+        Args:
+            url (str): The request URL.
+            params (Optional[Any]): The request parameters.
+
+        Returns:
+            CacheKey: A hashable, order independent key.
+        """
+        if not params:
+            return url, ()
+        items = params.items() if isinstance(params, dict) else params
+        return url, tuple(sorted((str(name), str(value)) for name, value in items))
+
+    def get(self, key: CacheKey) -> Optional[CachedResponse]:
+        """
+        Get a cached response and mark it as recently used.
+
+        Args:
+            key (CacheKey): The cache key.
+
+        Returns:
+            Optional[CachedResponse]: The cached response or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def store(self, key: CacheKey, response: requests.Response) -> None:
+        """
+        Store a response if the upstream provided an ETag or Last-Modified header.
+
+        Args:
+            key (CacheKey): The cache key.
+            response (requests.Response): The response to store.
+        """
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+
+        entry = CachedResponse(response.content, response.encoding or 'utf-8', etag, last_modified)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_transfer(self, response: requests.Response, conditional: bool) -> None:
+        """
+        Update the transfer metrics for a response.
+
+        Args:
+            response (requests.Response): The received response.
+            conditional (bool): Whether the request was sent with conditional headers.
+        """
+        decoded = len(response.content)
+        received = self.wire_size(response, decoded)
+        with self._lock:
+            self.metrics.requests += 1
+            self.metrics.revalidations += int(conditional)
+            self.metrics.bytes_received += received
+            self.metrics.bytes_decoded += decoded
+
+    def record_not_modified(self, entry: CachedResponse) -> None:
+        """
+        Count a 304 answer that was served from the cache.
+
+        Args:
+            entry (CachedResponse): The revalidated cache entry.
+        """
+        with self._lock:
+            self.metrics.not_modified += 1
+            self.metrics.bytes_saved += entry.size
+
+    def clear(self) -> None:
+        """
+        Remove all cached responses.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def wire_size(response: requests.Response, decoded: int) -> int:
+        """
+        Determine the number of bytes read from the socket.
+
+        Args:
+            response (requests.Response): The received response.
+            decoded (int): Decoded body size used as fallback.
+
+        Returns:
+            int: Bytes received before content decoding.
+        """
+        raw = getattr(response, 'raw', None)
+        tell = getattr(raw, 'tell', None)
+        if callable(tell):
+            try:
+                read = tell()
+                if isinstance(read, int) and read > 0:
+                    return read
+            except (OSError, ValueError):
+                pass
+        content_length = response.headers.get('Content-Length')
+        if content_length and content_length.isdigit():
+            return int(content_length)
+        return decoded
@@ -0,0 +1,339 @@
+"""
+Module: SymbolRegistry
+
+Copyright 2023 Dominic Kneup.
+Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+"""
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from client.json_loader import dump_file, loads
+from client.api.validators.quote_validator import QuoteValidator
+from client.exceptions.APIClientExceptions import APIClientException, ValidatorException
+
+logger = logging.getLogger(__name__)
+
+# Yahoo symbols: letters, digits and the separators used by exchange suffixes (".DE"),
+# currency / crypto pairs ("EURUSD=X", "BTC-USD"), indices ("^GSPC") and share classes ("BRK-B")
+SYMBOL_PATTERN = re.compile(r'^[A-Z0-9^][A-Z0-9.\-=^&]*$')
+
+
+def normalize_symbol(symbol: str) -> str:
+    """
+    Normalizes a symbol to the form used by the API (trimmed, upper case).
+
+    Args:
+        symbol (str): The symbol (e.g. " sap.de ").
+
+    Returns:
+        str: The normalized symbol (e.g. "SAP.DE").
+
+    Raises:
+        ValidatorException: If the symbol is empty or contains invalid characters.
+    """
+    normalized = symbol.strip().upper() if isinstance(symbol, str) else ''
+    if not SYMBOL_PATTERN.match(normalized):
+        raise ValidatorException(f'Invalid symbol: {symbol!r}')
+    return normalized
+
+
+def normalize_symbols(symbols: Iterable[str], invalid: Optional[List[Any]] = None) -> List[str]:
+    """
+    Normalizes and deduplicates symbols, keeping the first occurrence order.
+    Blank entries are skipped, so are malformed symbols (logged as a warning), so one
+    bad ticker does not abort a request for the others.
+
+    Args:
+        symbols (Iterable[str]): The symbols.
+        invalid (Optional[List[Any]]): Receives the malformed symbols as given.
+
+    Returns:
+        List[str]: The normalized, unique symbols.
+    """
+    unique: Dict[str, None] = {}
+    for symbol in symbols:
+        if isinstance(symbol, str) and not symbol.strip():
+            continue
+        try:
+            unique.setdefault(normalize_symbol(symbol), None)
+        except ValidatorException:
+            logger.warning("Skipping invalid symbol %r", symbol)
+            if invalid is not None:
+                invalid.append(symbol)
+    return list(unique)
+
+
+@dataclass
+class SymbolInfo:
+    """
+    What is known about a symbol.
+
+    Attributes:
+        symbol (str): The normalized symbol.
+        valid (bool): False if the API reported the symbol as unknown or delisted.
+        exchange_timezone_name (Optional[str]): Exchange timezone (e.g. "America/New_York").
+        first_trade_date (Optional[int]): First trade date in milliseconds since the epoch.
+        full_exchange_name (Optional[str]): Exchange name (e.g. "NYSE").
+        quote_type (Optional[str]): Instrument type (e.g. "EQUITY" or "CRYPTOCURRENCY").
+        last_seen (float): Unix time of the last update.
+    """
+    symbol: str
+    valid: bool = True
+    exchange_timezone_name: Optional[str] = None
+    first_trade_date: Optional[int] = None
+    full_exchange_name: Optional[str] = None
+    quote_type: Optional[str] = None
+    last_seen: float = 0.0
+
+
+class SymbolRegistry:
+    """
+    Index of known-valid and known-invalid symbols with their last seen metadata,
+    optionally persisted as a JSON file.
+
+    Invalid marks expire after invalid_ttl seconds, so a temporary upstream error does
+    not block a symbol for good; clear_invalid removes them earlier.
+
+    Attributes:
+        path (Optional[str]): Path of the JSON index (None keeps it in memory only).
+        invalid_ttl (Optional[float]): Seconds a symbol stays known-invalid (None: forever).
+    """
+    version = 1
+
+    def __init__(self, path: Optional[str] = None, invalid_ttl: Optional[float] = 86400.0,
+                 clock: Callable[[], float] = time.time):
+        self.path = path
+        self.invalid_ttl = invalid_ttl
+        self._clock = clock
+        self._symbols: Dict[str, SymbolInfo] = {}
+        self._lock = Lock()
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def get(self, symbol: str) -> Optional[SymbolInfo]:
+        """
+        Get the entry of a symbol.
+
+        Args:
+            symbol (str): The symbol (normalized before the lookup).
+
+        Returns:
+            Optional[SymbolInfo]: The entry or None if the symbol is unknown.
+        """
+        with self._lock:
+            return self._symbols.get(normalize_symbol(symbol))
+
+    def is_known_invalid(self, symbol: str) -> bool:
+        """
+        Checks if the API reported the symbol as invalid.
+
+        Args:
+            symbol (str): The symbol.
+
+        Returns:
+            bool: True if the symbol is known to be invalid and the mark has not expired.
+        """
+        info = self.get(symbol)
+        return info is not None and self._is_invalid(info)
+
+    def is_known_valid(self, symbol: str) -> bool:
+        """
+        Checks if the symbol was seen in a valid response.
+
+        Args:
+            symbol (str): The symbol.
+
+        Returns:
+            bool: True if the symbol is known to be valid.
+        """
+        info = self.get(symbol)
+        return info is not None and info.valid
+
+    def filter(self, symbols: Iterable[str]) -> List[str]:
+        """
+        Normalizes and deduplicates symbols and removes the known-invalid ones.
+
+        Args:
+            symbols (Iterable[str]): The symbols.
+
+        Returns:
+            List[str]: The symbols worth requesting.
+        """
+        with self._lock:
+            return [symbol for symbol in normalize_symbols(symbols)
+                    if symbol not in self._symbols or not self._is_invalid(self._symbols[symbol])]
+
+    def mark_invalid(self, symbol: str) -> None:
+        """
+        Marks a symbol as invalid (unknown or delisted).
+
+        Args:
+            symbol (str): The symbol.
+        """
+        symbol = normalize_symbol(symbol)
+        with self._lock:
+            info = self._symbols.setdefault(symbol, SymbolInfo(symbol))
+            info.valid = False
+            info.last_seen = self._clock()
+
+    def clear_invalid(self, symbol: Optional[str] = None) -> int:
+        """
+        Removes invalid marks, e.g. after an upstream outage answered with errors.
+
+        Args:
+            symbol (Optional[str]): The symbol (None clears all invalid marks).
+
+        Returns:
+            int: Number of removed marks.
+        """
+        with self._lock:
+            if symbol is None:
+                invalid = [name for name, info in self._symbols.items() if not info.valid]
+            else:
+                name = normalize_symbol(symbol)
+                info = self._symbols.get(name)
+                invalid = [name] if info is not None and not info.valid else []
+            for name in invalid:
+                del self._symbols[name]
+            return len(invalid)
+
+    def record_quote(self, quote: Dict[str, Any]) -> None:
+        """
+        Marks the symbol of a validated quote as valid and stores its metadata.
+
+        Args:
+            quote (Dict[str, Any]): A single quote result (raw or flattened).
+        """
+        symbol = normalize_symbol(quote['symbol'])
+        first_trade_date = quote.get('firstTradeDateMilliseconds')
+        if isinstance(first_trade_date, dict):
+            first_trade_date = first_trade_date.get('raw')
+        with self._lock:
+            info = self._symbols.setdefault(symbol, SymbolInfo(symbol))
+            info.valid = True
+            info.exchange_timezone_name = quote.get('exchangeTimezoneName',
+                                                    info.exchange_timezone_name)
+            info.full_exchange_name = quote.get('fullExchangeName', info.full_exchange_name)
+            info.quote_type = quote.get('quoteType', info.quote_type)
+            if first_trade_date is not None:
+                info.first_trade_date = int(first_trade_date)
+            info.last_seen = self._clock()
+
+    def record_response(self, data: Any, requested: Iterable[str] = ()) -> List[str]:
+        """
+        Updates the index from a quote API response. Responses that fail QuoteValidator
+        are ignored; requested symbols missing from a valid (or empty) response are
+        marked invalid.
+
+        Args:
+            data (Any): The quote response (raw JSON or decoded).
+            requested (Iterable[str]): The symbols of the request.
+
+        Returns:
+            List[str]: The symbols marked valid.
+        """
+        if isinstance(data, (str, bytes, bytearray, memoryview)):
+            data = loads(data)
+        quotes, error = QuoteValidator.plan().entries(data)
+        if error is not None and quotes is None and self._is_empty_result(data):
+            quotes = []
+        elif error is not None or QuoteValidator.collect_errors(data):
+            return []
+
+        seen = []
+        for quote in quotes or []:
+            self.record_quote(quote)
+            seen.append(normalize_symbol(quote['symbol']))
+        for symbol in normalize_symbols(requested):
+            if symbol not in seen:
+                self.mark_invalid(symbol)
+        return seen
+
+    def clamp_start_date(self, symbol: str, start_date: datetime) -> datetime:
+        """
+        Moves a start date forward to the first trade date of the symbol.
+
+        Args:
+            symbol (str): The symbol.
+            start_date (datetime): The requested start date (naive dates are local time).
+
+        Returns:
+            datetime: The later of start_date and the first trade date.
+        """
+        info = self.get(symbol)
+        if info is None or info.first_trade_date is None:
+            return start_date
+        first_trade = datetime.fromtimestamp(info.first_trade_date / 1000, tz=start_date.tzinfo)
+        return max(start_date, first_trade)
+
+    def load(self) -> None:
+        """
+        Load the index from path.
+
+        Raises:
+            APIClientException: If no path is configured or the index cannot be read.
+        """
+        if self.path is None:
+            raise APIClientException('Symbol registry has no path')
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                stored = json.load(file)
+            symbols = {symbol: SymbolInfo(**entry) for symbol, entry in stored['symbols'].items()}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise APIClientException(f'Failed to read symbol registry {self.path}') from e
+        with self._lock:
+            self._symbols = symbols
+
+    def save(self) -> None:
+        """
+        Write the index to path (atomically replacing the previous file).
+
+        Raises:
+            APIClientException: If no path is configured.
+        """
+        if self.path is None:
+            raise APIClientException('Symbol registry has no path')
+        with self._lock:
+            stored = {'version': self.version,
+                      'symbols': {symbol: asdict(info) for symbol, info in self._symbols.items()}}
+        dump_file(self.path, stored)
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return self.get(symbol) is not None
+
+    def _is_invalid(self, info: SymbolInfo) -> bool:
+        """
+        Checks if an entry is an unexpired invalid mark.
+
+        Args:
+            info (SymbolInfo): The entry.
+
+        Returns:
+            bool: True if the symbol is invalid and the mark is younger than invalid_ttl.
+        """
+        if info.valid:
+            return False
+        return self.invalid_ttl is None or self._clock() - info.last_seen < self.invalid_ttl
+
+    @staticmethod
+    def _is_empty_result(data: Any) -> bool:
+        """
+        Checks if a response is a well-formed quote response without results.
+
+        Args:
+            data (Any): The decoded response.
+
+        Returns:
+            bool: True for {"quoteResponse": {"result": []}}.
+        """
+        response = data.get('quoteResponse') if isinstance(data, dict) else None
+        return isinstance(response, dict) and response.get('result') == []
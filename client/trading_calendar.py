@@ -0,0 +1,278 @@
+"""
+Module: TradingCalendar
+
+Copyright 2023 Dominic Kneup.
+Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+"""
+import logging
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Callable, FrozenSet, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+logger = logging.getLogger(__name__)
+
+
+# Full-day closures of the NYSE that do not follow the holiday rules, listed from 2001
+# (earlier closures, e.g. for national days of mourning, are treated as sessions)
+NYSE_SPECIAL_CLOSURES: FrozenSet[date] = frozenset([
+    date(2001, 9, 11), date(2001, 9, 12), date(2001, 9, 13), date(2001, 9, 14),
+    date(2004, 6, 11),
+    date(2007, 1, 2),
+    date(2012, 10, 29), date(2012, 10, 30),
+    date(2018, 12, 5),
+    date(2025, 1, 9),
+])
+
+# Instrument types (instrumentType of the chart meta) that trade in exchange sessions;
+# other instruments (e.g. crypto, futures, currencies) may trade around the clock
+EXCHANGE_TRADED_TYPES: FrozenSet[str] = frozenset(['EQUITY', 'ETF', 'MUTUALFUND', 'INDEX'])
+
+WEEKDAYS: FrozenSet[int] = frozenset(range(5))
+ALL_DAYS: FrozenSet[int] = frozenset(range(7))
+
+
+def easter_sunday(year: int) -> date:
+    """
+    Computes Easter Sunday (Gregorian calendar, anonymous algorithm).
+
+    Args:
+        year (int): The year.
+
+    Returns:
+        date: Easter Sunday of the year.
+    """
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    weekday = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * weekday) // 451
+    month, day = divmod(h + weekday - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """
+    Computes the n-th weekday of a month (n = -1 for the last one).
+
+    Args:
+        year (int): The year.
+        month (int): The month.
+        weekday (int): The weekday (0 = Monday).
+        n (int): 1-based occurrence or -1 for the last occurrence.
+
+    Returns:
+        date: The date.
+    """
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = (date(year, month + 1, 1) if month < 12 else date(year + 1, 1, 1)) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def observed(day: date) -> date:
+    """
+    Moves a holiday on a Saturday to Friday and on a Sunday to Monday.
+
+    Args:
+        day (date): The holiday.
+
+    Returns:
+        date: The observed holiday.
+    """
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=256)
+def nyse_holidays(year: int) -> FrozenSet[date]:
+    """
+    Computes the full-day NYSE holidays of a year. Special closures are only known
+    from 2001 (see NYSE_SPECIAL_CLOSURES).
+
+    Args:
+        year (int): The year.
+
+    Returns:
+        FrozenSet[date]: The holidays (including special closures).
+    """
+    holidays = {
+        nth_weekday(year, 2, 0, 3),                 # Washington's Birthday
+        easter_sunday(year) - timedelta(days=2),    # Good Friday
+        nth_weekday(year, 5, 0, -1),                # Memorial Day
+        observed(date(year, 7, 4)),                 # Independence Day
+        nth_weekday(year, 9, 0, 1),                 # Labor Day
+        nth_weekday(year, 11, 3, 4),                # Thanksgiving
+        observed(date(year, 12, 25)),               # Christmas
+    }
+    new_year = date(year, 1, 1)
+    # A New Year's Day on a Saturday is not observed on the Friday before
+    if new_year.weekday() != 5:
+        holidays.add(observed(new_year))
+    if year >= 1998:
+        holidays.add(nth_weekday(year, 1, 0, 3))    # Martin Luther King Jr. Day
+    if year >= 2022:
+        holidays.add(observed(date(year, 6, 19)))   # Juneteenth
+    holidays.update(day for day in NYSE_SPECIAL_CLOSURES if day.year == year)
+    return frozenset(holidays)
+
+
+class TradingCalendar:
+    """
+    Trading sessions of an exchange.
+
+    Attributes:
+        timezone (ZoneInfo): Exchange timezone (UTC if the name is unknown or empty).
+        open_time (time): Session open in exchange time.
+        close_time (time): Session close in exchange time.
+        holidays (Callable[[int], FrozenSet[date]]): Full-day holidays per year.
+        trading_days (FrozenSet[int]): Weekdays with sessions (0 = Monday).
+    """
+    def __init__(self, timezone: str = 'America/New_York',
+                 open_time: time = time(9, 30), close_time: time = time(16, 0),
+                 holidays: Callable[[int], FrozenSet[date]] = lambda year: frozenset(),
+                 trading_days: FrozenSet[int] = WEEKDAYS):
+        try:
+            self.timezone = ZoneInfo(timezone)
+        except (ZoneInfoNotFoundError, ValueError):
+            logger.warning("Unknown timezone %r, using UTC", timezone)
+            self.timezone = ZoneInfo('UTC')
+        self.open_time = open_time
+        self.close_time = close_time
+        self.holidays = holidays
+        self.trading_days = trading_days
+
+    @classmethod
+    def for_timezone(cls, timezone_name: Optional[str],
+                     instrument_type: Optional[str] = None) -> 'TradingCalendar':
+        """
+        Get the calendar for an exchange timezone (exchangeTimezoneName of the chart meta).
+        Sessions are only known for exchange-traded instruments (EXCHANGE_TRADED_TYPES):
+        New York uses the NYSE holidays and hours, other exchanges trade all day on weekdays.
+        Every day is a session of other or unknown instruments and of unknown exchanges
+        (naive datetimes are then taken as New York time), so no period is skipped.
+
+        Args:
+            timezone_name (Optional[str]): The exchange timezone (None if unknown).
+            instrument_type (Optional[str]): The instrument type (None if unknown).
+
+        Returns:
+            TradingCalendar: The (shared) calendar.
+        """
+        if timezone_name is None:
+            return _calendar_for('America/New_York', False)
+        return _calendar_for(timezone_name, instrument_type in EXCHANGE_TRADED_TYPES)
+
+    def is_session(self, day: date) -> bool:
+        """
+        Checks if a day is a trading day.
+
+        Args:
+            day (date): The day.
+
+        Returns:
+            bool: True on trading days that are not holidays.
+        """
+        return day.weekday() in self.trading_days and day not in self.holidays(day.year)
+
+    def sessions(self, start: date, end: date) -> List[date]:
+        """
+        Lists the trading days between two days (both inclusive).
+
+        Args:
+            start (date): First day.
+            end (date): Last day.
+
+        Returns:
+            List[date]: The trading days in order.
+        """
+        days = (end - start).days + 1
+        return [day for day in (start + timedelta(days=offset) for offset in range(max(days, 0)))
+                if self.is_session(day)]
+
+    def localize(self, moment: datetime) -> datetime:
+        """
+        Converts a datetime to exchange time; naive datetimes are taken as exchange time.
+
+        Args:
+            moment (datetime): The datetime.
+
+        Returns:
+            datetime: The aware datetime in exchange time.
+        """
+        if moment.tzinfo is None:
+            return moment.replace(tzinfo=self.timezone)
+        return moment.astimezone(self.timezone)
+
+    def now(self) -> datetime:
+        """
+        Current time at the exchange.
+
+        Returns:
+            datetime: The aware current datetime in exchange time.
+        """
+        return datetime.now(self.timezone)
+
+    def resolve_range(self, start: datetime, end: datetime) -> Optional[Tuple[datetime, datetime]]:
+        """
+        Aligns a period to session days: the result starts at midnight of the first
+        session that closes after start and ends at midnight after the last session
+        that opens before end (exchange time). Aligned periods produce the same request
+        parameters for the same sessions, so cached responses are hit reliably.
+
+        Args:
+            start (datetime): Period start (naive datetimes are exchange time).
+            end (datetime): Period end, exclusive (naive datetimes are exchange time).
+
+        Returns:
+            Optional[Tuple[datetime, datetime]]: The aligned period or None if the period
+            contains no session.
+        """
+        start, end = self.localize(start), self.localize(end)
+        sessions = [day for day in self.sessions(start.date(), end.date())
+                    if self._at(day, self.close_time) > start
+                    and self._at(day, self.open_time) < end]
+        if not sessions:
+            return None
+        return self._at(sessions[0], time()), self._at(sessions[-1] + timedelta(days=1), time())
+
+    def _at(self, day: date, moment: time) -> datetime:
+        """
+        Combines a day and a time of day in exchange time.
+
+        Args:
+            day (date): The day.
+            moment (time): The time of day.
+
+        Returns:
+            datetime: The aware datetime.
+        """
+        return datetime.combine(day, moment, tzinfo=self.timezone)
+
+
+@lru_cache(maxsize=64)
+def _calendar_for(timezone_name: str, exchange_traded: bool) -> TradingCalendar:
+    """
+    Creates the calendar of an exchange timezone once.
+
+    Args:
+        timezone_name (str): The exchange timezone.
+        exchange_traded (bool): The instrument trades in exchange sessions.
+
+    Returns:
+        TradingCalendar: The calendar.
+    """
+    if not exchange_traded:
+        return TradingCalendar(timezone_name, open_time=time(0), close_time=time.max,
+                               trading_days=ALL_DAYS)
+    if timezone_name in ('America/New_York', 'US/Eastern', 'EST5EDT'):
+        return TradingCalendar(timezone_name, holidays=nyse_holidays)
+    # Session hours of other exchanges are unknown, any bar of a weekday counts
+    return TradingCalendar(timezone_name, open_time=time(0), close_time=time.max)
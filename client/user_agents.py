@@ -0,0 +1,47 @@
+"""
+Module: UserAgents
+
+Copyright 2023 Dominic Kneup.
+Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+"""
+import json
+import os
+import random
+from client.exceptions.APIClientExceptions import APIClientException, BaseAPIClientException
+
+
+def random_user_agent() -> str:
+    """
+    Picks a random user agent from the useragents.json file (shared by ApiClient and the
+    identities of an IdentityPool).
+
+    Returns:
+        str: A user agent string.
+
+    Raises:
+        BaseAPIClientException: If the file cannot be read or contains no user agents.
+    """
+    try:
+        file_path = os.path.join(os.path.dirname(__file__), 'data/useragents.json')
+
+        if not os.path.exists(file_path) or not os.access(file_path, os.R_OK):
+            raise APIClientException('Failed to read useragents.json file')
+
+        with open(file_path, encoding='utf-8') as file:
+            user_agents_json = file.read()
+
+        if not user_agents_json:
+            raise APIClientException('Failed to read useragents.json file')
+
+        user_agents = json.loads(user_agents_json)
+
+        if not isinstance(user_agents, list):
+            raise APIClientException('Failed to decode useragents.json')
+
+        if not user_agents:
+            raise APIClientException('No user agents found in useragents.json')
+
+    except Exception as e:
+        raise BaseAPIClientException(f'An error occurred: {str(e)}') from e
+
+    return random.choice(user_agents)
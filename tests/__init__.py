@@ -6,6 +6,7 @@ from tests.validators.test_historic_data_validator import HistoricDataValidatorT
 from tests.validators.test_quote_validator import TestQuoteValidator
 from tests.validators.test_similar_securities_validator import TestSimilarSecuritiesValidator
 from .validators.test_validator import TestValidator
+from .validators.test_validation_plan import TestValidationPlan
 
 # Import Transformer Tests
 from .transformers.test_historic_data_transformer import TestHistoricDataTransformer
@@ -13,8 +14,30 @@ from .transformers.test_quote_transformer import TestQuoteTransformer
 from .transformers.test_similar_securities_transformer import TestSimilarSecuritiesTransformer
 from .transformers.test_transformer import TestTransformer
 
+# Import Analytics Tests
+from .analytics.test_series import TestSeries
+
 # Import api Tests ()
 from .api.test_crumb import TestCrumb
 from .api.test_similar_securities import TestSimilarSecurities
 from .api.test_quote import TestQuote
-from .api.test_historic_data import TestHistoricData
\ No newline at end of file
+from .api.test_historic_data import TestHistoricData
+# Import Client Tests
+from .client.test_response_cache import TestResponseCache
+from .client.test_cassette import TestCassette
+from .client.test_api_client import TestApiClient
+from .client.test_circuit_breaker import TestCircuitBreaker
+from .client.test_symbol_registry import TestSymbolRegistry
+from .client.test_trading_calendar import TestTradingCalendar
+from .client.test_metadata_cache import TestMetadataCache
+from .client.test_bulk_quotes import TestBulkQuotes
+from .client.test_downloader import TestDownloader
+from .client.test_jobs import TestBackfillJob
+from .client.test_identity_pool import TestIdentityPool
+from .client.test_config import TestSettings
+from .client.test_thread_safety import TestThreadSafety
+from .client.test_request_log import TestRequestLog
+from .analytics.test_adjustments import TestAdjustments
+from .analytics.test_resample import TestResample
+from .client.test_bar_archive import TestBarArchive
+from .transformers.test_batch import TestBatch
@@ -0,0 +1 @@
+# tests/analytics/__init__.py
\ No newline at end of file
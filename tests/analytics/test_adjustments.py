@@ -0,0 +1,114 @@
+# Copyright 2023 Dominic Kneup.
+# Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+import unittest
+import numpy as np
+from parameterized import parameterized
+from client.analytics import adjustments
+from client.exceptions.APIClientExceptions import TransformerException
+
+DAY = 86400
+
+
+def make_chart(closes, splits=(), dividends=(), capital_gains=(), start=0):
+    timestamps = [start + index * DAY for index in range(len(closes))]
+
+    def table(events, *fields):
+        return {'timestamp': [event[0] for event in events],
+                **{field: [event[index + 1] for event in events] for index, field in enumerate(fields)}}
+
+    return {
+        'bars': {
+            'timestamp': timestamps,
+            'open': list(closes), 'low': [close - 1 for close in closes],
+            'high': [close + 1 for close in closes], 'close': list(closes),
+            'adjclose': list(closes), 'volume': [100] * len(closes),
+        },
+        'events': {
+            'dividends': table(dividends, 'amount'),
+            'splits': table(splits, 'numerator', 'denominator'),
+            'capitalGains': table(capital_gains, 'amount'),
+        },
+    }
+
+
+class TestAdjustments(unittest.TestCase):
+    def test_dividend(self):
+        adjusted = adjustments.adjust(make_chart([10.0, 10.0, 10.0], dividends=[(2 * DAY, 1.0)]))
+        np.testing.assert_allclose(adjusted['factor'], [0.9, 0.9, 1.0])
+        np.testing.assert_allclose(adjusted['close'], [9.0, 9.0, 10.0])
+        np.testing.assert_allclose(adjusted['high'], [9.9, 9.9, 11.0])
+        np.testing.assert_array_equal(adjusted['volume'], [100, 100, 100])
+
+    def test_split_of_raw_bars(self):
+        chart = make_chart([40.0, 40.0, 20.0, 20.0], splits=[(2 * DAY, 2, 1)], dividends=[(3 * DAY, 2.0)])
+        adjusted = adjustments.adjust(chart, split_adjusted=False)
+        np.testing.assert_allclose(adjusted['close'], [18.0, 18.0, 18.0, 20.0])
+        np.testing.assert_array_equal(adjusted['volume'], [200, 200, 100, 100])
+
+    def test_split_adjusted_bars_are_not_split_again(self):
+        chart = make_chart([20.0, 20.0, 20.0], splits=[(DAY, 2, 1)])
+        adjusted = adjustments.adjust(chart)
+        np.testing.assert_allclose(adjusted['close'], [20.0, 20.0, 20.0])
+        np.testing.assert_array_equal(adjusted['volume'], [100, 100, 100])
+
+    @parameterized.expand([
+        ('before_first_bar', [(-DAY, 1.0)], [1.0, 1.0]),
+        ('after_last_bar', [(5 * DAY, 1.0)], [0.9, 0.9]),
+        ('above_price', [(DAY, 20.0)], [1.0, 1.0]),
+    ])
+    def test_dividend_edge_cases(self, _, dividends, expected):
+        adjusted = adjustments.adjust(make_chart([10.0, 10.0], dividends=dividends))
+        np.testing.assert_allclose(adjusted['factor'], expected)
+
+    def test_capital_gains(self):
+        chart = make_chart([10.0, 10.0], dividends=[(DAY, 1.0)], capital_gains=[(DAY, 1.0)])
+        np.testing.assert_allclose(adjustments.adjust(chart)['factor'], [0.81, 1.0])
+        np.testing.assert_allclose(adjustments.adjust(chart, include_capital_gains=False)['factor'], [0.9, 1.0])
+
+    def test_cache_reuses_factors(self):
+        cache = adjustments.AdjustmentCache()
+        chart = make_chart([10.0, 10.0, 10.0], dividends=[(2 * DAY, 1.0)])
+        first = cache.adjust(chart, 'AAPL')
+        second = cache.adjust(chart, 'AAPL')
+        np.testing.assert_allclose(first['close'], second['close'])
+        self.assertEqual({'reused': 1, 'incremental': 0, 'full': 1}, cache.counters)
+
+    @parameterized.expand([
+        ('new_action', ([10.0] * 4, [(2 * DAY, 1.0)]), ([10.0] * 4, [(2 * DAY, 1.0), (DAY, 0.5)]), 'incremental'),
+        ('appended_bars', ([10.0] * 3, [(2 * DAY, 1.0)]),
+         ([10.0, 10.0, 10.0, 12.0, 12.0], [(2 * DAY, 1.0), (4 * DAY, 1.2)]), 'incremental'),
+        ('action_after_cached_bars', ([10.0] * 3, [(5 * DAY, 2.0)]),
+         ([10.0, 10.0, 10.0, 11.0, 12.0, 11.0], [(5 * DAY, 2.0)]), 'full'),
+        ('removed_action', ([10.0] * 4, [(2 * DAY, 1.0)]), ([10.0] * 4, []), 'full'),
+        ('revised_close', ([10.0] * 4, [(2 * DAY, 1.0)]), ([9.0, 10.0, 10.0, 10.0], [(2 * DAY, 1.0)]), 'full'),
+        ('revised_last_close', ([10.0] * 3, [(5 * DAY, 1.0)]), ([10.0, 10.0, 8.0], [(5 * DAY, 1.0)]), 'full'),
+    ])
+    def test_cache_update_matches_full_computation(self, _, cached, updated, expected):
+        cache = adjustments.AdjustmentCache()
+        cache.adjust(make_chart(cached[0], dividends=cached[1]), 'AAPL')
+        chart = make_chart(updated[0], dividends=updated[1])
+        actual = cache.adjust(chart, 'AAPL')
+        np.testing.assert_allclose(adjustments.adjust(chart)['close'], actual['close'])
+        self.assertEqual(1 + (expected == 'full'), cache.counters[expected])
+
+    def test_moved_window_is_recomputed(self):
+        cache = adjustments.AdjustmentCache()
+        cache.adjust(make_chart([10.0, 10.0, 10.0]), 'AAPL')
+        chart = make_chart([10.0, 10.0, 10.0], dividends=[(2 * DAY, 1.0)], start=DAY)
+        np.testing.assert_allclose(cache.adjust(chart, 'AAPL')['factor'], [0.9, 1.0, 1.0])
+        self.assertEqual(2, cache.counters['full'])
+
+    def test_cache_is_bounded(self):
+        cache = adjustments.AdjustmentCache(max_symbols=2)
+        for symbol in ('A', 'B', 'C'):
+            cache.adjust(make_chart([10.0]), symbol)
+        self.assertEqual(2, len(cache))
+        self.assertNotIn('A', cache)
+
+    def test_symbol_required_without_meta(self):
+        with self.assertRaises(TransformerException):
+            adjustments.AdjustmentCache().adjust(make_chart([10.0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+# Copyright 2023 Dominic Kneup.
+# Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+import unittest
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+import numpy as np
+from parameterized import parameterized
+from client.analytics import resample
+from client.exceptions.APIClientExceptions import TransformerException
+
+NEW_YORK = ZoneInfo('America/New_York')
+
+
+def stamp(*args, zone=NEW_YORK):
+    return int(datetime(*args, tzinfo=zone).timestamp())
+
+
+def daily_bars(days):
+    count = len(days)
+    return {
+        'timestamp': [stamp(year, month, day, 9, 30) for year, month, day in days],
+        'open': [float(index + 1) for index in range(count)],
+        'high': [float(index + 2) for index in range(count)],
+        'low': [float(index) for index in range(count)],
+        'close': [index + 1.5 for index in range(count)],
+        'volume': [10] * count,
+    }
+
+
+class TestResample(unittest.TestCase):
+    def setUp(self):
+        # Mon 2023-10-30 to Tue 2023-11-07, DST ends on Sun 2023-11-05
+        self.bars = daily_bars([(2023, 10, 30), (2023, 10, 31), (2023, 11, 1), (2023, 11, 2),
+                                (2023, 11, 3), (2023, 11, 6), (2023, 11, 7)])
+
+    def test_weekly(self):
+        weekly = resample.resample(self.bars, '1wk', 'America/New_York')
+        self.assertEqual([stamp(2023, 10, 30), stamp(2023, 11, 6)], weekly['timestamp'].tolist())
+        np.testing.assert_allclose(weekly['open'], [1.0, 6.0])
+        np.testing.assert_allclose(weekly['high'], [6.0, 8.0])
+        np.testing.assert_allclose(weekly['low'], [0.0, 5.0])
+        np.testing.assert_allclose(weekly['close'], [5.5, 7.5])
+        np.testing.assert_allclose(weekly['volume'], [50, 20])
+        self.assertEqual([5, 2], weekly['count'].tolist())
+
+    @parameterized.expand([
+        ('1mo', [(2023, 10, 1), (2023, 11, 1)], [2, 5]),
+        ('1y', [(2023, 1, 1)], [7]),
+        ('2d', [(2023, 10, 30), (2023, 11, 1), (2023, 11, 3), (2023, 11, 5), (2023, 11, 7)], [2, 2, 1, 1, 1]),
+    ])
+    def test_calendar_buckets(self, rule, starts, counts):
+        result = resample.resample(self.bars, rule, NEW_YORK)
+        self.assertEqual([stamp(*start) for start in starts], result['timestamp'].tolist())
+        self.assertEqual(counts, result['count'].tolist())
+
+    def test_timezone_moves_boundaries(self):
+        # 20:00 in New York is already the next day in UTC
+        bars = {'timestamp': [stamp(2023, 10, 31, 20, 0), stamp(2023, 11, 1, 10, 0)],
+                'close': [1.0, 2.0]}
+        self.assertEqual([2], resample.resample(bars, '1mo', 'UTC')['count'].tolist())
+        self.assertEqual([1, 1], resample.resample(bars, '1mo', 'America/New_York')['count'].tolist())
+        self.assertEqual([2], resample.resample(bars, '1d', 'UTC')['count'].tolist())
+        self.assertEqual([1, 1], resample.resample(bars, '1d', 'America/New_York')['count'].tolist())
+
+    def test_session_offset(self):
+        # sessions from 18:00 to 18:00 (e.g. futures) are labelled with their start
+        bars = {'timestamp': [stamp(2023, 11, 1, 17, 0), stamp(2023, 11, 1, 19, 0), stamp(2023, 11, 2, 9, 0)],
+                'close': [1.0, 2.0, 3.0]}
+        result = resample.resample(bars, '1d', NEW_YORK, offset=timedelta(hours=-6))
+        self.assertEqual([stamp(2023, 10, 31, 18, 0), stamp(2023, 11, 1, 18, 0)], result['timestamp'].tolist())
+        np.testing.assert_allclose(result['close'], [1.0, 3.0])
+
+    def test_repeated_hour_is_not_merged(self):
+        # 01:00 to 02:00 happens twice on 2023-11-05 in New York
+        first = stamp(2023, 11, 5, 5, 30, zone=timezone.utc)
+        bars = {'timestamp': [first, first + 1800, first + 3600, first + 5400], 'close': [1.0, 2.0, 3.0, 4.0]}
+        result = resample.resample(bars, '1h', NEW_YORK)
+        self.assertEqual([1, 2, 1], result['count'].tolist())
+        self.assertEqual([first - 1800, first + 1800, first + 5400], result['timestamp'].tolist())
+
+    def test_gaps_are_skipped(self):
+        bars = {'timestamp': [stamp(2023, 11, day, 9, 30) for day in (6, 7, 8)],
+                'open': [np.nan, 2.0, 3.0], 'high': [np.nan, 5.0, 4.0], 'low': [1.0, np.nan, 2.0],
+                'close': [1.0, 2.0, np.nan], 'volume': [np.nan, 5.0, 5.0]}
+        result = resample.resample(bars, '1wk', NEW_YORK)
+        np.testing.assert_allclose([result[field][0] for field in ('open', 'high', 'low', 'close', 'volume')],
+                                   [2.0, 5.0, 1.0, 2.0, 10.0])
+
+    def test_custom_aggregations(self):
+        bars = {**self.bars, 'factor': [0.5] * 6 + [1.0]}
+        result = resample.resample(bars, '1wk', NEW_YORK, aggregations={'close': 'last', 'factor': 'min'})
+        self.assertEqual({'timestamp', 'count', 'close', 'factor'}, set(result))
+        np.testing.assert_allclose(result['factor'], [0.5, 0.5])
+
+    def test_empty(self):
+        result = resample.resample({'timestamp': [], 'close': []}, '1wk')
+        self.assertEqual(0, result['timestamp'].size)
+        self.assertEqual(0, result['close'].size)
+
+    @parameterized.expand([
+        ('rule', {'rule': '1q'}),
+        ('zero_rule', {'rule': '0d'}),
+        ('timezone', {'timezone': 'Mars/Olympus'}),
+        ('aggregation', {'aggregations': {'close': 'median'}}),
+    ])
+    def test_invalid_input(self, _, arguments):
+        arguments = {'rule': '1wk', **arguments}
+        with self.assertRaises(TransformerException):
+            resample.resample(self.bars, **arguments)
+
+    def test_unsorted_timestamps(self):
+        with self.assertRaises(TransformerException):
+            resample.resample({'timestamp': [2, 1], 'close': [1.0, 2.0]}, '1d')
+
+    def test_utc_offsets_across_transitions(self):
+        moments = np.array([stamp(2023, month, 15) for month in range(1, 13)])
+        expected = [int(datetime.fromtimestamp(moment, NEW_YORK).utcoffset().total_seconds()) for moment in moments]
+        self.assertEqual(expected, resample.utc_offsets(moments, 'America/New_York').tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
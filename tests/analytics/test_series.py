@@ -0,0 +1,74 @@
+# Copyright 2023 Dominic Kneup.
+# Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+import unittest
+import numpy as np
+from client.analytics import series
+from client.exceptions.APIClientExceptions import TransformerException
+
+
+class TestSeries(unittest.TestCase):
+    def setUp(self):
+        self.columns = {
+            'timestamp': [1696253400, 1696339800, 1696426200, 1696512600],
+            'open': [10.0, 11.0, 12.0, 13.0],
+            'low': [9.0, 10.0, 11.0, 12.0],
+            'high': [11.0, 12.0, 13.0, 14.0],
+            'close': [10.0, 11.0, 12.0, 13.0],
+            'adjclose': [5.0, 5.5, 12.0, 13.0],
+            'volume': [100, 200, 0, 100],
+        }
+
+    def test_returns(self):
+        actual = series.returns(np.array([10.0, 11.0, 9.9]))
+        self.assertTrue(np.isnan(actual[0]))
+        np.testing.assert_allclose(actual[1:], [0.1, -0.1])
+
+    def test_log_returns_on_matrix(self):
+        prices = np.array([[1.0, np.e, np.e ** 2], [2.0, 2.0, 2.0]])
+        actual = series.log_returns(prices)
+        np.testing.assert_allclose(actual[:, 1:], [[1.0, 1.0], [0.0, 0.0]])
+
+    def test_rolling_mean(self):
+        actual = series.rolling_mean(np.array([1.0, 2.0, 3.0, 4.0]), 2)
+        self.assertTrue(np.isnan(actual[0]))
+        np.testing.assert_allclose(actual[1:], [1.5, 2.5, 3.5])
+
+    def test_rolling_volatility(self):
+        actual = series.rolling_volatility(np.array([1.0, 3.0, 5.0]), 2, periods_per_year=4)
+        np.testing.assert_allclose(actual[1:], [2.0 * np.sqrt(2.0)] * 2)
+
+    def test_invalid_window(self):
+        with self.assertRaises(TransformerException):
+            series.rolling_mean(np.array([1.0]), 0)
+
+    def test_vwap(self):
+        arrays = series.to_arrays(self.columns)
+        actual = series.vwap(arrays['high'], arrays['low'], arrays['close'], arrays['volume'])
+        np.testing.assert_allclose(actual, [10.0, 32.0 / 3.0, 32.0 / 3.0, 11.25])
+
+    def test_vwap_skips_missing_values(self):
+        high = np.array([11.0, np.nan, 12.0, 12.0])
+        volume = np.array([100.0, 100.0, np.nan, 100.0])
+        actual = series.vwap(high, np.array([9.0] * 4), np.array([10.0] * 4), volume)
+        np.testing.assert_allclose(actual, [10.0, 10.0, 10.0, 61.0 / 6.0])
+
+    def test_adjusted_ohlc(self):
+        adjusted = series.adjusted_ohlc(series.to_arrays(self.columns))
+        np.testing.assert_allclose(adjusted['open'], [5.0, 5.5, 12.0, 13.0])
+        np.testing.assert_allclose(adjusted['high'], [5.5, 6.0, 13.0, 14.0])
+        np.testing.assert_array_equal(adjusted['volume'], [100, 200, 0, 100])
+
+    def test_stack(self):
+        other = {'timestamp': [1696339800, 1696599000], 'close': [1.0, 2.0]}
+        stacked = series.stack([self.columns, other], 'close')
+        self.assertEqual(5, stacked['timestamp'].size)
+        np.testing.assert_allclose(stacked['values'][1], [np.nan, 1.0, np.nan, np.nan, 2.0])
+
+    def test_compute_indicators(self):
+        indicators = series.compute_indicators(self.columns, window=2)
+        for key in ('returns', 'log_returns', 'rolling_mean', 'volatility', 'vwap', 'adjusted_close'):
+            self.assertEqual(4, indicators[key].size)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,6 +6,7 @@ Licensed under the MIT License; you can find the LICENSE file in the project's r
 """
 import unittest
 from client.api.crumb import Crumb
+from tests.helpers import api_cassette, reset_circuit_breakers
 
 
 class TestCrumb(unittest.TestCase):
@@ -16,10 +17,12 @@ class TestCrumb(unittest.TestCase):
         """
         Setup Crumb Test
         """
+        self.addCleanup(reset_circuit_breakers)
 
-        crumb_instance = Crumb()
+        with api_cassette('crumb').install():
+            crumb_instance = Crumb()
 
-        self.crumb_data = crumb_instance.get_crumb()
+            self.crumb_data = crumb_instance.get_crumb()
 
     def test_crumb_not_null(self):
         self.assertIsNotNone(self.crumb_data)
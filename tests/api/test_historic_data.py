@@ -1,23 +1,27 @@
 # Copyright 2023 Dominic Kneup.
 # Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
 import unittest
-from datetime import datetime, timedelta
+from datetime import datetime
 from client.api.historic_data import HistoricData
+from tests.helpers import api_cassette, reset_circuit_breakers
 
 
 class TestHistoricData(unittest.TestCase):
 
     def setUp(self):
+        self.addCleanup(reset_circuit_breakers)
         self.historic_data = None
 
-        get_historic_data = HistoricData()
-        get_historic_data.output = "raw"
+        with api_cassette('historic_data').install():
+            get_historic_data = HistoricData()
+            get_historic_data.output = "raw"
 
-        symbol = "AMD"
-        start_date = (datetime.now() - timedelta(days=1))
-        end_date = datetime.now()
+            symbol = "AMD"
+            # Fixed period, the request must match the recorded one
+            start_date = datetime(2023, 10, 2)
+            end_date = datetime(2023, 10, 10)
 
-        self.historic_data = get_historic_data.get_historic_data(symbol, start_date, end_date)
+            self.historic_data = get_historic_data.get_historic_data(symbol, start_date, end_date)
 
     def test_get_historic_data_not_null(self):
         self.assertIsNotNone(self.historic_data)
@@ -3,18 +3,21 @@
 
 import unittest
 from client.api.quote import Quote
+from tests.helpers import api_cassette, reset_circuit_breakers
 
 
 class TestQuote(unittest.TestCase):
     def setUp(self):
+        self.addCleanup(reset_circuit_breakers)
         super().setUp()
 
-        self.getQuote = Quote()
-        self.getQuote.output = "raw" 
-        self.symbol = "GS"
+        with api_cassette('quote').install():
+            self.getQuote = Quote()
+            self.getQuote.output = "raw" 
+            self.symbol = "GS"
 
-        # Get a new Crumb
-        self.quote_data = self.getQuote.get_quote(self.symbol)
+            # Get a new Crumb
+            self.quote_data = self.getQuote.get_quote(self.symbol)
 
     def test_quote_not_null(self):
         self.assertIsNotNone(self.quote_data)
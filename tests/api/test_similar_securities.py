@@ -3,16 +3,19 @@
 
 import unittest
 from client.api.similar_securities import SimilarSecurities  
+from tests.helpers import api_cassette, reset_circuit_breakers
 
 
 class TestSimilarSecurities(unittest.TestCase):
     def setUp(self):
+        self.addCleanup(reset_circuit_breakers)
         
-        get_similar_securities = SimilarSecurities()
-        get_similar_securities.output_format = "raw"
-        symbol = "GS"
+        with api_cassette('similar_securities').install():
+            get_similar_securities = SimilarSecurities()
+            get_similar_securities.output_format = "raw"
+            symbol = "GS"
         
-        self.similar_securities_data = get_similar_securities.get_similar_securities(symbol)
+            self.similar_securities_data = get_similar_securities.get_similar_securities(symbol)
 
     def test_similar_securities_not_none(self):
         self.assertIsNotNone(self.similar_securities_data)
@@ -0,0 +1 @@
+# tests/client/__init__.py
\ No newline at end of file
@@ -0,0 +1,55 @@
+# Copyright 2023 Dominic Kneup.
+# Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+import unittest
+from client.api_client import ApiClient
+from client.circuit_breaker import CircuitBreakerRegistry
+from client.api.historic_data import HistoricData
+from client.exceptions.APIClientExceptions import (
+    ValidatorException, RateLimited, UpstreamUnavailable
+)
+from tests.helpers import FailingSession, FakeSession, make_response
+
+
+class TestApiClient(unittest.TestCase):
+    def setUp(self):
+        self.client = ApiClient()
+
+    def test_invalid_url_raises(self):
+        with self.assertRaises(ValidatorException):
+            self.client.request_api('not a url')
+
+    def test_error_status_is_classified(self):
+        self.client.session = FakeSession([make_response(429, b'', {'Retry-After': '5'})])
+        with self.assertRaises(RateLimited) as context:
+            self.client.request_api_bytes('https://example.com/x', headers={'User-Agent': 'test'})
+        self.assertEqual(5.0, context.exception.retry_after)
+
+    def test_unchecked_status_returns_body(self):
+        self.client.session = FakeSession([make_response(404, b'cookie page')])
+        body = self.client.request_api('https://example.com/x', headers={'User-Agent': 'test'},
+                                       check_status=False)
+        self.assertEqual('cookie page', body)
+
+    def test_connection_error_is_upstream_unavailable(self):
+        self.client.session = FailingSession()
+        with self.assertRaises(UpstreamUnavailable) as context:
+            self.client.request_api('https://example.com/x', headers={'User-Agent': 'test'})
+        self.assertTrue(context.exception.retryable)
+
+    def test_expired_crumb_is_refreshed_once(self):
+        body = b'{"chart":{"result":[],"error":null}}'
+        client = HistoricData(output='raw', circuit_breakers=CircuitBreakerRegistry())
+        client.yf_crumb = 'old'
+        client.session = FakeSession([
+            make_response(401, b'{"finance":{"error":{"code":"Unauthorized"}}}'),
+            make_response(404, b''),
+            make_response(200, b'new'),
+            make_response(200, body),
+        ])
+        result = client.get_historic_data_for_range('AAPL', '1d')
+        self.assertEqual(body.decode(), result)
+        self.assertEqual('new', client.yf_crumb)
+
+
+if __name__ == '__main__':
+    unittest.main()
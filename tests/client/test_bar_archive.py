@@ -0,0 +1,146 @@
+# Copyright 2023 Dominic Kneup.
+# Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timezone
+import numpy as np
+from parameterized import parameterized
+from client.bar_archive import BarArchive, file_name, symbol_name
+from client.exceptions.APIClientExceptions import APIClientException
+
+DAY = 86400
+
+
+def make_columns(start, count):
+    return {
+        'timestamp': [start + index * DAY for index in range(count)],
+        'open': [float(index) for index in range(count)],
+        'low': [index - 0.5 for index in range(count)],
+        'high': [index + 0.5 for index in range(count)],
+        'close': [index + 0.25 for index in range(count)],
+        'adjclose': [index + 0.125 for index in range(count)],
+        'volume': [100 * index for index in range(count)],
+    }
+
+
+class TestBarArchive(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.archive = BarArchive(self.directory.name)
+        self.addCleanup(self.archive.close)
+
+    def test_write_and_read(self):
+        columns = make_columns(1_700_000_000, 5)
+        self.assertEqual(5, self.archive.write('AAPL', columns))
+        bars = self.archive.open('aapl')
+        self.assertEqual((5, 1_700_000_000, 1_700_000_000 + 4 * DAY), (bars.rows, bars.first, bars.last))
+        for name, values in columns.items():
+            np.testing.assert_array_equal(values, bars.columns[name])
+        self.assertEqual(np.int64, bars.columns['timestamp'].dtype)
+
+    def test_slice_is_zero_copy_view(self):
+        self.archive.write('AAPL', make_columns(1_700_000_000, 10))
+        bars = self.archive.open('AAPL')
+        window = bars.slice(1_700_000_000 + 2 * DAY, datetime.fromtimestamp(1_700_000_000 + 5 * DAY, timezone.utc))
+        self.assertEqual([2.0, 3.0, 4.0], window['open'].tolist())
+        self.assertTrue(np.shares_memory(window['close'], bars.columns['close']))
+        self.assertFalse(window['close'].flags.writeable)
+
+    @parameterized.expand([
+        ('before', 0, 1_000, 0),
+        ('after', 1_800_000_000, None, 0),
+        ('reversed', 1_700_000_000 + 5 * DAY, 1_700_000_000, 0),
+        ('all', None, None, 10),
+    ])
+    def test_slice_bounds(self, _, start, end, expected):
+        self.archive.write('AAPL', make_columns(1_700_000_000, 10))
+        self.assertEqual(expected, self.archive.read('AAPL', start, end)['timestamp'].size)
+
+    def test_append_replaces_overlap(self):
+        self.archive.write('AAPL', make_columns(1_700_000_000, 5))
+        update = make_columns(1_700_000_000 + 4 * DAY, 3)
+        update['close'] = [40.0, 50.0, 60.0]
+        self.assertEqual(7, self.archive.append('AAPL', update))
+        bars = self.archive.read('AAPL')
+        self.assertEqual([0.25, 1.25, 2.25, 3.25, 40.0, 50.0, 60.0], bars['close'].tolist())
+
+    def test_append_twice_releases_mapping_and_slices(self):
+        self.archive.write('AAPL', make_columns(1_700_000_000, 3))
+        mapped = self.archive.open('AAPL')._map
+        self.archive.append('AAPL', make_columns(1_700_000_000 + 3 * DAY, 2))
+        # The cached mapping is unmapped before the file is replaced (required on Windows)
+        self.assertTrue(mapped.closed)
+        self.assertEqual(7, self.archive.append('AAPL', make_columns(1_700_000_000 + 5 * DAY, 2)))
+        bars = self.archive.open('AAPL').slice(1_700_000_000 + 2 * DAY, 1_700_000_000 + 6 * DAY)
+        self.assertEqual([1_700_000_000 + day * DAY for day in range(2, 6)], bars['timestamp'].tolist())
+
+    def test_replaced_file_is_reopened_and_old_views_stay_valid(self):
+        self.archive.write('AAPL', make_columns(1_700_000_000, 3))
+        old = self.archive.read('AAPL')
+        self.archive.write('AAPL', make_columns(1_800_000_000, 2))
+        self.assertEqual(2, self.archive.open('AAPL').rows)
+        self.assertEqual(1_700_000_000, old['timestamp'][0])
+
+    def test_none_values_and_missing_columns(self):
+        self.archive.write('AAPL', {'timestamp': [1, 2], 'close': [1.0, None], 'volume': [None, 5]})
+        bars = self.archive.read('AAPL')
+        self.assertTrue(np.isnan(bars['close'][1]))
+        self.assertTrue(np.isnan(bars['volume'][0]))
+        self.assertTrue(np.isnan(bars['open']).all())
+
+    def test_chart_output(self):
+        self.archive.write('AAPL', {'bars': make_columns(1_700_000_000, 2), 'events': {}, 'meta': None})
+        self.assertEqual(2, self.archive.open('AAPL').rows)
+
+    def test_empty_bars(self):
+        self.archive.write('AAPL', make_columns(0, 0))
+        bars = self.archive.open('AAPL')
+        self.assertEqual((0, None), (bars.rows, bars.first))
+        self.assertEqual(0, bars.slice(0, 10)['close'].size)
+
+    def test_symbols_and_file_names(self):
+        for symbol in ('^GSPC', 'BRK-B', 'EURUSD=X'):
+            self.archive.write(symbol, make_columns(0, 1))
+        self.assertEqual(['BRK-B', 'EURUSD=X', '^GSPC'], self.archive.symbols())
+        self.assertEqual('%5EGSPC.bars', file_name('^gspc'))
+        self.assertEqual('^GSPC', symbol_name(file_name('^GSPC')))
+        self.assertIn('^GSPC', self.archive)
+        self.assertEqual(3, len(self.archive))
+
+    def test_unsorted_timestamps(self):
+        with self.assertRaises(APIClientException):
+            self.archive.write('AAPL', {'timestamp': [2, 1], 'close': [1.0, 2.0]})
+
+    def test_unknown_symbol(self):
+        with self.assertRaises(APIClientException):
+            self.archive.open('MISSING')
+
+    @parameterized.expand([
+        ('not_an_archive', lambda data: b'{"chart": {}}' + data),
+        ('truncated', lambda data: data[:-8]),
+    ])
+    def test_invalid_file(self, _, corrupt):
+        self.archive.write('AAPL', make_columns(0, 4))
+        path = os.path.join(self.directory.name, file_name('AAPL'))
+        with open(path, 'rb') as file:
+            data = file.read()
+        with open(path, 'wb') as file:
+            file.write(corrupt(data))
+        with self.assertRaises(APIClientException):
+            BarArchive(self.directory.name).open('AAPL')
+
+    def test_other_process_reads_archive(self):
+        self.archive.write('AAPL', make_columns(1_700_000_000, 4))
+        code = ('import sys; from client.bar_archive import BarArchive; '
+                'print(BarArchive(sys.argv[1]).read("AAPL", 1_700_000_000 + 86400)["close"].sum())')
+        result = subprocess.run([sys.executable, '-c', code, self.directory.name],
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(1.25 + 2.25 + 3.25, float(result.stdout))
+
+
+if __name__ == '__main__':
+    unittest.main()
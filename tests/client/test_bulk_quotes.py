@@ -0,0 +1,63 @@
+# Copyright 2023 Dominic Kneup.
+# Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+import json
+import unittest
+from unittest.mock import patch
+from client.api_client import ApiClient
+from client.circuit_breaker import CircuitBreakerRegistry
+from client.api.quote import Quote
+from client.symbol_registry import SymbolRegistry
+from tests.helpers import RecordingSession, make_quote, make_response, quote_response
+
+
+class TestBulkQuotes(unittest.TestCase):
+    def create_quote(self, responses):
+        session = RecordingSession([make_response(404), make_response(200, b'crumb')] + responses)
+        with patch.object(ApiClient, 'session_factory', lambda: session):
+            return Quote(output='table', circuit_breakers=CircuitBreakerRegistry())
+
+    def test_get_quotes_in_batches(self):
+        quote = self.create_quote([
+            make_response(200, quote_response('SAP.DE', 'VOD.L')),
+            make_response(200, b'{"quoteResponse":{"result":[],"error":null}}'),
+            make_response(200, quote_response('BTC-USD')),
+        ])
+        quote.symbol_registry = SymbolRegistry()
+        table = quote.get_quotes(['sap.de', 'VOD.L', 'SAP.DE', 'GONE1', 'GONE2', 'btc-usd'],
+                                 fields=['marketCap', 'fullExchangeName'], batch_size=2)
+
+        self.assertEqual(['SAP.DE', 'VOD.L', 'BTC-USD'], table['symbol'].tolist())
+        self.assertEqual(('symbol', 'marketCap', 'fullExchangeName'), table.dtype.names)
+        self.assertEqual(['SAP.DE,VOD.L', 'GONE1,GONE2', 'BTC-USD'],
+                         [params['symbols'] for params in quote.session.sent_params[2:]])
+        self.assertTrue(quote.symbol_registry.is_known_invalid('GONE1'))
+        self.assertTrue(quote.symbol_registry.is_known_valid('BTC-USD'))
+
+        # known invalid symbols are not requested again
+        quote.session.responses.append(make_response(200, quote_response('SAP.DE')))
+        table = quote.get_quotes(['GONE1', 'SAP.DE'])
+        self.assertEqual('SAP.DE', quote.session.sent_params[-1]['symbols'])
+        self.assertEqual(['SAP.DE'], table['symbol'].tolist())
+
+    def test_get_quotes_validates_every_quote(self):
+        broken = make_quote('VOD.L')
+        del broken['currency']
+        payload = {'quoteResponse': {'result': [make_quote('SAP.DE'), broken], 'error': None}}
+        quote = self.create_quote([make_response(200, json.dumps(payload).encode('utf-8'))])
+        with self.assertLogs('client.api.quote', 'WARNING') as logs:
+            table = quote.get_quotes(['SAP.DE', 'VOD.L'])
+
+        self.assertEqual(['SAP.DE'], table['symbol'].tolist())
+        self.assertIn('Missing currency property', logs.output[0])
+
+    def test_get_quotes_skips_malformed_symbols(self):
+        quote = self.create_quote([make_response(200, quote_response('SAP.DE', 'VOD.L'))])
+        with self.assertLogs('client.symbol_registry', 'WARNING'):
+            table = quote.get_quotes(['sap.de', 'AA PL', 'VOD.L'])
+
+        self.assertEqual(['SAP.DE', 'VOD.L'], table['symbol'].tolist())
+        self.assertEqual('SAP.DE,VOD.L', quote.session.sent_params[-1]['symbols'])
+
+
+if __name__ == '__main__':
+    unittest.main()
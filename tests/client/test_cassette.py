@@ -0,0 +1,96 @@
+# Copyright 2023 Dominic Kneup.
+# Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+import os
+import tempfile
+import unittest
+import requests
+from client.api_client import ApiClient
+from client.api.similar_securities import SimilarSecurities
+from client.cassette import Cassette
+from client.exceptions.APIClientExceptions import APIClientException
+from client.identity_pool import Identity, IdentityPool
+from tests.client import test_response_cache
+
+
+class TestCassette(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cassettes', 'similar.jsonl.gz')
+        self.body = (b'{"finance":{"result":[{"symbol":"AMD","recommendedSymbols":[{"symbol":"NVDA",'
+                     b'"score":0.279067}]}],"error":null}}')
+        self.url = 'https://query2.finance.yahoo.com/v6/finance/recommendationsbysymbol/AMD'
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _record(self):
+        cassette = Cassette(self.path, mode='record')
+        session = test_response_cache.FakeSession([
+            test_response_cache.make_response(200, self.body, {'Content-Type': 'application/json'}),
+            test_response_cache.make_response(200, b'\xff\xfe', {}),
+        ])
+        client = cassette.attach(ApiClient())
+        client.session.session = session
+        client.request_api(self.url, params={'crumb': 'abc', 'lang': 'en-US'})
+        client.request_api('https://example.com/binary')
+        return cassette
+
+    def test_request_key_ignores_crumb_and_order(self):
+        self.assertEqual(Cassette.request_key(self.url, {'crumb': 'a', 'b': 1, 'a': 2}),
+                         Cassette.request_key(self.url, [('a', 2), ('b', 1), ('crumb', 'b')]))
+
+    def test_record_and_replay(self):
+        self.assertEqual(2, len(self._record()))
+
+        cassette = Cassette(self.path, mode='replay')
+        client = cassette.attach(ApiClient())
+        self.assertEqual(self.body.decode('utf-8'),
+                         client.request_api(self.url, params={'lang': 'en-US', 'crumb': 'other'}))
+        self.assertEqual(b'\xff\xfe', client.session.get('https://example.com/binary').content)
+
+    def test_replay_missing_request(self):
+        self._record()
+        client = Cassette(self.path, mode='replay').attach(ApiClient())
+        with self.assertRaises(APIClientException):
+            client.request_api('https://example.com/unknown')
+
+    def test_replay_missing_file(self):
+        with self.assertRaises(APIClientException):
+            Cassette(self.path, mode='replay')
+
+    def test_record_mode_replaces_archive(self):
+        self._record()
+        cassette = Cassette(self.path, mode='record')
+        self.assertEqual(0, len(cassette))
+        cassette.record(Cassette.request_key(self.url), test_response_cache.make_response(200, b'{}'))
+        self.assertEqual(1, len(Cassette(self.path, mode='replay')))
+
+    def test_attach_routes_identity_sessions(self):
+        def client_with_pool(session):
+            client = ApiClient()
+            client.identity_pool = IdentityPool([Identity('direct', 'agent', session=session)])
+            return client
+
+        recorder = Cassette(self.path, mode='record')
+        session = test_response_cache.FakeSession([test_response_cache.make_response(200, self.body)])
+        recorder.attach(client_with_pool(session)).request_api(self.url)
+        self.assertEqual(1, len(recorder))
+
+        replayed = Cassette(self.path, mode='replay')
+        replayed = replayed.attach(client_with_pool(test_response_cache.FakeSession([])))
+        self.assertEqual(self.body.decode('utf-8'), replayed.request_api(self.url))
+
+    def test_install_routes_new_clients(self):
+        cassette = Cassette(self.path, mode='auto')
+        cassette.record(Cassette.request_key(self.url),
+                        test_response_cache.make_response(200, self.body))
+        with cassette.install():
+            get_similar_securities = SimilarSecurities()
+        self.assertIs(requests.Session, ApiClient.session_factory)
+
+        get_similar_securities.output_format = "raw"
+        self.assertEqual(self.body.decode('utf-8'), get_similar_securities.get_similar_securities('AMD'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+# Copyright 2023 Dominic Kneup.
+# Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+import unittest
+from client.api_client import ApiClient
+from client.api.historic_data import HistoricData
+from client.api.config import Settings
+from client.circuit_breaker import (
+    CircuitBreaker, CircuitBreakerRegistry, CircuitState, circuit_breakers, shared_registry
+)
+from client.exceptions.APIClientExceptions import CircuitOpen, NotFound, UpstreamUnavailable
+from tests.helpers import FailingSession, FakeClock, FakeSession, make_response, reset_circuit_breakers
+
+
+def fail():
+    raise UpstreamUnavailable('down', 503)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.transitions = []
+        self.breaker = CircuitBreaker(
+            'quote', failure_threshold=2, recovery_timeout=10.0, clock=self.clock,
+            on_state_change=lambda name, old, new: self.transitions.append((name, old, new))
+        )
+
+    def open_circuit(self):
+        for _ in range(2):
+            with self.assertRaises(UpstreamUnavailable):
+                self.breaker.call(fail)
+
+    def test_opens_after_threshold_and_fails_fast(self):
+        self.open_circuit()
+        self.assertEqual(CircuitState.OPEN, self.breaker.state)
+
+        calls = []
+        with self.assertRaises(CircuitOpen) as context:
+            self.breaker.call(calls.append, 1)
+        self.assertEqual([], calls)
+        self.assertEqual(10.0, context.exception.retry_after)
+        self.assertEqual([('quote', CircuitState.CLOSED, CircuitState.OPEN)], self.transitions)
+        self.assertEqual({'name': 'quote', 'state': 'open', 'consecutive_failures': 2, 'successes': 0,
+                          'failures': 2, 'rejected': 1, 'opened': 1}, self.breaker.snapshot())
+
+    def test_success_resets_failure_count(self):
+        with self.assertRaises(UpstreamUnavailable):
+            self.breaker.call(fail)
+        self.breaker.call(lambda: None)
+        with self.assertRaises(UpstreamUnavailable):
+            self.breaker.call(fail)
+        self.assertEqual(CircuitState.CLOSED, self.breaker.state)
+
+    def test_half_open_probe_closes_circuit(self):
+        self.open_circuit()
+        self.clock.now = 10.0
+        self.assertEqual('ok', self.breaker.call(lambda: 'ok'))
+        self.assertEqual(CircuitState.CLOSED, self.breaker.state)
+        self.assertEqual([CircuitState.OPEN, CircuitState.HALF_OPEN, CircuitState.CLOSED],
+                         [new for _, _, new in self.transitions])
+
+    def test_failed_probe_reopens_circuit(self):
+        self.open_circuit()
+        self.clock.now = 10.0
+        with self.assertRaises(UpstreamUnavailable):
+            self.breaker.call(fail)
+        self.assertEqual(CircuitState.OPEN, self.breaker.state)
+        with self.assertRaises(CircuitOpen):
+            self.breaker.call(lambda: None)
+
+    def test_only_one_probe_in_flight(self):
+        self.open_circuit()
+        self.clock.now = 10.0
+        self.breaker.before_request()
+        with self.assertRaises(CircuitOpen):
+            self.breaker.before_request()
+
+    def test_health_probe(self):
+        healthy = []
+        self.breaker.health_probe = lambda: bool(healthy)
+        self.open_circuit()
+        self.clock.now = 10.0
+        with self.assertRaises(CircuitOpen):
+            self.breaker.call(lambda: None)
+        self.assertEqual(CircuitState.OPEN, self.breaker.state)
+
+        healthy.append(True)
+        self.clock.now = 20.0
+        self.assertEqual('ok', self.breaker.call(lambda: 'ok'))
+        self.assertEqual(CircuitState.CLOSED, self.breaker.state)
+
+    def test_client_errors_do_not_open_circuit(self):
+        def not_found():
+            raise NotFound('missing', 404)
+        for _ in range(3):
+            with self.assertRaises(NotFound):
+                self.breaker.call(not_found)
+        self.assertEqual(CircuitState.CLOSED, self.breaker.state)
+
+    def test_unclassified_errors_leave_state_unchanged(self):
+        with self.assertRaises(UpstreamUnavailable):
+            self.breaker.call(fail)
+        with self.assertRaises(ValueError):
+            self.breaker.call(int, 'x')
+        with self.assertRaises(UpstreamUnavailable):
+            self.breaker.call(fail)
+        self.assertEqual(CircuitState.OPEN, self.breaker.state)
+        self.assertEqual(0, self.breaker.snapshot()['successes'])
+
+    def test_interrupted_probe_allows_next_probe(self):
+        def interrupt():
+            raise KeyboardInterrupt
+        self.open_circuit()
+        self.clock.now = 10.0
+        with self.assertRaises(KeyboardInterrupt):
+            self.breaker.call(interrupt)
+        self.assertEqual(CircuitState.HALF_OPEN, self.breaker.state)
+        self.assertEqual('ok', self.breaker.call(lambda: 'ok'))
+        self.assertEqual(CircuitState.CLOSED, self.breaker.state)
+
+    def test_circuit_open_is_not_unavailable(self):
+        self.assertFalse(issubclass(CircuitOpen, UpstreamUnavailable))
+        self.assertTrue(CircuitOpen('open').retryable)
+
+    def test_api_client_uses_endpoint_breaker(self):
+        client = ApiClient()
+        client.circuit_breakers = CircuitBreakerRegistry(failure_threshold=1, recovery_timeout=60.0)
+        client.session = FakeSession([make_response(503), make_response(200, b'{}')])
+        with self.assertRaises(UpstreamUnavailable):
+            client.request_api('https://example.com/x', headers={'User-Agent': 'test'}, endpoint='chart')
+        with self.assertRaises(CircuitOpen):
+            client.request_api('https://example.com/x', headers={'User-Agent': 'test'}, endpoint='chart')
+        self.assertEqual('{}', client.request_api('https://example.com/x', headers={'User-Agent': 'test'}))
+
+        snapshot = client.circuit_breakers.snapshot()
+        self.assertEqual('open', snapshot['chart']['state'])
+        self.assertEqual('closed', snapshot['default']['state'])
+
+
+    def test_registry_health_probes_per_endpoint(self):
+        registry = CircuitBreakerRegistry(health_probes={'quote': lambda: True})
+        self.assertIsNotNone(registry.get('quote').health_probe)
+        self.assertIsNone(registry.get('chart').health_probe)
+
+        registry.set_health_probe('chart', lambda: False)
+        registry.set_health_probe('quote', None)
+        self.assertFalse(registry.get('chart').health_probe())
+        self.assertIsNone(registry.get('quote').health_probe)
+        registry.set_health_probe('recommendations', lambda: True)
+        self.assertTrue(registry.get('recommendations').health_probe())
+
+    def test_injected_registry_is_used_for_the_crumb(self):
+        registry = CircuitBreakerRegistry(failure_threshold=1)
+        client = HistoricData(output='raw', circuit_breakers=registry)
+        client.session = FakeSession([make_response(404), make_response(503)])
+        with self.assertRaises(UpstreamUnavailable):
+            client.get_historic_data_for_range('AAPL', '1d')
+        self.assertEqual('open', registry.snapshot()['crumb']['state'])
+        self.assertNotEqual('open', circuit_breakers.snapshot().get('crumb', {}).get('state'))
+        self.assertIs(circuit_breakers, ApiClient().circuit_breakers)
+
+    def test_client_settings_configure_the_shared_registry(self):
+        self.addCleanup(reset_circuit_breakers)
+        strict = ApiClient(Settings(circuit_failure_threshold=1, circuit_recovery_timeout=600.0))
+        lenient = ApiClient(Settings(circuit_failure_threshold=3, circuit_recovery_timeout=600.0))
+        for client in (strict, lenient):
+            client.session = FailingSession()
+            with self.assertRaises(UpstreamUnavailable):
+                client.request_api('http://yahoo.test/quote')
+
+        self.assertEqual('open', strict.circuit_breakers.snapshot()['default']['state'])
+        self.assertEqual('closed', lenient.circuit_breakers.snapshot()['default']['state'])
+        self.assertEqual(600.0, strict.circuit_breakers.get('default').recovery_timeout)
+        self.assertIs(strict.circuit_breakers, shared_registry(Settings(circuit_failure_threshold=1,
+                                                                        circuit_recovery_timeout=600.0)))
+        self.assertIsNot(strict.circuit_breakers, circuit_breakers)
+
+
+if __name__ == '__main__':
+    unittest.main()
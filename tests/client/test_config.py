@@ -0,0 +1,66 @@
+# Copyright 2023 Dominic Kneup.
+# Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+import unittest
+from unittest.mock import patch
+from parameterized import parameterized
+from client.api import config
+from client.api.config import Settings
+from client.api.historic_data import HistoricData
+from client.api.similar_securities import SimilarSecurities
+from client.exceptions.APIClientExceptions import ValidatorException
+
+
+class TestSettings(unittest.TestCase):
+    def test_defaults(self):
+        settings = Settings.from_env({})
+        self.assertEqual(Settings(), settings)
+        self.assertEqual('https://query2.finance.yahoo.com/v7/finance/quote', settings.quote_api_endpoint)
+
+    def test_from_env_converts_types(self):
+        settings = Settings.from_env({
+            'QUOTE_API_ENDPOINT': 'https://example.com/quote',
+            'REQUEST_TIMEOUT': '2.5',
+            'circuit_failure_threshold': '3',
+        })
+        self.assertEqual('https://example.com/quote', settings.quote_api_endpoint)
+        self.assertEqual(2.5, settings.request_timeout)
+        self.assertEqual(3, settings.circuit_failure_threshold)
+
+    def test_overrides_take_precedence(self):
+        settings = Settings.from_env({'REQUEST_TIMEOUT': '2.5'}, request_timeout=1.0)
+        self.assertEqual(1.0, settings.request_timeout)
+        self.assertEqual(7.0, settings.replace(request_timeout=7.0).request_timeout)
+
+    def test_invalid_env_value(self):
+        with self.assertRaises(ValidatorException):
+            Settings.from_env({'CIRCUIT_FAILURE_THRESHOLD': 'five'})
+
+    @parameterized.expand([
+        ({'quote_api_endpoint': 'not a url'},),
+        ({'request_timeout': 'ten'},),
+    ])
+    def test_validated_rejects_invalid_settings(self, changes):
+        with self.assertRaises(ValidatorException):
+            Settings(**changes).validated()
+
+    def test_validated(self):
+        settings = Settings()
+        self.assertIs(settings, settings.validated())
+
+    def test_explicit_settings_per_client(self):
+        settings = Settings(similar_securities_api_endpoint='https://example.com/similar/',
+                            historic_data_interval='1wk', request_timeout=3.0)
+        similar = SimilarSecurities(settings=settings)
+        self.assertEqual('https://example.com/similar/', similar.api_endpoint)
+        self.assertEqual(3.0, similar.timeout)
+        history = HistoricData(output='columns', settings=settings)
+        self.assertEqual(('1wk', 'columns'), (history.interval, history.output))
+
+    def test_module_settings_resolved_at_call_time(self):
+        with patch.object(config, 'settings', Settings(historic_data_interval='1mo')):
+            self.assertEqual('1mo', HistoricData().interval)
+        self.assertEqual(config.settings.historic_data_interval, HistoricData().interval)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,195 @@
+# Copyright 2023 Dominic Kneup.
+# Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from parameterized import parameterized
+from client.__main__ import main
+from client.downloader import (
+    Checkpoint, CsvWriter, Downloader, JsonlWriter, RateLimiter, open_writer, read_symbols
+)
+from client.exceptions.APIClientExceptions import APIClientException, InvalidSymbol
+from tests.helpers import FakeClock
+
+
+class MemoryWriter:
+    buffered = 0
+
+    def __init__(self):
+        self.records = []
+        self.flushes = 0
+
+    def write(self, records):
+        self.records.extend(records)
+
+    def flush(self):
+        self.flushes += 1
+
+    def close(self):
+        pass
+
+
+def fake_fetch(client, kind, symbol, options):
+    if symbol == 'BAD':
+        raise InvalidSymbol(f'Unknown symbol {symbol}')
+    return [{'symbol': symbol, 'price': 1.0, 'kind': kind}]
+
+
+class FakeDownloader(Downloader):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, client_factory=lambda kind, options: object(), fetch=fake_fetch, **kwargs)
+
+
+class TestDownloader(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.clients = []
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def client_factory(self, kind, options):
+        client = object()
+        self.clients.append((threading.get_ident(), client))
+        return client
+
+    def downloader(self, writer, checkpoint=None, workers=2):
+        return Downloader('quote', writer, workers=workers, checkpoint=checkpoint,
+                          client_factory=self.client_factory, fetch=fake_fetch)
+
+    def test_rate_limiter(self):
+        clock = FakeClock()
+        limiter = RateLimiter(2.0, burst=2, clock=clock, sleep=clock.sleep)
+        waits = [limiter.acquire() for _ in range(4)]
+        self.assertEqual([0.0, 0.0, 0.5, 0.5], waits)
+        clock.now += 10
+        self.assertEqual(0.0, limiter.acquire())
+
+    def test_rate_limiter_unlimited(self):
+        clock = FakeClock()
+        limiter = RateLimiter(0, clock=clock, sleep=clock.sleep)
+        for _ in range(10):
+            limiter.acquire()
+        self.assertEqual([], clock.sleeps)
+
+    def test_read_symbols(self):
+        lines = ['aapl, msft\n', '# comment\n', 'sap.de  # xetra\n', '\n', 'AAPL\n']
+        self.assertEqual(['AAPL', 'MSFT', 'SAP.DE'], read_symbols(lines))
+
+    def test_run_writes_records_and_summary(self):
+        writer = MemoryWriter()
+        summary = self.downloader(writer).run(['AAPL', 'BAD', 'MSFT'])
+        self.assertEqual(['AAPL', 'MSFT'], sorted(record['symbol'] for record in writer.records))
+        self.assertEqual((3, 2, 1, 2), (summary.total, summary.succeeded, summary.failed, summary.records))
+        self.assertEqual({'InvalidSymbol': 1}, dict(summary.errors))
+        self.assertIn('BAD', summary.failures)
+        self.assertIn('2/3 symbols downloaded', summary.format())
+        self.assertIn('InvalidSymbol: 1', summary.format())
+
+    def test_one_client_per_thread(self):
+        self.downloader(MemoryWriter(), workers=3).run([f'S{index}' for index in range(30)])
+        threads = [thread for thread, _ in self.clients]
+        self.assertEqual(len(threads), len(set(threads)))
+        self.assertLessEqual(len(self.clients), 3)
+
+    def test_resume_from_checkpoint(self):
+        path = self.path('quotes.done')
+        checkpoint = Checkpoint(path)
+        self.downloader(MemoryWriter(), checkpoint).run(['AAPL', 'BAD'])
+        checkpoint.close()
+
+        writer = MemoryWriter()
+        summary = self.downloader(writer, Checkpoint(path)).run(['AAPL', 'BAD', 'MSFT'])
+        self.assertEqual(1, summary.skipped)
+        self.assertEqual(['MSFT'], [record['symbol'] for record in writer.records])
+        with open(path, encoding='utf-8') as file:
+            self.assertEqual(['AAPL', 'MSFT'], file.read().split())
+
+    def test_checkpoint_waits_for_buffered_records(self):
+        writer = MemoryWriter()
+        writer.buffered = 1
+        checkpoint = Checkpoint()
+        original_write = writer.write
+
+        def write(records):
+            original_write(records)
+            self.assertEqual(0, len(checkpoint))
+
+        writer.write = write
+        self.downloader(writer, checkpoint).run(['AAPL', 'MSFT'])
+        self.assertEqual(1, writer.flushes)
+        self.assertEqual(2, len(checkpoint))
+
+    def test_interrupted_run(self):
+        downloader = self.downloader(MemoryWriter())
+        with patch('client.downloader.as_completed', side_effect=KeyboardInterrupt):
+            summary = downloader.run(['AAPL'])
+        self.assertTrue(summary.interrupted)
+        self.assertIn('interrupted', summary.format())
+
+    def test_jsonl_writer_append(self):
+        path = self.path('quotes.jsonl')
+        writer = open_writer(path)
+        self.assertIsInstance(writer, JsonlWriter)
+        writer.write([{'symbol': 'AAPL'}])
+        writer.close()
+        writer = open_writer(path, append=True)
+        writer.write([{'symbol': 'MSFT', 'actions': [1]}])
+        writer.close()
+        with open(path, encoding='utf-8') as file:
+            self.assertEqual(['AAPL', 'MSFT'], [json.loads(line)['symbol'] for line in file])
+
+    def test_csv_writer_keeps_header_on_append(self):
+        path = self.path('bars.csv')
+        writer = CsvWriter(path)
+        writer.write([{'symbol': 'AAPL', 'close': 1.5}])
+        writer.close()
+        writer = CsvWriter(path, append=True)
+        writer.write([{'close': 2.5, 'symbol': 'MSFT', 'extra': 'x', 'actions': [1, 2]}])
+        writer.close()
+        with open(path, newline='', encoding='utf-8') as file:
+            rows = list(csv.reader(file))
+        self.assertEqual([['symbol', 'close'], ['AAPL', '1.5'], ['MSFT', '2.5']], rows)
+
+    @parameterized.expand([
+        ('quotes.txt', None),
+        ('quotes.jsonl', 'xml'),
+    ])
+    def test_open_writer_unknown_format(self, name, output_format):
+        with self.assertRaises(APIClientException):
+            open_writer(self.path(name), output_format)
+
+    def test_unknown_kind(self):
+        with self.assertRaises(APIClientException):
+            Downloader('news', MemoryWriter())
+
+    def test_main(self):
+        output = self.path('quotes.jsonl')
+        checkpoint = self.path('quotes.done')
+        argv = ['quote', '-o', output, '-c', checkpoint, '--rate', '0']
+        with patch('client.__main__.Downloader', FakeDownloader), \
+                patch('sys.stdin', io.StringIO('AAPL\nBAD\n')), \
+                patch('sys.stderr', io.StringIO()) as stderr:
+            self.assertEqual(1, main(argv))
+        self.assertIn('1/2 symbols downloaded', stderr.getvalue())
+        with open(output, encoding='utf-8') as file:
+            self.assertEqual(['AAPL'], [json.loads(line)['symbol'] for line in file])
+
+    def test_main_invalid_fields(self):
+        with patch('sys.stderr', io.StringIO()) as stderr:
+            self.assertEqual(2, main(['quote', '-o', self.path('q.jsonl'), '--fields', 'noSuchField']))
+        self.assertIn('error', stderr.getvalue())
+
+    def test_main_history_needs_period(self):
+        with patch('sys.stderr', io.StringIO()), self.assertRaises(SystemExit):
+            main(['history', '-o', self.path('bars.csv')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+# Copyright 2023 Dominic Kneup.
+# Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlsplit
+from client.api_client import ApiClient
+from client.api.historic_data import HistoricData
+from client.api.quote import Quote
+from client.api.config import settings
+from client.circuit_breaker import CircuitBreakerRegistry
+from client.identity_pool import Identity, IdentityPool
+from client.exceptions.APIClientExceptions import (
+    APIClientException, CrumbExpired, InvalidSymbol, RateLimited
+)
+from tests.helpers import FailingSession, FakeClock
+
+QUOTE_URL = 'http://yahoo.test/v7/finance/quote'
+
+
+class ProxyStandIn:
+    """
+    Local HTTP proxy stand-in: answers proxied http:// requests itself and records them.
+    Statuses are consumed per request (200 once the list is empty).
+    """
+    def __init__(self, name, statuses=()):
+        self.name = name
+        self.statuses = list(statuses)
+        self.requests = []
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):  # noqa: N802
+                stand_in.requests.append((self.path, self.headers.get('User-Agent')))
+                path = urlsplit(self.path).path
+                if path == '/getcrumb':
+                    status, body = 200, f'crumb-{stand_in.name}'.encode()
+                elif path == '/cookie':
+                    status, body = 404, b''
+                else:
+                    status = stand_in.statuses.pop(0) if stand_in.statuses else 200
+                    body = b'{"quoteResponse":{"result":[]}}'
+                self.send_response(status)
+                if status == 429:
+                    self.send_header('Retry-After', '60')
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    def crumbs(self):
+        return [parse_qs(urlsplit(path).query).get('crumb', [None])[0]
+                for path, _ in self.requests if urlsplit(path).path not in ('/getcrumb', '/cookie')]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestIdentityPool(unittest.TestCase):
+    def setUp(self):
+        self.proxies = []
+        patcher_cookie = patch.object(settings, 'crumb_cookie_endpoint', 'http://yahoo.test/cookie')
+        patcher_crumb = patch.object(settings, 'crumb_api_endpoint', 'http://yahoo.test/getcrumb')
+        for patcher in (patcher_cookie, patcher_crumb):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def proxy(self, name, statuses=()):
+        proxy = ProxyStandIn(name, statuses)
+        self.addCleanup(proxy.close)
+        self.proxies.append(proxy)
+        return proxy
+
+    def client(self, pool):
+        client = ApiClient()
+        client.identity_pool = pool
+        client.response_cache = None
+        client.circuit_breakers = CircuitBreakerRegistry()
+        return client
+
+    def pool(self, *proxies, quarantine=300.0):
+        return IdentityPool.from_proxies([proxy.url for proxy in proxies], rate=0,
+                                         user_agents=[f'agent-{proxy.name}' for proxy in proxies],
+                                         quarantine=quarantine)
+
+    def test_requests_rotate_across_identities(self):
+        first, second = self.proxy('a'), self.proxy('b')
+        client = self.client(self.pool(first, second))
+        for _ in range(4):
+            client.request_api(QUOTE_URL, params={'symbols': 'AAPL'})
+        self.assertEqual(2, len(first.requests))
+        self.assertEqual(2, len(second.requests))
+        self.assertEqual({'agent-a'}, {agent for _, agent in first.requests})
+        self.assertEqual({'agent-b'}, {agent for _, agent in second.requests})
+
+    def test_rate_limited_identity_is_quarantined(self):
+        first, second = self.proxy('a', [429]), self.proxy('b')
+        pool = self.pool(first, second)
+        client = self.client(pool)
+        # The 429 quarantines the first identity and the request is retried with the second
+        client.request_api(QUOTE_URL, params={'symbols': 'AAPL'})
+        for _ in range(3):
+            client.request_api(QUOTE_URL, params={'symbols': 'AAPL'})
+        self.assertEqual(1, len(first.requests))
+        self.assertEqual(4, len(second.requests))
+        self.assertEqual([pool.identities[1]], pool.healthy())
+        snapshot = pool.snapshot()[0]
+        self.assertEqual((1, 1), (snapshot['rate_limited'], snapshot['quarantined']))
+
+    def test_rate_limited_retry_is_sent_once(self):
+        first, second = self.proxy('a', [429]), self.proxy('b', [429])
+        pool = self.pool(first, second)
+        with self.assertRaises(RateLimited):
+            self.client(pool).request_api(QUOTE_URL)
+        self.assertEqual((1, 1), (len(first.requests), len(second.requests)))
+        self.assertEqual([], pool.healthy())
+
+    def test_all_identities_quarantined(self):
+        only = self.proxy('a', [429])
+        client = self.client(self.pool(only, quarantine=10.0))
+        with self.assertRaises(RateLimited):
+            client.request_api(QUOTE_URL)
+        with self.assertRaises(RateLimited) as context:
+            client.request_api(QUOTE_URL)
+        self.assertEqual(1, len(only.requests))
+        # Retry-After (60s) is longer than the quarantine
+        self.assertGreater(context.exception.retry_after, 50)
+
+    def test_crumb_per_identity(self):
+        first, second = self.proxy('a'), self.proxy('b', [200, 401])
+        client = self.client(self.pool(first, second))
+        for _ in range(2):
+            client.request_api(QUOTE_URL, params={'symbols': 'AAPL', 'crumb': 'client-crumb'})
+        self.assertEqual(['crumb-a'], first.crumbs())
+        self.assertEqual(['crumb-b'], second.crumbs())
+
+        client.request_api(QUOTE_URL, params={'symbols': 'AAPL', 'crumb': 'client-crumb'})
+        with self.assertRaises(CrumbExpired):
+            client.request_api(QUOTE_URL, params={'symbols': 'AAPL', 'crumb': 'client-crumb'})
+        self.assertIsNone(client.identity_pool.identities[1].crumb)
+        self.assertEqual('crumb-a', client.identity_pool.identities[0].crumb)
+
+    def test_clients_fetch_crumbs_through_identities(self):
+        first, second = self.proxy('a'), self.proxy('b')
+        # The client session must never be used: neither on creation nor for the crumb
+        with patch.object(ApiClient, 'session_factory', FailingSession):
+            quote = Quote(endpoint=QUOTE_URL, output='raw', circuit_breakers=CircuitBreakerRegistry())
+            chart = HistoricData(endpoint='http://yahoo.test/v8/finance/chart/', output='raw',
+                                 circuit_breakers=CircuitBreakerRegistry())
+        for client in (quote, chart):
+            client.identity_pool = self.pool(first, second)
+            client.response_cache = None
+        # The stand-in answers without results
+        with self.assertRaises(InvalidSymbol):
+            quote.get_quote('AAPL')
+        with self.assertRaises(InvalidSymbol):
+            chart.get_historic_data_for_range('AAPL', '1d')
+        self.assertEqual(['crumb-a', 'crumb-a'], first.crumbs())
+        self.assertEqual([], second.crumbs())
+        self.assertIsNone(quote.crumb)
+
+    def test_acquire_prefers_identity_with_free_rate(self):
+        clock = FakeClock()
+        identities = [Identity(name, 'agent', rate=1.0, clock=clock, sleep=clock.sleep) for name in 'ab']
+        pool = IdentityPool(identities, clock=clock)
+        picked = [pool.acquire().name for _ in range(4)]
+        self.assertEqual(['a', 'b'], sorted(picked[:2]))
+        self.assertEqual(['a', 'b'], sorted(picked[2:]))
+        # two identities at one request per second each: four requests wait one second
+        self.assertEqual(1.0, clock.now)
+
+    def test_empty_pool(self):
+        with self.assertRaises(APIClientException):
+            IdentityPool([])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+# Copyright 2023 Dominic Kneup.
+# Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+import os
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta
+from client.jobs import BackfillJob, BackfillWindow, CheckpointStore, WindowStatus, split_windows
+from client.exceptions.APIClientExceptions import (
+    APIClientException, InvalidSymbol, RateLimited, UpstreamUnavailable
+)
+
+
+class FakeHistoricData:
+    """
+    Returns one bar per window; errors are consumed from a per-symbol list first.
+    """
+    def __init__(self, errors=None):
+        self.output = 'dict'
+        self.errors = errors if errors is not None else {}
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        return self
+
+    def get_historic_data(self, symbol, start_date, end_date):
+        with self.lock:
+            self.calls.append((symbol, start_date))
+            errors = self.errors.get(symbol)
+            if errors:
+                raise errors.pop(0)
+        return {'timestamp': [int(start_date.timestamp())], 'close': [1.0]}
+
+
+class TestBackfillJob(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'backfill.sqlite')
+        self.delivered = []
+        self.sleeps = []
+
+    def sink(self, window, data):
+        self.delivered.append(window)
+
+    def job(self, client, store=None, **kwargs):
+        store = store if store is not None else CheckpointStore(self.path)
+        self.addCleanup(store.close)
+        return BackfillJob(store, self.sink, window=timedelta(days=366), client_factory=client,
+                           sleep=self.sleeps.append, **kwargs)
+
+    def test_split_windows(self):
+        windows = split_windows('AAPL', datetime(2020, 1, 1), datetime(2021, 6, 1), timedelta(days=366))
+        self.assertEqual([BackfillWindow('AAPL', datetime(2020, 1, 1), datetime(2021, 1, 1)),
+                          BackfillWindow('AAPL', datetime(2021, 1, 1), datetime(2021, 6, 1))], windows)
+        with self.assertRaises(APIClientException):
+            split_windows('AAPL', datetime(2020, 1, 1), datetime(2021, 1, 1), timedelta(0))
+
+    def test_plan_is_idempotent(self):
+        job = self.job(FakeHistoricData())
+        self.assertEqual(6, job.plan(['AAPL', 'MSFT'], datetime(2020, 1, 1), datetime(2023, 1, 1)))
+        self.assertEqual(0, job.plan(['AAPL', 'MSFT'], datetime(2020, 1, 1), datetime(2023, 1, 1)))
+        self.assertEqual(3, job.plan(['NVDA'], datetime(2020, 1, 1), datetime(2023, 1, 1)))
+
+    def test_run_delivers_all_windows(self):
+        client = FakeHistoricData()
+        job = self.job(client, output='columns')
+        job.plan(['AAPL', 'MSFT'], datetime(2020, 1, 1), datetime(2022, 1, 1))
+        report = job.run()
+        self.assertEqual((4, 0, 0, 4), (report.done, report.failed, report.skipped, report.records))
+        self.assertEqual('columns', client.output)
+        self.assertEqual({'pending': 0, 'done': 4, 'failed': 0, 'skipped': 0}, job.store.progress())
+
+    def test_retry_with_backoff(self):
+        client = FakeHistoricData({'AAPL': [UpstreamUnavailable('503'), RateLimited('429', 429, retry_after=30)]})
+        job = self.job(client, backoff=1.0, max_backoff=8.0)
+        job.plan(['AAPL'], datetime(2020, 1, 1), datetime(2020, 6, 1))
+        report = job.run()
+        self.assertEqual(1, report.done)
+        self.assertEqual(3, len(client.calls))
+        self.assertEqual(2, len(self.sleeps))
+        self.assertLessEqual(self.sleeps[0], 1.0)
+        self.assertEqual(30, self.sleeps[1])
+
+    def test_failed_window_is_retried_by_next_run(self):
+        errors = [UpstreamUnavailable('503') for _ in range(3)]
+        client = FakeHistoricData({'AAPL': errors})
+        job = self.job(client, max_attempts=2)
+        job.plan(['AAPL'], datetime(2020, 1, 1), datetime(2020, 6, 1))
+        report = job.run()
+        self.assertEqual(1, report.failed)
+        self.assertEqual(WindowStatus.FAILED,
+                         job.store.status(BackfillWindow('AAPL', datetime(2020, 1, 1), datetime(2020, 6, 1))))
+
+        self.assertEqual(1, job.run().done)
+        self.assertEqual(1, len(self.delivered))
+
+    def test_permanent_error_skips_window(self):
+        client = FakeHistoricData({'BAD': [InvalidSymbol('Not Found')]})
+        job = self.job(client)
+        job.plan(['BAD', 'AAPL'], datetime(2020, 1, 1), datetime(2020, 6, 1))
+        report = job.run()
+        self.assertEqual((1, 1), (report.done, report.skipped))
+        self.assertEqual([], self.sleeps)
+        self.assertEqual(0, job.run().done)
+        self.assertEqual(1, job.store.reset(WindowStatus.SKIPPED))
+        self.assertEqual(1, job.run().done)
+
+    def test_resume_after_crash(self):
+        client = FakeHistoricData()
+        crash_after = 2
+
+        def crashing_sink(window, data):
+            if len(self.delivered) == crash_after:
+                raise KeyboardInterrupt
+            self.delivered.append(window)
+
+        store = CheckpointStore(self.path)
+        job = BackfillJob(store, crashing_sink, window=timedelta(days=366), client_factory=client,
+                          sleep=self.sleeps.append)
+        job.plan(['AAPL'], datetime(2018, 1, 1), datetime(2023, 1, 1))
+        with self.assertRaises(KeyboardInterrupt):
+            job.run()
+        store.close()
+
+        # a new process resumes from the database
+        crash_after = None
+        client.calls.clear()
+        report = self.job(client).run()
+        self.assertEqual(3, report.done)
+        self.assertEqual(3, len(client.calls))
+        self.assertEqual(5, len(set(self.delivered)))
+
+    def test_parallel_run(self):
+        client = FakeHistoricData()
+        job = self.job(client, workers=4)
+        job.plan([f'S{index}' for index in range(10)], datetime(2020, 1, 1), datetime(2022, 1, 1))
+        self.assertEqual(20, job.run().done)
+        self.assertEqual(20, len(set(self.delivered)))
+
+
+if __name__ == '__main__':
+    unittest.main()
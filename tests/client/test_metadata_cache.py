@@ -0,0 +1,73 @@
+# Copyright 2023 Dominic Kneup.
+# Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+import json
+import os
+import tempfile
+import unittest
+from client.api.historic_data import HistoricData
+from client.api.transformers.historic_data_transformer import ChartMeta
+from client.metadata_cache import MetadataCache
+from client.exceptions.APIClientExceptions import APIClientException
+from tests.helpers import FakeSession, make_response
+
+
+def make_chart(symbol, timezone_name='Europe/Berlin'):
+    meta = {'currency': 'EUR', 'symbol': symbol, 'exchangeName': 'GER', 'fullExchangeName': 'XETRA',
+            'instrumentType': 'EQUITY', 'firstTradeDate': 946886400, 'timezone': 'CEST',
+            'exchangeTimezoneName': timezone_name, 'gmtoffset': 7200, 'regularMarketPrice': 120.5,
+            'chartPreviousClose': 119.0, 'priceHint': 2, 'validRanges': ['1d', 'max']}
+    quote = {'open': [119.5], 'low': [119.0], 'high': [121.0], 'close': [120.5], 'volume': [1000]}
+    result = {'meta': meta, 'timestamp': [1688367600],
+              'indicators': {'quote': [quote], 'adjclose': [{'adjclose': [120.5]}]}}
+    return json.dumps({'chart': {'result': [result], 'error': None}}).encode('utf-8')
+
+
+class TestMetadataCache(unittest.TestCase):
+    def setUp(self):
+        self.meta = ChartMeta('SAP.DE', 'EUR', 'GER', 'EQUITY', 946886400, 'CEST', 'Europe/Berlin',
+                              120.5, 119.0, 2, valid_ranges=('1d', 'max'))
+
+    def test_update_and_get(self):
+        cache = MetadataCache()
+        cache.update(self.meta)
+        self.assertIs(self.meta, cache.get('sap.de'))
+        self.assertIn('SAP.DE', cache)
+        self.assertIsNone(cache.get('VOD.L'))
+        self.assertEqual(['SAP.DE'], cache.symbols())
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'meta', 'charts.json')
+            cache = MetadataCache(path)
+            cache.update(self.meta)
+            cache.save()
+            self.assertEqual(self.meta, MetadataCache(path).get('SAP.DE'))
+
+    def test_save_without_path(self):
+        with self.assertRaises(APIClientException):
+            MetadataCache().save()
+
+    def test_historic_data_fills_cache(self):
+        client = HistoricData(output='columns')
+        client.yf_crumb = 'crumb'
+        client.session = FakeSession([make_response(200, make_chart('SAP.DE'))])
+        self.assertIsNone(client.get_metadata('SAP.DE'))
+
+        bars = client.get_historic_data_for_range('SAP.DE', '1d')
+        self.assertEqual([120.5], bars['close'])
+
+        meta = client.get_metadata('SAP.DE')
+        self.assertEqual('XETRA', meta.full_exchange_name)
+        self.assertEqual(7200, meta.gmtoffset)
+        self.assertEqual('Europe/Berlin', str(client.trading_calendar('SAP.DE').timezone))
+
+    def test_historic_data_raw_output_fills_cache(self):
+        client = HistoricData(output='raw')
+        client.yf_crumb = 'crumb'
+        client.session = FakeSession([make_response(200, make_chart('VOD.L', 'Europe/London'))])
+        client.get_historic_data_for_range('VOD.L', '1d')
+        self.assertEqual('Europe/London', client.get_metadata('VOD.L').exchange_timezone_name)
+
+
+if __name__ == '__main__':
+    unittest.main()
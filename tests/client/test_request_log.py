@@ -0,0 +1,78 @@
+# Copyright 2023 Dominic Kneup.
+# Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+import io
+import json
+import logging
+import subprocess
+import sys
+import unittest
+from unittest.mock import patch
+from client import request_log
+from client.api_client import ApiClient
+from client.api.similar_securities import SimilarSecurities
+from client.exceptions.APIClientExceptions import UpstreamUnavailable
+from tests.helpers import FailingSession, FakeSession, make_response
+
+BODY = b'{"finance":{"result":[{"symbol":"GS","recommendedSymbols":[]}],"error":null}}'
+
+
+class TestRequestLog(unittest.TestCase):
+    def setUp(self):
+        self.client = ApiClient()
+        self.stream = io.StringIO()
+
+    def enable(self):
+        handler = request_log.enable(self.stream)
+        self.addCleanup(request_log.disable, handler)
+
+    def entries(self):
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_import_leaves_root_logger_alone(self):
+        code = ('import logging, client.api.quote, client.api.historic_data, client.api.similar_securities; '
+                'print(len(logging.getLogger().handlers), logging.getLogger().level)')
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        self.assertEqual(f'0 {logging.WARNING}', result.stdout.strip())
+
+    def test_request_log_fields(self):
+        self.enable()
+        self.client.session = FakeSession([make_response(200, BODY, {'Content-Length': '40'})])
+        self.client.request_api('https://example.com/x', params={'crumb': 'secret'},
+                                headers={'User-Agent': 'test'})
+        entry, = self.entries()
+        self.assertEqual('https://example.com/x', entry['url'])
+        self.assertEqual(('default', 200, len(BODY), 40, False),
+                         (entry['endpoint'], entry['status'], entry['bytes'], entry['wire_bytes'],
+                          entry['conditional']))
+        self.assertGreaterEqual(entry['latency_ms'], 0)
+        self.assertNotIn('secret', self.stream.getvalue())
+
+    def test_failed_request_is_logged(self):
+        self.enable()
+        self.client.session = FailingSession()
+        with self.assertRaises(UpstreamUnavailable):
+            self.client.request_api('https://example.com/x', headers={'User-Agent': 'test'})
+        entry, = self.entries()
+        self.assertEqual('ConnectionError', entry['error'])
+        self.assertNotIn('status', entry)
+
+    def test_disabled_request_log_collects_nothing(self):
+        self.client.session = FakeSession([make_response(200, BODY)])
+        with patch.object(ApiClient, '_log_request') as log_request:
+            self.client.request_api('https://example.com/x', headers={'User-Agent': 'test'})
+        log_request.assert_not_called()
+
+    def test_per_call_logs_are_debug(self):
+        client = SimilarSecurities(output_format='raw')
+        client.session = FakeSession([make_response(200, BODY)])
+        logger = logging.getLogger('client.api.similar_securities')
+        with self.assertNoLogs(logger, logging.INFO):
+            client.get_similar_securities('GS')
+        client.session.responses.append(make_response(200, BODY))
+        with self.assertLogs(logger, logging.DEBUG) as logs:
+            client.get_similar_securities('MS')
+        self.assertIn('MS', logs.output[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# Copyright 2023 Dominic Kneup.
+# Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+import unittest
+from client.api_client import ApiClient
+from client.response_cache import ResponseCache
+from tests.helpers import FakeSession, make_response
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.body = b'{"finance":{"result":[{"symbol":"GS","recommendedSymbols":[]}],"error":null}}'
+        self.client = ApiClient()
+
+    def test_key_ignores_parameter_order(self):
+        self.assertEqual(ResponseCache.key('https://example.com', {'a': 1, 'b': 2}),
+                         ResponseCache.key('https://example.com', {'b': 2, 'a': 1}))
+
+    def test_revalidation_with_etag(self):
+        self.client.session = FakeSession([
+            make_response(200, self.body, {'ETag': '"abc"', 'Content-Length': '40'}),
+            make_response(304),
+        ])
+        first = self.client.request_api('https://example.com/x', headers={'User-Agent': 'test'})
+        second = self.client.request_api('https://example.com/x', headers={'User-Agent': 'test'})
+
+        self.assertEqual(first, second)
+        self.assertNotIn('If-None-Match', self.client.session.sent_headers[0])
+        self.assertEqual('"abc"', self.client.session.sent_headers[1]['If-None-Match'])
+        self.assertIn('gzip', self.client.session.sent_headers[1]['Accept-Encoding'])
+
+        metrics = self.client.transfer_metrics
+        self.assertEqual(2, metrics.requests)
+        self.assertEqual(1, metrics.not_modified)
+        self.assertEqual(len(self.body), metrics.bytes_saved)
+        self.assertEqual(40, metrics.bytes_received)
+        self.assertEqual(len(self.body) - 40, metrics.as_dict()['compression_saved'])
+
+    def test_last_modified_revalidation(self):
+        self.client.session = FakeSession([
+            make_response(200, self.body, {'Last-Modified': 'Mon, 02 Oct 2023 00:00:00 GMT'}),
+            make_response(200, self.body, {'Last-Modified': 'Mon, 02 Oct 2023 00:00:00 GMT'}),
+        ])
+        self.client.request_api('https://example.com/x', headers={'User-Agent': 'test'})
+        self.client.request_api('https://example.com/x', headers={'User-Agent': 'test'})
+        self.assertEqual('Mon, 02 Oct 2023 00:00:00 GMT',
+                         self.client.session.sent_headers[1]['If-Modified-Since'])
+
+    def test_responses_without_validators_are_not_cached(self):
+        self.client.session = FakeSession([make_response(200, self.body)])
+        self.client.request_api('https://example.com/x', headers={'User-Agent': 'test'})
+        self.assertEqual(0, len(self.client.response_cache))
+
+    def test_cache_is_bounded(self):
+        cache = ResponseCache(max_entries=2)
+        for index in range(3):
+            cache.store(cache.key('https://example.com/' + str(index)),
+                        make_response(200, self.body, {'ETag': str(index)}))
+        self.assertEqual(2, len(cache))
+        self.assertIsNone(cache.get(cache.key('https://example.com/0')))
+
+
+if __name__ == '__main__':
+    unittest.main()
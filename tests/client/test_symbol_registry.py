@@ -0,0 +1,122 @@
+# Copyright 2023 Dominic Kneup.
+# Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from parameterized import parameterized
+from client.api.historic_data import HistoricData
+from client.symbol_registry import SymbolRegistry, normalize_symbol, normalize_symbols
+from client.exceptions.APIClientExceptions import InvalidSymbol, ValidatorException
+from tests.helpers import FakeClock, FakeSession, make_quote, make_response
+
+
+class TestSymbolRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = SymbolRegistry()
+
+    @parameterized.expand([
+        (" sap.de ", "SAP.DE"),
+        ("btc-usd", "BTC-USD"),
+        ("eurusd=x", "EURUSD=X"),
+        ("^gspc", "^GSPC"),
+    ])
+    def test_normalize_symbol(self, symbol, expected):
+        self.assertEqual(expected, normalize_symbol(symbol))
+
+    @parameterized.expand([("",), ("AA PL",), ("AAPL,MSFT",), (None,)])
+    def test_normalize_invalid_symbol(self, symbol):
+        with self.assertRaises(ValidatorException):
+            normalize_symbol(symbol)
+
+    def test_normalize_symbols_deduplicates(self):
+        self.assertEqual(['SAP.DE', 'VOD.L', 'BTC-USD'],
+                         normalize_symbols(['sap.de', 'VOD.L', ' ', 'SAP.DE', 'btc-usd', 'vod.l']))
+
+    def test_normalize_symbols_skips_invalid(self):
+        invalid = []
+        with self.assertLogs('client.symbol_registry', 'WARNING'):
+            symbols = normalize_symbols(['sap.de', 'AAPL,MSFT', None, 'VOD.L'], invalid)
+        self.assertEqual(['SAP.DE', 'VOD.L'], symbols)
+        self.assertEqual(['AAPL,MSFT', None], invalid)
+
+    def test_record_response(self):
+        data = {'quoteResponse': {'result': [make_quote('SAP.DE')], 'error': None}}
+        self.assertEqual(['SAP.DE'], self.registry.record_response(json.dumps(data), ['sap.de', 'XXXX.DE']))
+
+        info = self.registry.get('sap.de')
+        self.assertTrue(info.valid)
+        self.assertEqual('Europe/Berlin', info.exchange_timezone_name)
+        self.assertEqual('XETRA', info.full_exchange_name)
+        self.assertEqual(946886400000, info.first_trade_date)
+        self.assertTrue(self.registry.is_known_invalid('XXXX.DE'))
+        self.assertEqual(['SAP.DE', 'VOD.L'], self.registry.filter(['sap.de', 'xxxx.de', 'VOD.L']))
+
+    def test_invalid_response_is_ignored(self):
+        quote = make_quote('SAP.DE')
+        del quote['exchangeTimezoneName']
+        self.assertEqual([], self.registry.record_response({'quoteResponse': {'result': [quote]}}, ['SAP.DE']))
+        self.assertEqual(0, len(self.registry))
+
+    def test_empty_response_marks_requested_invalid(self):
+        self.registry.record_response(b'{"quoteResponse":{"result":[],"error":null}}', ['GONE'])
+        self.assertTrue(self.registry.is_known_invalid('GONE'))
+
+    def test_invalid_mark_expires(self):
+        clock = FakeClock()
+        registry = SymbolRegistry(invalid_ttl=60.0, clock=clock)
+        registry.mark_invalid('GONE')
+        self.assertTrue(registry.is_known_invalid('GONE'))
+        clock.now = 60.0
+        self.assertFalse(registry.is_known_invalid('GONE'))
+        self.assertEqual(['GONE'], registry.filter(['GONE']))
+
+    def test_clear_invalid(self):
+        self.registry.record_quote(make_quote('SAP.DE'))
+        self.registry.mark_invalid('GONE')
+        self.registry.mark_invalid('OLD')
+        self.assertEqual(1, self.registry.clear_invalid('gone'))
+        self.assertFalse(self.registry.is_known_invalid('GONE'))
+        self.assertEqual(1, self.registry.clear_invalid())
+        self.assertEqual(['SAP.DE'], [symbol for symbol in ('SAP.DE', 'GONE', 'OLD') if symbol in self.registry])
+
+    def test_clamp_start_date(self):
+        self.registry.record_quote(make_quote('SAP.DE'))
+        start = datetime(1990, 1, 1, tzinfo=timezone.utc)
+        self.assertEqual(datetime(2000, 1, 3, 8, tzinfo=timezone.utc),
+                         self.registry.clamp_start_date('SAP.DE', start))
+        later = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        self.assertEqual(later, self.registry.clamp_start_date('SAP.DE', later))
+        self.assertEqual(start, self.registry.clamp_start_date('VOD.L', start))
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'symbols.json')
+            registry = SymbolRegistry(path)
+            registry.record_quote(make_quote('SAP.DE'))
+            registry.mark_invalid('GONE')
+            registry.save()
+
+            loaded = SymbolRegistry(path)
+            self.assertEqual(registry.get('SAP.DE'), loaded.get('SAP.DE'))
+            self.assertTrue(loaded.is_known_invalid('GONE'))
+
+    def test_historic_data_skips_known_invalid_symbol(self):
+        client = HistoricData(output='raw')
+        client.yf_crumb = 'crumb'
+        client.symbol_registry = self.registry
+        client.session = FakeSession([
+            make_response(404, b'{"chart":{"result":null,"error":{"code":"Not Found","description":"delisted"}}}'),
+        ])
+        with self.assertRaises(InvalidSymbol):
+            client.get_historic_data_for_range('GONE', '5d')
+        self.assertTrue(self.registry.is_known_invalid('GONE'))
+
+        # no response left in the session: a second request would fail with IndexError
+        with self.assertRaises(InvalidSymbol):
+            client.get_historic_data_for_range('GONE', '5d')
+
+
+if __name__ == '__main__':
+    unittest.main()
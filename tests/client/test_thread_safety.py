@@ -0,0 +1,87 @@
+# Copyright 2023 Dominic Kneup.
+# Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+import io
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from client.api_client import ApiClient
+from client.api.config import settings
+from client.api.historic_data import HistoricData
+from client.api.quote import Quote
+from client.circuit_breaker import CircuitBreakerRegistry
+from tests.helpers import make_response, quote_response
+
+THREADS = 16
+REQUESTS = 400
+EXPIRE_AFTER = 100
+
+
+class CrumbUpstream:
+    """
+    Thread-safe session stand-in: hands out numbered crumbs and rejects every crumb but
+    the latest one. The crumb expires once, after EXPIRE_AFTER accepted requests.
+    """
+    def __init__(self, body):
+        self.body = body
+        self.lock = threading.Lock()
+        self.crumb_fetches = 0
+        self.valid = None
+        self.accepted = 0
+        self.rejected = 0
+
+    def get(self, url, headers=None, params=None, **kwargs):
+        with self.lock:
+            if url == settings.crumb_cookie_endpoint:
+                return make_response(404)
+            if url == settings.crumb_api_endpoint:
+                self.crumb_fetches += 1
+                self.valid = f'crumb-{self.crumb_fetches}'
+                return make_response(200, self.valid.encode())
+            if params['crumb'] != self.valid:
+                self.rejected += 1
+                return make_response(401, b'{"finance":{"error":{"code":"Unauthorized"}}}')
+            self.accepted += 1
+            if self.accepted == EXPIRE_AFTER:
+                self.valid = None
+            return make_response(200, self.body(params))
+
+
+class TestThreadSafety(unittest.TestCase):
+    def hammer(self, call):
+        with patch('sys.stdout', io.StringIO()) as stdout, \
+                ThreadPoolExecutor(max_workers=THREADS) as executor:
+            results = list(executor.map(call, range(REQUESTS)))
+        self.assertEqual('', stdout.getvalue())
+        return results
+
+    def test_shared_quote_instance(self):
+        upstream = CrumbUpstream(lambda params: quote_response(params['symbols']))
+        with patch.object(ApiClient, 'session_factory', lambda: upstream):
+            quote = Quote(output='dict', circuit_breakers=CircuitBreakerRegistry())
+
+        results = self.hammer(lambda index: quote.get_quote(f'S{index}'))
+
+        self.assertEqual([f'S{index}' for index in range(REQUESTS)], [result['symbol'] for result in results])
+        # the first crumb is fetched lazily by the first thread and one after the expiry, shared by all threads
+        self.assertEqual(2, upstream.crumb_fetches)
+        self.assertEqual(REQUESTS, upstream.accepted)
+        self.assertEqual('crumb-2', quote.crumb)
+
+    def test_shared_historic_data_instance(self):
+        body = b'{"chart":{"result":[],"error":null}}'
+        upstream = CrumbUpstream(lambda params: body)
+        client = HistoricData(output='raw', circuit_breakers=CircuitBreakerRegistry())
+        client.session = upstream
+
+        results = self.hammer(lambda index: client.get_historic_data_for_range(f'S{index}', '1d'))
+
+        self.assertEqual({body.decode()}, set(results))
+        # the first crumb is fetched lazily by the first thread, the others wait for it
+        self.assertEqual(2, upstream.crumb_fetches)
+        self.assertEqual(REQUESTS, upstream.accepted)
+        self.assertLessEqual(upstream.rejected, THREADS)
+
+
+if __name__ == '__main__':
+    unittest.main()
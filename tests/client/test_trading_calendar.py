@@ -0,0 +1,176 @@
+# Copyright 2023 Dominic Kneup.
+# Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+import json
+import unittest
+from datetime import date, datetime, timezone
+from zoneinfo import ZoneInfo
+from parameterized import parameterized
+from client.api.historic_data import HistoricData
+from client.api.transformers.historic_data_transformer import HistoricDataTransformer, ChartMeta
+from client.trading_calendar import TradingCalendar, easter_sunday, nyse_holidays
+from tests.helpers import FakeSession, RecordingSession, make_response
+
+NEW_YORK = ZoneInfo('America/New_York')
+
+
+def chart_meta(symbol, instrument_type, timezone_name):
+    return ChartMeta(symbol, 'USD', 'EXC', instrument_type, 946886400, 'EST', timezone_name, 1.0, 1.0, 2)
+
+
+def chart_body(symbol, timestamps):
+    meta = {'symbol': symbol, 'currency': 'USD', 'exchangeName': 'CCC', 'instrumentType': 'CRYPTOCURRENCY',
+            'firstTradeDate': 1410912000, 'timezone': 'UTC', 'exchangeTimezoneName': 'UTC',
+            'regularMarketPrice': 1.0, 'chartPreviousClose': 1.0, 'priceHint': 2}
+    prices = {name: [1.0] * len(timestamps) for name in ('open', 'low', 'high', 'close')}
+    return json.dumps({'chart': {'result': [{
+        'meta': meta, 'timestamp': timestamps,
+        'indicators': {'quote': [{**prices, 'volume': [1] * len(timestamps)}],
+                       'adjclose': [{'adjclose': [1.0] * len(timestamps)}]},
+    }], 'error': None}}).encode('utf-8')
+
+
+class TestTradingCalendar(unittest.TestCase):
+    def setUp(self):
+        self.calendar = TradingCalendar.for_timezone('America/New_York', 'EQUITY')
+
+    @parameterized.expand([
+        (2019, date(2019, 4, 21)),
+        (2024, date(2024, 3, 31)),
+        (2025, date(2025, 4, 20)),
+    ])
+    def test_easter_sunday(self, year, expected):
+        self.assertEqual(expected, easter_sunday(year))
+
+    def test_nyse_holidays(self):
+        self.assertEqual(sorted(nyse_holidays(2023)), [
+            date(2023, 1, 2), date(2023, 1, 16), date(2023, 2, 20), date(2023, 4, 7),
+            date(2023, 5, 29), date(2023, 6, 19), date(2023, 7, 4), date(2023, 9, 4),
+            date(2023, 11, 23), date(2023, 12, 25),
+        ])
+        # New Year's Day on a Saturday is not observed
+        self.assertNotIn(date(2021, 12, 31), nyse_holidays(2021))
+        self.assertNotIn(date(2022, 12, 31), nyse_holidays(2022))
+
+    def test_sessions_skip_weekends_and_holidays(self):
+        self.assertEqual([date(2023, 7, 3), date(2023, 7, 5), date(2023, 7, 6), date(2023, 7, 7)],
+                         self.calendar.sessions(date(2023, 7, 1), date(2023, 7, 9)))
+
+    def test_resolve_range_aligns_to_sessions(self):
+        period = self.calendar.resolve_range(datetime(2023, 7, 1, 13, 5), datetime(2023, 7, 9, 18, 40))
+        self.assertEqual((datetime(2023, 7, 3, tzinfo=NEW_YORK), datetime(2023, 7, 8, tzinfo=NEW_YORK)), period)
+
+    def test_resolve_range_converts_aware_datetimes(self):
+        # 02:00 UTC is after the close of July 5th and 12:00 UTC before the open of July 7th
+        period = self.calendar.resolve_range(datetime(2023, 7, 6, 2, tzinfo=timezone.utc),
+                                             datetime(2023, 7, 7, 12, tzinfo=timezone.utc))
+        self.assertEqual((datetime(2023, 7, 6, tzinfo=NEW_YORK), datetime(2023, 7, 7, tzinfo=NEW_YORK)), period)
+
+    @parameterized.expand([
+        (datetime(2023, 7, 8), datetime(2023, 7, 10)),   # weekend
+        (datetime(2023, 12, 25), datetime(2023, 12, 26)),  # Christmas
+        (datetime(2023, 7, 5, 17), datetime(2023, 7, 6, 9)),  # after close to before open
+    ])
+    def test_resolve_range_without_sessions(self, start, end):
+        self.assertIsNone(self.calendar.resolve_range(start, end))
+
+    def test_other_exchanges_trade_on_weekdays(self):
+        calendar = TradingCalendar.for_timezone('Europe/Berlin', 'EQUITY')
+        self.assertTrue(calendar.is_session(date(2023, 7, 4)))
+        self.assertFalse(calendar.is_session(date(2023, 7, 8)))
+        self.assertIs(calendar, TradingCalendar.for_timezone('Europe/Berlin', 'ETF'))
+
+    @parameterized.expand([("Mars/Olympus_Mons",), ("",)])
+    def test_unknown_timezone_falls_back_to_utc(self, timezone_name):
+        with self.assertLogs('client.trading_calendar', 'WARNING'):
+            calendar = TradingCalendar(timezone_name)
+        self.assertEqual(ZoneInfo('UTC'), calendar.timezone)
+        self.assertFalse(calendar.is_session(date(2023, 7, 8)))
+
+    @parameterized.expand([
+        ('unknown', None, None),
+        ('crypto', 'UTC', 'CRYPTOCURRENCY'),
+        ('future', 'America/New_York', 'FUTURE'),
+    ])
+    def test_calendars_without_known_sessions_skip_nothing(self, _, timezone_name, instrument_type):
+        calendar = TradingCalendar.for_timezone(timezone_name, instrument_type)
+        self.assertEqual(7, len(calendar.sessions(date(2023, 11, 20), date(2023, 11, 26))))
+        self.assertIsNotNone(calendar.resolve_range(datetime(2023, 11, 23), datetime(2023, 11, 24)))
+
+    def test_historic_data_without_sessions_is_noop(self):
+        client = HistoricData(output='columns')
+        client.metadata_cache.update(chart_meta('GS', 'EQUITY', 'America/New_York'))
+        client.session = FakeSession([])
+        result = client.get_historic_data('GS', datetime(2023, 7, 8), datetime(2023, 7, 10))
+        self.assertEqual({column: [] for column in HistoricDataTransformer.columns}, result)
+
+    def test_historic_data_uses_exchange_time_and_session_bounds(self):
+        client = HistoricData(output='raw')
+        client.yf_crumb = 'crumb'
+        client.metadata_cache.update(chart_meta('SAP.DE', 'EQUITY', 'Europe/Berlin'))
+        body = b'{"chart":{"result":[],"error":null}}'
+        client.session = RecordingSession([make_response(200, body), make_response(200, body)])
+        client.get_historic_data('SAP.DE', datetime(2023, 7, 1, 10), datetime(2023, 7, 5, 11))
+        client.get_historic_data('SAP.DE', datetime(2023, 7, 2, 23), datetime(2023, 7, 5, 16))
+
+        berlin = ZoneInfo('Europe/Berlin')
+        expected = {'period1': int(datetime(2023, 7, 3, tzinfo=berlin).timestamp()),
+                    'period2': int(datetime(2023, 7, 6, tzinfo=berlin).timestamp()),
+                    'interval': '1d', 'crumb': 'crumb'}
+        self.assertEqual([expected, expected], client.session.sent_params)
+
+    def test_historic_data_accepts_naive_start_and_aware_end(self):
+        client = HistoricData(output='raw')
+        client.yf_crumb = 'crumb'
+        client.metadata_cache.update(chart_meta('SAP.DE', 'EQUITY', 'Europe/Berlin'))
+        body = b'{"chart":{"result":[],"error":null}}'
+        client.session = RecordingSession([make_response(200, body)])
+        end = datetime(2023, 7, 5, 9, tzinfo=timezone.utc)
+        client.get_historic_data('SAP.DE', datetime(2023, 7, 3), end)
+
+        berlin = ZoneInfo('Europe/Berlin')
+        self.assertEqual(int(datetime(2023, 7, 3, tzinfo=berlin).timestamp()),
+                         client.session.sent_params[0]['period1'])
+        self.assertEqual(int(datetime(2023, 7, 6, tzinfo=berlin).timestamp()),
+                         client.session.sent_params[0]['period2'])
+
+    @parameterized.expand([
+        ('crypto_weekend', 'BTC-USD', datetime(2024, 6, 1), datetime(2024, 6, 3)),
+        ('non_us_listing_on_thanksgiving', 'SAP.DE', datetime(2024, 11, 28), datetime(2024, 11, 29)),
+    ])
+    def test_historic_data_of_unknown_symbols_is_requested(self, _, symbol, start, end):
+        client = HistoricData(output='columns')
+        client.yf_crumb = 'crumb'
+        timestamp = int(start.replace(tzinfo=NEW_YORK).timestamp()) + 3600
+        client.session = RecordingSession([make_response(200, chart_body(symbol, [timestamp]))])
+        result = client.get_historic_data(symbol, start, end)
+        self.assertEqual(1, len(client.session.sent_params))
+        self.assertEqual([timestamp], result['timestamp'])
+
+    def test_crypto_trades_on_weekends(self):
+        client = HistoricData(output='columns')
+        client.yf_crumb = 'crumb'
+        client.metadata_cache.update(chart_meta('BTC-USD', 'CRYPTOCURRENCY', 'UTC'))
+        client.session = RecordingSession([make_response(200, chart_body('BTC-USD', [1717200000]))])
+        client.get_historic_data('BTC-USD', datetime(2024, 6, 1), datetime(2024, 6, 3))
+        self.assertEqual([{'period1': 1717200000, 'period2': 1717372800, 'interval': '1d', 'crumb': 'crumb'}],
+                         client.session.sent_params)
+
+    @parameterized.expand([('dict',), ('columns',), ('chart',)])
+    def test_intraday_bars_are_trimmed_to_the_period(self, output):
+        client = HistoricData(interval='30m', output=output)
+        client.yf_crumb = 'crumb'
+        client.metadata_cache.update(chart_meta('GS', 'EQUITY', 'America/New_York'))
+        session_open = int(datetime(2024, 6, 3, 9, 30, tzinfo=NEW_YORK).timestamp())
+        timestamps = [session_open + index * 1800 for index in range(13)]
+        client.session = RecordingSession([make_response(200, chart_body('GS', timestamps))])
+        result = client.get_historic_data('GS', datetime(2024, 6, 3, 10, 15), datetime(2024, 6, 3, 11))
+        self.assertEqual(int(datetime(2024, 6, 3, tzinfo=NEW_YORK).timestamp()), client.session.sent_params[0]['period1'])
+        bars = {'dict': lambda: [bar['timestamp'] for bar in result],
+                'columns': lambda: result['timestamp'],
+                'chart': lambda: result['bars']['timestamp']}[output]()
+        # The 10:00 bar overlaps 10:15, the 11:00 bar starts at the exclusive end
+        self.assertEqual(timestamps[1:3], bars)
+
+
+if __name__ == '__main__':
+    unittest.main()
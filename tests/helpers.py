@@ -0,0 +1,88 @@
+# Copyright 2023 Dominic Kneup.
+# Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+import json
+import os
+import requests
+from client.api.validators.quote_validator import QuoteValidator
+from client.cassette import Cassette
+from client.circuit_breaker import shared_registries
+
+API_CASSETTES = os.path.join(os.path.dirname(__file__), 'data', 'api')
+
+
+def make_response(status_code, body=b'', headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body
+    response.encoding = 'utf-8'
+    response.headers.update(headers or {})
+    return response
+
+
+def make_quote(symbol):
+    quote = {prop: {'raw': 1, 'fmt': '1'} for prop in QuoteValidator.multi_dimensional_properties}
+    quote.update({
+        'currency': 'EUR',
+        'symbol': symbol,
+        'fullExchangeName': 'XETRA',
+        'firstTradeDateMilliseconds': 946886400000,
+        'exchangeTimezoneName': 'Europe/Berlin',
+        'regularMarketPrice': {'raw': 120.5, 'fmt': '120.50'},
+        'priceHint': {'raw': 2, 'fmt': '2'},
+    })
+    return quote
+
+
+def quote_response(*symbols):
+    return json.dumps({'quoteResponse': {'result': [make_quote(symbol) for symbol in symbols],
+                                         'error': None}}).encode('utf-8')
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.sent_headers = []
+
+    def get(self, url, headers=None, params=None, **kwargs):
+        self.sent_headers.append(headers)
+        return self.responses.pop(0)
+
+
+class RecordingSession(FakeSession):
+    def __init__(self, responses):
+        super().__init__(responses)
+        self.sent_params = []
+
+    def get(self, url, headers=None, params=None, **kwargs):
+        self.sent_params.append(None if params is None else dict(params))
+        return super().get(url, headers, params, **kwargs)
+
+
+class FailingSession:
+    def get(self, url, headers=None, params=None, **kwargs):
+        raise requests.exceptions.ConnectionError('connection refused')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def api_cassette(name):
+    # Recorded responses of the API tests; CASSETTE_MODE=record records them again from the live API
+    return Cassette(os.path.join(API_CASSETTES, f'{name}.jsonl.gz'),
+                    mode=os.environ.get('CASSETTE_MODE', 'replay'))
+
+
+def reset_circuit_breakers():
+    # Tests reaching the live API may open the shared circuits; close them for the next tests
+    for registry in shared_registries():
+        registry.reset()
@@ -0,0 +1,138 @@
+# Copyright 2023 Dominic Kneup.
+# Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+import json
+import pickle
+import unittest
+from unittest.mock import patch
+from parameterized import parameterized
+from client.api import batch
+from client.api.transformers.historic_data_transformer import HistoricDataTransformer
+from client.api.transformers.quote_transformer import QuoteTransformer
+from client.api.transformers.similar_securities_transformer import SimilarSecuritiesTransformer
+from client.api.validators.historic_data_validator import HistoricDataValidator
+from client.api.validators.quote_validator import QuoteValidator
+from client.api.validators.similar_securities_validator import SimilarSecuritiesValidator
+from client.exceptions.APIClientExceptions import (
+    InvalidSymbol, TransformerException, ValidatorException
+)
+from tests.helpers import make_quote
+
+
+def quote_payload(*symbols):
+    return {'quoteResponse': {'result': [make_quote(symbol) for symbol in symbols], 'error': None}}
+
+
+def chart_payload(symbol, closes):
+    meta = {prop: 1 for prop in HistoricDataValidator.required_properties}
+    meta.update({'symbol': symbol, 'currency': 'USD', 'exchangeTimezoneName': 'America/New_York'})
+    prices = {field: list(closes) for field in ('open', 'low', 'high', 'close')}
+    return {'chart': {'result': [{
+        'meta': meta,
+        'timestamp': [1_700_000_000 + index * 86400 for index in range(len(closes))],
+        'indicators': {'quote': [{**prices, 'volume': [100] * len(closes)}],
+                       'adjclose': [{'adjclose': list(closes)}]},
+    }], 'error': None}}
+
+
+def similar_payload(*symbols):
+    return {'finance': {'result': [{'symbol': 'GS', 'recommendedSymbols': [
+        {'symbol': symbol, 'score': 0.5} for symbol in symbols]}], 'error': None}}
+
+
+class TestBatch(unittest.TestCase):
+    @parameterized.expand([
+        ('quote', QuoteValidator, quote_payload('SAP.DE'), {'quoteResponse': {}}),
+        ('historic', HistoricDataValidator, chart_payload('GS', [1.0]), {'chart': {'result': [{'meta': {}}]}}),
+        ('similar', SimilarSecuritiesValidator, similar_payload('MS'), {'finance': {}}),
+    ])
+    def test_validate_batch(self, _, validator, valid, invalid):
+        items = validator.validate_batch([valid, json.dumps(valid).encode('utf-8'), invalid, b'{'])
+        self.assertEqual([True, True, False, False], [item.ok for item in items])
+        self.assertEqual(valid, items[1].value)
+        self.assertEqual(validator.collect_errors(invalid), items[2].error.errors)
+        self.assertIsInstance(items[3].error, ValidatorException)
+
+    @parameterized.expand([
+        ('quote', QuoteValidator, QuoteTransformer.transform_batch, {'quoteResponse': {'result': [], 'error': None}}),
+        ('historic', HistoricDataValidator, HistoricDataTransformer.transform_batch,
+         {'chart': {'result': None, 'error': {'code': 'Not Found', 'description': 'No data found'}}}),
+        ('similar', SimilarSecuritiesValidator, SimilarSecuritiesTransformer.transform_batch,
+         {'finance': {'result': [], 'error': None}}),
+    ])
+    def test_batch_reports_invalid_symbols(self, _, validator, transform_batch, payload):
+        for items in (validator.validate_batch([payload, json.dumps(payload)]), transform_batch([payload])):
+            for item in items:
+                self.assertIsInstance(item.error, InvalidSymbol)
+
+    def test_batch_reports_api_errors(self):
+        payload = {'chart': {'result': None, 'error': {'code': 'Bad Request', 'description': 'Invalid range'}}}
+        item = HistoricDataValidator.validate_batch([payload])[0]
+        self.assertIsInstance(item.error, ValidatorException)
+        self.assertEqual(['API response contains error. Maybe your parameters are invalid'], item.error.errors)
+
+    def test_quote_transform_batch(self):
+        invalid = quote_payload('SAP.DE')
+        del invalid['quoteResponse']['result'][0]['currency']
+        items = QuoteTransformer.transform_batch(
+            [quote_payload('SAP.DE', 'BMW.DE'), invalid, json.dumps(quote_payload('ALV.DE'))],
+            fields=['regularMarketPrice', 'regularMarketPrice'])
+        self.assertEqual([{'symbol': 'SAP.DE', 'regularMarketPrice': 120.5},
+                          {'symbol': 'BMW.DE', 'regularMarketPrice': 120.5}], items[0].value)
+        self.assertEqual('Missing currency property', str(items[1].error))
+        self.assertEqual('ALV.DE', items[2].value[0]['symbol'])
+
+    @parameterized.expand([
+        ('columns', lambda value: value['close'], [1.0, 2.0]),
+        ('dict', lambda value: [bar['close'] for bar in value], [1.0, 2.0]),
+        ('chart', lambda value: value['meta'].symbol, 'GS'),
+    ])
+    def test_historic_transform_batch(self, output, extract, expected):
+        items = HistoricDataTransformer.transform_batch(
+            [chart_payload('GS', [1.0, 2.0]), {'chart': {'result': []}}, []], output)
+        self.assertEqual(expected, extract(items[0].value))
+        self.assertIsInstance(items[1].error, ValidatorException)
+        self.assertIsInstance(items[2].error, TransformerException)
+
+    def test_historic_batch_matches_single_response(self):
+        payload = json.dumps(chart_payload('GS', [1.0, None, 3.0]))
+        for policy in ('drop', 'ffill'):
+            self.assertEqual(HistoricDataTransformer.output(payload, 'columns', policy),
+                             HistoricDataTransformer.transform_batch([payload], 'columns', policy)[0].value)
+
+    @parameterized.expand([
+        ('output', {'output': 'raw'}),
+        ('null_policy', {'null_policy': 'zero'}),
+    ])
+    def test_historic_batch_invalid_arguments(self, _, arguments):
+        with self.assertRaises(TransformerException):
+            HistoricDataTransformer.transform_batch([chart_payload('GS', [1.0])], **arguments)
+
+    def test_similar_transform_batch(self):
+        items = SimilarSecuritiesTransformer.transform_batch([similar_payload('MS', 'JPM'), '{"finance": {}}'])
+        self.assertEqual(['MS', 'JPM'], items[0].value)
+        self.assertIsInstance(items[1].error, ValidatorException)
+
+    def test_process_pool(self):
+        payloads = [json.dumps(quote_payload(f'S{index}')).encode('utf-8') for index in range(30)]
+        payloads[7] = b'{"quoteResponse": {}}'
+        with patch.object(batch, 'MIN_PARALLEL_ITEMS', 10):
+            items = QuoteTransformer.transform_batch(payloads, fields=['currency'], workers=2)
+        self.assertEqual(30, len(items))
+        self.assertEqual([{'symbol': 'S29', 'currency': 'EUR'}], items[29].value)
+        self.assertEqual(['Missing quoteResponse property'], items[7].error.errors)
+        self.assertEqual(29, sum(item.ok for item in items))
+
+    def test_small_batches_stay_in_process(self):
+        with patch.object(batch, 'ProcessPoolExecutor') as executor:
+            batch.run_batch(len, ['a'] * 3, workers=4)
+        executor.assert_not_called()
+
+    def test_errors_survive_pickling(self):
+        error = pickle.loads(pickle.dumps(InvalidSymbol('Not found', 404)))
+        self.assertEqual((404, ['Not found']), (error.status_code, error.errors))
+        error = pickle.loads(pickle.dumps(ValidatorException('first', ['first', 'second'])))
+        self.assertEqual(['first', 'second'], error.errors)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,7 +5,7 @@ Copyright 2023 Dominic Kneup.
 Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
 """
 import unittest
-from client.api.transformers.historic_data_transformer import HistoricDataTransformer, OutputFormat
+from client.api.transformers.historic_data_transformer import HistoricDataTransformer, OutputFormat, NullPolicy, ChartMeta
 from client.exceptions.APIClientExceptions import TransformerException
 from parameterized import parameterized
 
@@ -47,6 +47,7 @@ class TestHistoricDataTransformer(unittest.TestCase):
         self.assertIn('high', actual[0])
         self.assertIn('close', actual[0])
         self.assertIn('adjclose', actual[0])
+        self.assertIn('volume', actual[0])
 
     @parameterized.expand([
         (1696253400, 322.0299987792969, 317.1000061035156, 323.5799865722656, 318.5, 318.5)
@@ -73,6 +74,7 @@ class TestHistoricDataTransformer(unittest.TestCase):
                 'high': 323.5799865722656,
                 'close': 318.5,
                 'adjclose': 318.5,
+                'volume': 1303800,
             },
             {
                 'timestamp': 1696339800,
@@ -81,6 +83,7 @@ class TestHistoricDataTransformer(unittest.TestCase):
                 'high': 315.67999267578125,
                 'close': 306.1199951171875,
                 'adjclose': 306.1199951171875,
+                'volume': 3118600,
             },
             {
                 'timestamp': 1696426200,
@@ -89,6 +92,7 @@ class TestHistoricDataTransformer(unittest.TestCase):
                 'high': 309.05999755859375,
                 'close': 308.6000061035156,
                 'adjclose': 308.6000061035156,
+                'volume': 1872000,
             },
             {
                 'timestamp': 1696512600,
@@ -97,6 +101,7 @@ class TestHistoricDataTransformer(unittest.TestCase):
                 'high': 310.54998779296875,
                 'close': 310.5,
                 'adjclose': 310.5,
+                'volume': 1584600,
             },
             {
                 'timestamp': 1696599000,
@@ -105,6 +110,7 @@ class TestHistoricDataTransformer(unittest.TestCase):
                 'high': 315.32000732421875,
                 'close': 312.4800109863281,
                 'adjclose': 312.4800109863281,
+                'volume': 1595100,
             },
             {
                 'timestamp': 1696858200,
@@ -113,6 +119,7 @@ class TestHistoricDataTransformer(unittest.TestCase):
                 'high': 313.4800109863281,
                 'close': 312.6099853515625,
                 'adjclose': 312.6099853515625,
+                'volume': 1094400,
             },
         ]
 
@@ -125,6 +132,81 @@ class TestHistoricDataTransformer(unittest.TestCase):
         actual_object_output = HistoricDataTransformer.output(self.json, 'dict')
         self.assertEqual(expected_array_output, actual_object_output)
 
+    def test_output_from_bytes(self):
+        raw = self.json.encode('utf-8')
+        self.assertEqual(HistoricDataTransformer.output(self.json, 'dict'), HistoricDataTransformer.output(raw, 'dict'))
+        self.assertEqual(self.json, HistoricDataTransformer.output(raw, 'raw'))
+
+    def test_output_columns(self):
+        actual = HistoricDataTransformer.output(self.json, 'columns')
+        self.assertEqual(['timestamp', 'open', 'low', 'high', 'close', 'adjclose', 'volume'], list(actual))
+        self.assertEqual(6, len(actual['timestamp']))
+        self.assertEqual(303.4800109863281, actual['low'][2])
+        self.assertEqual(1094400, actual['volume'][5])
+
+    def test_output_chart_with_events(self):
+        events = ('"events":{"dividends":{"1696426200":{"amount":2.75,"date":1696426200},'
+                  '"1696253400":{"amount":2.5,"date":1696253400}},'
+                  '"splits":{"1696339800":{"date":1696339800,"numerator":2.0,"denominator":1.0,"splitRatio":"2:1"}}},')
+        actual = HistoricDataTransformer.output(self.json.replace('"timestamp":[', events + '"timestamp":[', 1), 'chart')
+
+        self.assertEqual(6, len(actual['bars']['timestamp']))
+        self.assertEqual({'timestamp': [1696253400, 1696426200], 'amount': [2.5, 2.75]}, actual['events']['dividends'])
+        self.assertEqual({'timestamp': [1696339800], 'numerator': [2.0], 'denominator': [1.0]},
+                         actual['events']['splits'])
+        self.assertEqual({'timestamp': [], 'amount': []}, actual['events']['capitalGains'])
+
+    def test_output_chart_meta(self):
+        meta = HistoricDataTransformer.output(self.json, 'chart')['meta']
+        self.assertIsInstance(meta, ChartMeta)
+        self.assertEqual('GS', meta.symbol)
+        self.assertEqual('USD', meta.currency)
+        self.assertEqual('NYQ', meta.exchange_name)
+        self.assertEqual(925824600, meta.first_trade_date)
+        self.assertEqual('America/New_York', meta.exchange_timezone_name)
+        self.assertEqual(-14400, meta.gmtoffset)
+        self.assertEqual('1d', meta.data_granularity)
+        self.assertIn('max', meta.valid_ranges)
+        self.assertEqual(meta, ChartMeta.from_dict(meta.as_dict()))
+
+    @parameterized.expand([("dict",), ("columns",), ("raw",)])
+    def test_output_with_meta(self, output_format):
+        data, meta = HistoricDataTransformer.output_with_meta(self.json, output_format)
+        self.assertEqual(HistoricDataTransformer.output(self.json, output_format), data)
+        self.assertEqual('GS', meta.symbol)
+
+    def test_meta_of_invalid_raw_response(self):
+        self.assertIsNone(HistoricDataTransformer.transform_meta('{"chart":{"result":[]}}'))
+
+    @parameterized.expand([
+        (NullPolicy.DROP, [1, 4], [10.0, 13.0], [100, 400]),
+        (NullPolicy.FORWARD_FILL, [1, 2, 3, 4], [10.0, 11.0, 11.0, 13.0], [100, 0, 0, 400]),
+    ])
+    def test_filter_nulls(self, policy, timestamps, closes, volumes):
+        prices = [[10.0, None, 12.0, 13.0]] * 3 + [[10.0, 11.0, None, 13.0], [10.0, None, None, 13.0]]
+        actual = HistoricDataTransformer.filter_nulls([1, 2, 3, 4], prices, [100, 200, None, 400], policy)
+        self.assertEqual(timestamps, actual['timestamp'])
+        self.assertEqual(closes, actual['close'])
+        self.assertEqual(volumes, actual['volume'])
+
+    def test_filter_nulls_keep_nan(self):
+        prices = [[10.0, None]] * 5
+        actual = HistoricDataTransformer.filter_nulls([1, 2], prices, [100, None], NullPolicy.NAN)
+        self.assertEqual([1, 2], actual['timestamp'])
+        self.assertEqual(10.0, actual['open'][0])
+        self.assertNotEqual(actual['open'][1], actual['open'][1])
+        self.assertNotEqual(actual['volume'][1], actual['volume'][1])
+
+    def test_filter_nulls_drops_leading_gap_on_forward_fill(self):
+        prices = [[None, 11.0]] * 5
+        actual = HistoricDataTransformer.filter_nulls([1, 2], prices, [None, 5], NullPolicy.FORWARD_FILL)
+        self.assertEqual([2], actual['timestamp'])
+        self.assertEqual([5], actual['volume'])
+
+    def test_invalid_null_policy(self):
+        with self.assertRaises(TransformerException):
+            HistoricDataTransformer.output(self.json, 'dict', 'invalid')
+
     def test_invalid_json(self):
         invalid_json = '{"chart": {"result": [}}'
         with self.assertRaises(TransformerException):
@@ -1,8 +1,11 @@
 # Copyright 2023 Dominic Kneup.
 # Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+import json
 import unittest
+import numpy as np
 from parameterized import parameterized
 from client.api.transformers.quote_transformer import QuoteTransformer
+from client.api.quote import Quote
 from client.exceptions import APIClientExceptions
 
 class TestQuoteTransformer(unittest.TestCase):
@@ -86,6 +89,17 @@ class TestQuoteTransformer(unittest.TestCase):
         actual = QuoteTransformer().transform_fields(fields, allowed_fields)
         self.assertEqual(expected, actual)
 
+    def test_output_field_projection(self):
+        output = QuoteTransformer.output(self.json, "dict", fields=('marketCap', 'regularMarketPrice', 'toCurrency'))
+        self.assertEqual({'symbol': 'AAPL', 'marketCap': 2774914039808, 'regularMarketPrice': 177.49}, output)
+
+    def test_quote_field_projection(self):
+        self.assertEqual((('marketCap', 'symbol'), 'marketCap,symbol'),
+                         Quote.field_projection(['marketCap', 'symbol', 'marketCap']))
+        self.assertIs(Quote.field_projection(('marketCap',)), Quote.field_projection(['marketCap']))
+        with self.assertRaises(APIClientExceptions.ValidatorException):
+            Quote.field_projection(['marketCap', 'unknownField'])
+
     @parameterized.expand([
         ('invalid', "Output format invalid"),
     ])
@@ -120,5 +134,56 @@ class TestQuoteTransformer(unittest.TestCase):
         output = transformer.output(self.json, "raw")
         self.assertEqual(output, self.json)
 
+    def test_output_table_format(self):
+        table = QuoteTransformer.output(self.json, "table")
+        self.assertEqual(1, len(table))
+        self.assertEqual('symbol', table.dtype.names[0])
+        self.assertEqual('AAPL', table['symbol'][0])
+        self.assertEqual(np.int64, table['marketCap'].dtype)
+        self.assertEqual(2774914039808, table['marketCap'][0])
+        self.assertEqual(np.float64, table['regularMarketChangePercent'].dtype)
+        self.assertEqual(np.bool_, table['tradeable'].dtype)
+        self.assertEqual(object, table['corporateActions'].dtype)
+
+    def test_table_from_multiple_quotes(self):
+        quotes = [
+            {'symbol': 'AAPL', 'marketCap': {'raw': 2774914039808, 'fmt': '2.775T'}, 'shortName': 'Apple Inc.'},
+            {'symbol': 'EURUSD=X', 'regularMarketChangePercent': {'raw': 0.25, 'fmt': '0.25%'}},
+            {'symbol': 'MSFT', 'marketCap': {'raw': 2.4e12, 'fmt': '2.4T'}, 'shortName': None},
+            {'shortName': 'no symbol'},
+        ]
+        table = QuoteTransformer.quotes_to_table(quotes)
+        self.assertEqual(['AAPL', 'EURUSD=X', 'MSFT'], table['symbol'].tolist())
+        self.assertEqual(np.float64, table['marketCap'].dtype)
+        self.assertTrue(np.isnan(table['marketCap'][1]))
+        self.assertEqual(['Apple Inc.', '', ''], table['shortName'].tolist())
+
+        # vectorized screening
+        ranked = np.sort(table[table['marketCap'] > 1e12], order='marketCap')[::-1]
+        self.assertEqual(['AAPL', 'MSFT'], ranked['symbol'].tolist())
+
+    def test_table_projection(self):
+        quotes = [{'symbol': 'AAPL', 'marketCap': {'raw': 1, 'fmt': '1'}, 'shortName': 'Apple Inc.'}]
+        table = QuoteTransformer.quotes_to_table(quotes, ['marketCap', 'fiftyTwoWeekHigh'])
+        self.assertEqual(('symbol', 'marketCap', 'fiftyTwoWeekHigh'), table.dtype.names)
+        self.assertIsNone(table['fiftyTwoWeekHigh'][0])
+
+    def test_table_missing_result(self):
+        with self.assertRaises(APIClientExceptions.TransformerException):
+            QuoteTransformer.output('{"quoteResponse":{}}', "table")
+
+    def test_transform_quotes(self):
+        data = json.loads(self.json)
+        second = dict(data['quoteResponse']['result'][0], symbol='MSFT', corporateActions=[{'type': 'split'}])
+        data['quoteResponse']['result'].append(second)
+        quotes = QuoteTransformer.transform_quotes(json.dumps(data), tolerant=True)
+        self.assertEqual(['AAPL', 'MSFT'], [quote['symbol'] for quote in quotes])
+        self.assertEqual([{'type': 'split'}], quotes[1]['corporateActions'])
+        self.assertEqual(QuoteTransformer.output(self.json, "dict", tolerant=True), quotes[0])
+
+    def test_transform_quotes_projection(self):
+        quotes = QuoteTransformer.transform_quotes(self.json, ['marketCap'])
+        self.assertEqual([{'symbol': 'AAPL', 'marketCap': 2774914039808}], quotes)
+
 if __name__ == '__main__':
     unittest.main()
@@ -2,7 +2,9 @@
 # Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
 import json
 import unittest
+from unittest.mock import patch
 from parameterized import parameterized
+from client.api.transformers import transformer
 from client.api.transformers.transformer import Transformer
 
 
@@ -12,6 +14,10 @@ class TestTransformer(unittest.TestCase):
         """
         Setup Demo data (actual api response) for testing
         """
+        # Every test starts without generated flatteners, the cache is restored afterwards
+        flatteners = patch.dict(transformer._flatteners, clear=True)
+        flatteners.start()
+        self.addCleanup(flatteners.stop)
         data = ('{"quoteResponse":{"result":[{"fullExchangeName":"NasdaqGS","symbol":"AMD",'
                 '"fiftyTwoWeekLowChangePercent":{"raw":0.9931281,"fmt":"99.31%"},"gmtOffSetMilliseconds":-14400000,'
                 '"regularMarketOpen":{"raw":109.14,"fmt":"109.14"},"language":"en-US","regularMarketTime":{'
@@ -48,6 +54,22 @@ class TestTransformer(unittest.TestCase):
         self.assertEqual(expected_data, decoded_data)
 
     @parameterized.expand([
+        (b'{"key": "value"}',),
+        (bytearray(b'{"key": "value"}'),),
+        (memoryview(b'{"key": "value"}'),),
+    ])
+    def test_json_to_list_bytes(self, raw_json):
+        """
+        Test decoding JSON from bytes without a str copy
+        """
+        self.assertEqual({'key': 'value'}, Transformer.json_to_list(raw_json))
+
+    def test_to_text(self):
+        self.assertEqual('{"key": "value"}', Transformer.to_text(b'{"key": "value"}'))
+        self.assertEqual('{"key": "value"}', Transformer.to_text('{"key": "value"}'))
+
+    @parameterized.expand([
+        (b'{"key": "value",}', ValueError),
         ('{"key": "value",}', ValueError),
         ('', ValueError),
     ])
@@ -92,3 +114,59 @@ class TestTransformer(unittest.TestCase):
         """
         flattened_data = Transformer.flatten_dict(data)
         self.assertEqual(expected_data, flattened_data)
+
+    def test_flatten_matches_flatten_dict(self):
+        """
+        Test that the generated flattener returns the same result as the generic function
+        """
+        quote = self.data_object['quoteResponse']['result'][0]
+        for tolerant in (False, True):
+            self.assertEqual(Transformer.flatten_dict(quote, tolerant), Transformer.flatten(quote, tolerant))
+            self.assertEqual(Transformer.flatten_dict(quote, tolerant), Transformer.flatten(quote, tolerant))
+
+    def test_flatten_reuses_flattener(self):
+        """
+        Test that records with the same keys share one generated flattener
+        """
+        with patch.object(Transformer, 'compile_flattener', wraps=Transformer.compile_flattener) as compile_:
+            Transformer.flatten({'cacheTestA': 'x', 'cacheTestB': {'raw': 1}})
+            Transformer.flatten({'cacheTestA': 'y', 'cacheTestB': {'raw': 2}})
+        self.assertEqual(1, compile_.call_count)
+
+    @parameterized.expand([
+        ({'symbol': 'AMD', 'price': {'raw': 1.5}}, {'symbol': 'AMD', 'price': {'fmt': '1.50'}}, True),
+        ({'symbol': 'AMD', 'actions': ['split']}, {'symbol': 'AMD', 'actions': 'split'}, False),
+        ({'symbol': 'AMD', 'price': 1.5}, {'symbol': 'AMD', 'price': None}, True),
+    ])
+    def test_flatten_schema_mismatch(self, first, second, strict_raises):
+        """
+        Test that a value of another shape than in the cached schema uses the generic function
+        """
+        Transformer.flatten(first)
+        if strict_raises:
+            with self.assertRaises(ValueError):
+                Transformer.flatten(second)
+        else:
+            self.assertEqual(Transformer.flatten_dict(second), Transformer.flatten(second))
+        self.assertEqual(Transformer.flatten_dict(second, True), Transformer.flatten(second, True))
+
+    def test_flatten_tolerant(self):
+        """
+        Test that tolerant mode keeps lists and None values and skips unknown shapes
+        """
+        data = {'symbol': 'AMD', 'actions': [1, 2], 'dividend': None, 'price': {'raw': 1.5},
+                'fmtOnly': {'fmt': '1.50'}, 'other': object()}
+        expected = {'symbol': 'AMD', 'actions': [1, 2], 'dividend': None, 'price': 1.5}
+        self.assertEqual(expected, Transformer.flatten_dict(data, tolerant=True))
+        self.assertEqual(expected, Transformer.flatten(data, tolerant=True))
+        with self.assertRaises(ValueError):
+            Transformer.flatten(data)
+
+    def test_flatten_tolerant_detects_skipped_key_with_known_shape(self):
+        """
+        Test that a key skipped in the cached tolerant schema is kept once its value has a known shape
+        """
+        Transformer.flatten({'symbol': 'AMD', 'other': object()}, tolerant=True)
+        self.assertEqual({'symbol': 'MS', 'other': 1.5},
+                         Transformer.flatten({'symbol': 'MS', 'other': {'raw': 1.5}}, tolerant=True))
+        self.assertEqual({'symbol': 'GS'}, Transformer.flatten({'symbol': 'GS', 'other': (1, 2)}, tolerant=True))
@@ -0,0 +1,86 @@
+# Copyright 2023 Dominic Kneup.
+# Licensed under the MIT License; you can find the LICENSE file in the project's root folder.
+
+import copy
+import unittest
+from client.api.validators.validation_plan import ValidationPlan, Rule, truthy, present, MISSING
+from client.api.validators.historic_data_validator import HistoricDataValidator
+from client.exceptions.APIClientExceptions import ValidatorException
+from tests.validators import test_historic_data_validator
+
+
+class TestValidationPlan(unittest.TestCase):
+    def setUp(self):
+        self.plan = ValidationPlan(
+            root=(('data', 'Missing data property'), ('result', 'Missing result property')),
+            empty_message='Empty result',
+            rules=[
+                Rule(('meta',), 'symbol', truthy, 'Missing symbol property'),
+                Rule(('meta',), 'currency', present, 'Missing currency property'),
+                Rule(('items', 0), 'value', present, 'Invalid sub-properties for value'),
+            ]
+        )
+
+    def test_valid_data(self):
+        data = {'data': {'result': [{'meta': {'symbol': 'GS', 'currency': ''}, 'items': [{'value': 1}]}]}}
+        self.assertEqual([], self.plan.collect(data))
+        self.assertIsNone(self.plan.validate(data))
+
+    def test_root_errors(self):
+        self.assertEqual(['Missing data property'], self.plan.collect({}))
+        self.assertEqual(['Missing result property'], self.plan.collect({'data': {}}))
+        self.assertEqual(['Empty result'], self.plan.collect({'data': {'result': []}}))
+
+    def test_collects_all_errors_of_all_entries(self):
+        data = {'data': {'result': [
+            {'meta': {'symbol': ''}, 'items': []},
+            {'meta': {'symbol': 'GS', 'currency': 'USD'}},
+        ]}}
+        expected = [
+            'Missing symbol property',
+            'Missing currency property',
+            'Missing items property',
+            'Missing items property (result 1)',
+        ]
+        self.assertEqual(expected, self.plan.collect(data))
+
+        with self.assertRaises(ValidatorException) as context:
+            self.plan.validate(data)
+        self.assertEqual('Missing symbol property', str(context.exception))
+        self.assertEqual(expected, context.exception.errors)
+
+    def test_missing_marker_passed_to_predicate(self):
+        seen = []
+        plan = ValidationPlan((('result', 'Missing result property'),), 'Empty',
+                              [Rule((), 'key', lambda value: seen.append(value) or True, '')])
+        plan.collect({'result': [{}]})
+        self.assertIs(MISSING, seen[0])
+
+    def test_historic_data_multi_result(self):
+        data = test_historic_data_validator.HistoricDataValidatorTest._load_test_data()
+        second = copy.deepcopy(data['chart']['result'][0])
+        del second['meta']['currency']
+        del second['indicators']['quote'][0]['open']
+        data['chart']['result'].append(second)
+
+        self.assertEqual(['Missing currency property (result 1)', 'Invalid sub-properties for open (result 1)'],
+                         HistoricDataValidator.collect_errors(data))
+
+    def test_plan_follows_class_properties(self):
+        class StrictValidator(HistoricDataValidator):
+            required_properties = HistoricDataValidator.required_properties + ['dataGranularity']
+
+        data = test_historic_data_validator.HistoricDataValidatorTest._load_test_data()
+        del data['chart']['result'][0]['meta']['dataGranularity']
+        plan = HistoricDataValidator.plan()
+        self.assertIs(plan, HistoricDataValidator.plan())
+        self.assertEqual([], HistoricDataValidator.collect_errors(data))
+        self.assertEqual(['Missing dataGranularity property'], StrictValidator.collect_errors(data))
+
+        StrictValidator.required_properties.remove('dataGranularity')
+        self.assertEqual([], StrictValidator.collect_errors(data))
+        self.assertIs(plan, HistoricDataValidator.plan())
+
+
+if __name__ == '__main__':
+    unittest.main()
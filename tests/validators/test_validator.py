@@ -4,7 +4,10 @@
 import unittest
 from datetime import datetime
 from parameterized import parameterized
-from client.exceptions.APIClientExceptions import ValidatorException
+from client.exceptions.APIClientExceptions import (
+    ValidatorException, UpstreamError, RateLimited, CrumbExpired, NotFound, InvalidSymbol,
+    UpstreamUnavailable
+)
 from client.api.validators.validator import Validator
 
 class TestValidator(unittest.TestCase):
@@ -28,7 +31,8 @@ class TestValidator(unittest.TestCase):
     @parameterized.expand([
         ("1d", True),
         ("1mo", True),
-        ("max", True),
+        ("1wk", True),
+        ("max", False),
         ("", False),
         ("invalid_interval", False),
     ])
@@ -39,6 +43,35 @@ class TestValidator(unittest.TestCase):
             with self.assertRaises(Exception):
                 Validator.check_interval(interval)
 
+    # Test valid ranges
+    @parameterized.expand([
+        ("max", True),
+        ("ytd", True),
+        ("5y", True),
+        ("1wk", False),
+        ("", False),
+    ])
+    def test_checkRange(self, data_range, expected):
+        if expected:
+            self.assertTrue(Validator.check_range(data_range))
+        else:
+            with self.assertRaises(ValidatorException):
+                Validator.check_range(data_range)
+
+    # Test valid events
+    @parameterized.expand([
+        (["div", "splits", "capitalGains"], True),
+        (["div"], True),
+        ([], False),
+        (["earnings"], False),
+    ])
+    def test_checkEvents(self, events, expected):
+        if expected:
+            self.assertTrue(Validator.check_events(events))
+        else:
+            with self.assertRaises(ValidatorException):
+                Validator.check_events(events)
+
     # Test date validation
     @parameterized.expand([
         (datetime(2023, 1, 1), datetime(2023, 1, 10), True),
@@ -77,5 +110,36 @@ class TestValidator(unittest.TestCase):
         with self.assertRaises(ValidatorException):
             Validator.check_response_error(data)
 
+    # Test classification of error status codes
+    @parameterized.expand([
+        (429, b'Too Many Requests', RateLimited, True),
+        (401, b'{"finance":{"error":{"code":"Unauthorized","description":"Invalid Crumb"}}}', CrumbExpired, True),
+        (403, b'Invalid cookie', CrumbExpired, True),
+        (404, b'{"chart":{"result":null,"error":{"code":"Not Found","description":"No data found, symbol may be delisted"}}}', InvalidSymbol, False),
+        (404, b'<html>Not Found</html>', NotFound, False),
+        (503, b'', UpstreamUnavailable, True),
+        (400, b'{"chart":{"error":{"code":"Bad Request"}}}', UpstreamError, False),
+    ])
+    def test_check_status(self, status_code, body, expected, retryable):
+        with self.assertRaises(expected) as context:
+            Validator.check_status(status_code, body, {'Retry-After': '30'})
+        self.assertIs(type(context.exception), expected)
+        self.assertEqual(status_code, context.exception.status_code)
+        self.assertEqual(retryable, context.exception.retryable)
+
+    def test_check_status_retry_after(self):
+        with self.assertRaises(RateLimited) as context:
+            Validator.check_status(429, b'', {'Retry-After': '30'})
+        self.assertEqual(30.0, context.exception.retry_after)
+
+    def test_check_status_success(self):
+        self.assertIsNone(Validator.check_status(200, b'{}'))
+
+    def test_unknown_symbol_is_invalid_symbol(self):
+        data = '{"chart":{"result":null,"error":{"code":"Not Found","description":"No data found"}}}'
+        with self.assertRaises(InvalidSymbol):
+            Validator.check_response_error(data)
+
+
 if __name__ == '__main__':
     unittest.main()